@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Batched Firestore writer for the HomeBox import scripts.
+
+Groups document writes into WriteBatch commits of up to 500 operations
+(Firestore's per-commit limit) and commits full batches on background
+threads while the caller keeps building the next one. Each committed or
+failed batch is reported back through a callback so the importer can update
+its counters and error list.
+
+Commits that fail with a transient error (quota, UNAVAILABLE, deadline) are
+retried with backoff, and the number of concurrent commits adapts to what
+Firestore accepts (see throttle.py).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from throttle import AdaptiveLimiter, RetryPolicy
+
+# Firestore rejects commits with more than 500 writes
+FIRESTORE_BATCH_LIMIT = 500
+
+# Firestore also rejects commits larger than 10MiB; writes carrying image
+# data URLs (up to ~1MB each) are cut into batches below this size
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+
+class BatchOp(NamedTuple):
+    """A single queued write"""
+    kind: str  # 'set', 'update' or 'delete'
+    doc_ref: Any
+    data: Optional[Dict]
+    tag: Any  # Caller-defined label handed back in the batch callback
+
+
+class BatchWriter:
+    def __init__(self, db, batch_size: int = FIRESTORE_BATCH_LIMIT, max_in_flight: int = 4,
+                 on_batch: Optional[Callable[[int, List[BatchOp], Optional[Exception]], None]] = None,
+                 metrics=None, retry: Optional[RetryPolicy] = None):
+        self.db = db
+        self.metrics = metrics
+        self.batch_size = max(1, min(batch_size, FIRESTORE_BATCH_LIMIT))
+        self.max_in_flight = max(1, max_in_flight)
+        self.on_batch = on_batch
+        self.retry = retry or RetryPolicy(metrics=metrics, name='firestore')
+        # Commits actually running at once: up to max_in_flight, halved
+        # whenever Firestore pushes back
+        self.limiter = AdaptiveLimiter(self.max_in_flight)
+
+        self._ops: List[BatchOp] = []
+        self._futures = []
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                            thread_name_prefix='firestore-batch')
+        # Backpressure: never queue more than max_in_flight uncommitted batches
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._callback_lock = threading.Lock()
+        self._batch_number = 0
+
+        # Statistics
+        self.batches_committed = 0
+        self.batches_failed = 0
+        self.writes_committed = 0
+        self.writes_failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def set(self, doc_ref, data: Dict, tag: Any = None):
+        """Queue a full document write"""
+        self._add(BatchOp('set', doc_ref, data, tag))
+
+    def update(self, doc_ref, data: Dict, tag: Any = None):
+        """Queue a field-level update of an existing document"""
+        self._add(BatchOp('update', doc_ref, data, tag))
+
+    def delete(self, doc_ref, tag: Any = None):
+        """Queue a document delete"""
+        self._add(BatchOp('delete', doc_ref, None, tag))
+
+    def _add(self, op: BatchOp):
+        self._ops.append(op)
+        if len(self._ops) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Hand the pending operations to a background commit"""
+        if not self._ops:
+            return
+
+        ops, self._ops = self._ops, []
+        self._batch_number += 1
+
+        # Blocks while max_in_flight batches are still committing
+        start = time.perf_counter()
+        self._slots.acquire()
+        if self.metrics:
+            self.metrics.observe('firestore.backpressure_wait', time.perf_counter() - start)
+        future = self._executor.submit(self._commit, self._batch_number, ops)
+        self._futures.append(future)
+
+    def drain(self):
+        """Commit pending operations and wait for every in-flight batch"""
+        self.flush()
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """Drain all batches and stop the commit threads"""
+        try:
+            self.drain()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def _commit_once(self, ops: List[BatchOp]):
+        # A fresh batch per attempt; the writes are idempotent (full sets to
+        # deterministic IDs, field updates, deletes), so a retry is safe
+        batch = self.db.batch()
+        for op in ops:
+            if op.kind == 'set':
+                batch.set(op.doc_ref, op.data)
+            elif op.kind == 'update':
+                batch.update(op.doc_ref, op.data)
+            else:
+                batch.delete(op.doc_ref)
+        batch.commit()
+
+    def _commit(self, batch_number: int, ops: List[BatchOp]):
+        error = None
+        start = time.perf_counter()
+        try:
+            self.retry.call(lambda: self._commit_once(ops), self.limiter)
+        except Exception as e:
+            error = e
+        finally:
+            self._slots.release()
+
+        if self.metrics:
+            self.metrics.observe('firestore.batch_commit', time.perf_counter() - start)
+            self.metrics.observe('firestore.batch_size', len(ops), unit='writes')
+            self.metrics.count('firestore.writes_failed' if error else 'firestore.writes', len(ops))
+
+        with self._callback_lock:
+            if error is None:
+                self.batches_committed += 1
+                self.writes_committed += len(ops)
+            else:
+                self.batches_failed += 1
+                self.writes_failed += len(ops)
+
+            if self.on_batch:
+                try:
+                    self.on_batch(batch_number, ops, error)
+                except Exception as e:
+                    print(f"❌ Batch callback failed: {e}")
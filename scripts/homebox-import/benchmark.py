@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+HomeBox Import Benchmark
+
+Measures both importers end to end without Firebase or a HomeBox server:
+a synthetic CSV export (synthetic_data.py) is imported into an in-memory
+Firestore (fake_firestore.py), then images are imported from a local fake
+HomeBox server (fake_homebox_server.py) serving a synthetic photo corpus.
+
+Each scale runs in a fresh process so peak RSS is measured per run. Reports
+CSV items/sec, images/sec, name matching time and peak RSS.
+
+Usage:
+    python benchmark.py --scales 1000,10000,100000
+    python benchmark.py --scales 1000,10000 --json results.json
+    python benchmark.py --scales 1000,10000 --compare results.json
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+BENCHMARK_USER_ID = 'benchmark-user'
+BENCHMARK_TOKEN = 'benchmark-token'
+
+# Metrics compared by --compare: (section, metric, higher is better)
+COMPARED_METRICS = [
+    ('csv', 'items_per_sec', True),
+    ('csv', 'peak_rss_mb', False),
+    ('images', 'images_per_sec', True),
+    ('matching', 'seconds', False),
+    ('images', 'peak_rss_mb', False),
+]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_scenario(config: Dict) -> Dict:
+    """Run one benchmark scale; meant to be called in a fresh process"""
+    from fake_firestore import FakeFirestore
+    from fake_homebox_server import FakeHomeBoxServer
+    from homebox_image_importer import HomeBoxImageImporter
+    from homebox_import import HomeBoxImporter
+    from synthetic_data import generate_image_corpus, generate_rows, homebox_api_items, write_csv
+
+    result = {'rows': config['rows']}
+    with tempfile.TemporaryDirectory() as work_dir, open(os.devnull, 'w') as devnull:
+        csv_path = os.path.join(work_dir, 'homebox-export.csv')
+        rows = list(generate_rows(config['rows'], config['locations'], config['labels'], seed=config['seed']))
+        write_csv(csv_path, iter(rows))
+        db = FakeFirestore(commit_latency=config['firestore_latency'],
+                           failure_rate=config['failure_rate'], seed=config['seed'])
+
+        # CSV import
+        importer = HomeBoxImporter(csv_path, user_id=BENCHMARK_USER_ID,
+                                   journal_path=os.path.join(work_dir, 'import.journal.sqlite'))
+        importer.db = db
+        with contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            importer.run_import()
+            seconds = time.perf_counter() - start
+        result['csv'] = {
+            'items': importer.items_imported,
+            'errors': len(importer.errors),
+            'retries': importer.writer.retry.retries,
+            'seconds': round(seconds, 3),
+            'items_per_sec': round(importer.items_imported / seconds, 1) if seconds else None,
+            'peak_rss_mb': round(peak_rss_mb(), 1)
+        }
+        if config['skip_images']:
+            return result
+
+        # Image import from the fake HomeBox server
+        corpus = generate_image_corpus(config['corpus_size'], config['image_size'], seed=config['seed'])
+        api_items = homebox_api_items(rows, config['image_ratio'], config['name_noise'],
+                                      config['max_images'], seed=config['seed'])
+        del rows
+        with FakeHomeBoxServer(api_items, token=BENCHMARK_TOKEN, latency=config['homebox_latency'],
+                               image_corpus=corpus, failure_rate=config['failure_rate'], seed=config['seed']) as server:
+            image_importer = HomeBoxImageImporter(server.url, BENCHMARK_TOKEN, BENCHMARK_USER_ID,
+                                                  compress_workers=config['compress_workers'],
+                                                  journal_path=os.path.join(work_dir, 'images.journal.sqlite'))
+            image_importer.db = db
+            with contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                image_importer.run_import()
+                seconds = time.perf_counter() - start
+        result['images'] = {
+            'images': image_importer.images_imported,
+            'errors': len(image_importer.errors),
+            'retries': image_importer.homebox_retry.retries + image_importer.firestore_retry.retries,
+            'seconds': round(seconds, 3),
+            'images_per_sec': round(image_importer.images_imported / seconds, 2) if seconds else None,
+            'peak_rss_mb': round(peak_rss_mb(), 1)
+        }
+
+        # Name matching of every HomeBox item against the imported items
+        matcher = HomeBoxImageImporter(server.url, BENCHMARK_TOKEN, BENCHMARK_USER_ID)
+        matcher.db = db
+        db.failure_rate = 0
+        with contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            matcher.load_hearth_items_cache()
+            index_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            for item in api_items:
+                matcher.find_matching_hearth_item(item['name'])
+            seconds = time.perf_counter() - start
+        result['matching'] = {
+            'names': len(api_items),
+            'index_seconds': round(index_seconds, 3),
+            'seconds': round(seconds, 3),
+            'names_per_sec': round(len(api_items) / seconds, 1) if seconds else None,
+            'exact': matcher.name_matches_found,
+            'fuzzy': matcher.fuzzy_matches_found,
+            'unmatched': matcher.no_matches_found
+        }
+
+        # The same items by their HomeBox IDs, as imported items are matched
+        with contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            id_matches = sum(1 for item in api_items if matcher.find_hearth_item(item)[1] == 'id')
+            result['matching']['id_seconds'] = round(time.perf_counter() - start, 3)
+        result['matching']['id_matches'] = id_matches
+    return result
+
+
+def print_result(result: Dict):
+    csv_stats = result['csv']
+    print(f"\n📊 {result['rows']:,} rows")
+    print(f"  CSV import:   {csv_stats['items']:,} items in {csv_stats['seconds']:.2f}s "
+          f"({csv_stats['items_per_sec']:,.0f} items/sec, peak RSS {csv_stats['peak_rss_mb']:.0f}MB)")
+    if 'images' in result:
+        images = result['images']
+        matching = result['matching']
+        print(f"  Image import: {images['images']:,} images in {images['seconds']:.2f}s "
+              f"({images['images_per_sec']:.1f} images/sec, peak RSS {images['peak_rss_mb']:.0f}MB)")
+        print(f"  Matching:     {matching['names']:,} names in {matching['seconds']:.2f}s "
+              f"(index {matching['index_seconds']:.2f}s; {matching['exact']} exact, "
+              f"{matching['fuzzy']} fuzzy, {matching['unmatched']} unmatched)")
+        print(f"  ID matching:  {matching['id_matches']:,} of {matching['names']:,} items in {matching['id_seconds']:.2f}s")
+    retries = result['csv']['retries'] + result.get('images', {}).get('retries', 0)
+    if retries:
+        print(f"  🔁 {retries} transient errors retried")
+    errors = result['csv']['errors'] + result.get('images', {}).get('errors', 0)
+    if errors:
+        print(f"  ⚠️  {errors} errors during the run")
+
+
+def compare_results(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Describe metrics that got worse than the baseline by more than tolerance"""
+    baseline_by_rows = {result['rows']: result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_rows.get(result['rows'])
+        if not previous:
+            continue
+        for section, metric, higher_is_better in COMPARED_METRICS:
+            current_value = result.get(section, {}).get(metric)
+            baseline_value = previous.get(section, {}).get(metric)
+            if not current_value or not baseline_value:
+                continue
+            change = (current_value - baseline_value) / baseline_value
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{result['rows']:,} rows: {section} {metric} "
+                                   f"{baseline_value} → {current_value} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the HomeBox importers against local stand-ins')
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)), help='Comma-separated row counts (default: 1000,10000,100000)')
+    parser.add_argument('--locations', type=int, default=20, help='Locations in the synthetic export (default: 20)')
+    parser.add_argument('--labels', type=int, default=50, help='Distinct labels (default: 50)')
+    parser.add_argument('--name-noise', type=float, default=0.1, help='Share of HomeBox names that differ from the CSV (default: 0.1)')
+    parser.add_argument('--image-ratio', type=float, default=0.5, help='Share of items with an image (default: 0.5)')
+    parser.add_argument('--max-images', type=int, default=100, help='Most images imported per scale (default: 100)')
+    parser.add_argument('--corpus-size', type=int, default=12, help='Distinct synthetic photos (default: 12)')
+    parser.add_argument('--image-size', default='3000x2000', help='Synthetic photo size (default: 3000x2000)')
+    parser.add_argument('--compress-workers', type=int, default=os.cpu_count() or 2, help='Compression processes (default: CPU count)')
+    parser.add_argument('--homebox-latency', type=float, default=0.0, help='Seconds added to each fake HomeBox request')
+    parser.add_argument('--firestore-latency', type=float, default=0.0, help='Seconds added to each fake Firestore batch commit')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of fake HomeBox requests and Firestore writes that fail transiently')
+    parser.add_argument('--skip-images', action='store_true', help='Only benchmark the CSV import')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON from an earlier run; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before --compare fails (default: 0.2)')
+
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.image_size.lower().split('x'))
+    scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+
+    print("⏱️  HomeBox Import Benchmark")
+    print("=" * 50)
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for rows in scales:
+        config = {
+            'rows': rows, 'locations': args.locations, 'labels': args.labels, 'seed': args.seed,
+            'name_noise': args.name_noise, 'image_ratio': args.image_ratio, 'max_images': args.max_images,
+            'corpus_size': args.corpus_size, 'image_size': (width, height),
+            'compress_workers': args.compress_workers, 'homebox_latency': args.homebox_latency,
+            'firestore_latency': args.firestore_latency, 'failure_rate': args.failure_rate,
+            'skip_images': args.skip_images
+        }
+        # A fresh process per scale, so peak RSS belongs to this run alone
+        # (not a multiprocessing.Pool: its daemon workers can't start the
+        # image importer's compression processes)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_scenario, config).result()
+        result['config'] = config
+        results.append(result)
+        print_result(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions against {args.compare}:")
+            for regression in regressions:
+                print(f"  • {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
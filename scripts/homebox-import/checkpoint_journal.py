@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for resumable HomeBox imports.
+
+A small SQLite file records every container, item and image update once its
+Firestore write has been committed. On a rerun the importers load the
+completed keys into memory and skip finished work with an O(1) lookup per
+row, continuing from where the previous run stopped.
+"""
+
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class CheckpointJournal:
+    def __init__(self, path: str, user_id: str):
+        self.path = path
+        self.user_id = user_id
+        self._lock = threading.Lock()
+        self._completed: Dict[str, Dict[str, Optional[str]]] = {}
+
+        # Several import processes may share one journal; wait for each
+        # other's commits instead of failing with "database is locked"
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS completed (
+                user_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                doc_id TEXT,
+                completed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, kind, key)
+            )
+        """)
+        self._conn.commit()
+
+    def completed(self, kind: str) -> Dict[str, Optional[str]]:
+        """Return {key: doc_id} for finished work of a kind (loaded once, then kept in memory)"""
+        with self._lock:
+            if kind not in self._completed:
+                rows = self._conn.execute(
+                    'SELECT key, doc_id FROM completed WHERE user_id = ? AND kind = ?',
+                    (self.user_id, kind)
+                )
+                self._completed[kind] = {key: doc_id for key, doc_id in rows}
+            return self._completed[kind]
+
+    def is_done(self, kind: str, key: str) -> bool:
+        return key in self.completed(kind)
+
+    def mark_done(self, kind: str, entries: Iterable[Tuple[str, Optional[str]]]):
+        """Record (key, doc_id) pairs as finished; called after the write committed"""
+        entries = list(entries)
+        if not entries:
+            return
+
+        completed = self.completed(kind)
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO completed (user_id, kind, key, doc_id) VALUES (?, ?, ?, ?)',
+                [(self.user_id, kind, key, doc_id) for key, doc_id in entries]
+            )
+            self._conn.commit()
+            completed.update(entries)
+
+    def reset(self):
+        """Forget all progress for this user"""
+        with self._lock:
+            self._conn.execute('DELETE FROM completed WHERE user_id = ?', (self.user_id,))
+            self._conn.commit()
+            self._completed.clear()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
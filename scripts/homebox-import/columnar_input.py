@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Columnar (Parquet/Arrow) input for the CSV import
+
+Every homebox_import.py run used to parse the whole CSV export as text, twice:
+once to analyze it and once to import it. With pyarrow installed:
+
+- A Parquet (.parquet) or Arrow IPC / Feather (.arrow, .feather) file with the
+  export's columns can be passed to --csv instead of the CSV
+- The first pass over a CSV also writes its cleaned import columns to
+  <csv>.columns.parquet. Later passes and later runs read that file as long
+  as the CSV's size and modification time still match, which takes a
+  fraction of the time of parsing the text
+
+Only the columns the import uses (item_fields.IMPORT_COLUMNS) are read or
+cached. Values stay text, stripped and with empty cells as nulls, exactly as
+the CSV reader produces them: the transform parses prices and dates itself,
+so documents (and their import hashes) are the same whichever input is used.
+
+pandas and pyarrow are imported on first use, so checking a path's format
+costs nothing.
+"""
+
+import importlib.util
+import json
+import os
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Input formats by file extension
+COLUMNAR_FORMATS = {'.parquet': 'parquet', '.pq': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+# Bump when the cached layout or cleaning changes, so old caches are rebuilt
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.columns.parquet'
+SOURCE_METADATA_KEY = b'hearth.source'
+
+
+def available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def columnar_format(path: str) -> Optional[str]:
+    """'parquet' or 'arrow' for columnar input files, None for CSVs"""
+    return COLUMNAR_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def cache_path(csv_path: str) -> str:
+    return f"{csv_path}{CACHE_SUFFIX}"
+
+
+def source_fingerprint(csv_path: str) -> Dict:
+    """What a cache must have been converted from to still be valid"""
+    stat = os.stat(csv_path)
+    return {'version': CACHE_VERSION, 'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns}
+
+
+def cached_columns(csv_path: str) -> Optional[str]:
+    """Path of an up-to-date converted copy of the CSV, or None"""
+    path = cache_path(csv_path)
+    if not os.path.exists(path) or not available():
+        return None
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+        source = json.loads(metadata.get(SOURCE_METADATA_KEY, b'null'))
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+    return path if source == source_fingerprint(csv_path) else None
+
+
+def _frame(batch) -> 'pd.DataFrame':
+    """Cleaned DataFrame of a record batch, like HomeBoxImporter.clean_frame"""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    columns = {}
+    for name, values in zip(batch.schema.names, batch.columns):
+        if not (pa.types.is_string(values.type) or pa.types.is_large_string(values.type)):
+            values = pc.cast(values, pa.string())
+        # Object arrays of str with None for nulls, without a pass over pandas
+        columns[name] = pc.utf8_trim_whitespace(values).to_numpy(zero_copy_only=False)
+    return pd.DataFrame(columns, dtype=object)
+
+
+def iter_columnar_frames(path: str, chunk_size: int,
+                         columns: Optional[Sequence[str]] = None) -> Iterator['pd.DataFrame']:
+    """Stream a Parquet or Arrow file as cleaned DataFrame chunks of the given columns"""
+    if not available():
+        raise RuntimeError("Reading Parquet/Arrow files needs pyarrow. Run: pip install pyarrow")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if columnar_format(path) == 'arrow':
+        # Memory-mapped: only the selected columns' pages are ever touched
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        if columns is not None:
+            table = table.select([name for name in table.column_names if name in set(columns)])
+        batches = table.to_batches(max_chunksize=chunk_size)
+    else:
+        parquet = pq.ParquetFile(path)
+        if columns is not None:
+            columns = [name for name in parquet.schema_arrow.names if name in set(columns)]
+        batches = parquet.iter_batches(batch_size=chunk_size, columns=columns)
+
+    for batch in batches:
+        if batch.num_rows:
+            yield _frame(batch)
+
+
+class CsvConverter:
+    """Writes cleaned CSV chunks to the Parquet cache while they are read"""
+
+    def __init__(self, csv_path: str, path: Optional[str] = None):
+        self.csv_path = csv_path
+        # The cache next to the CSV, or another file (e.g. a temporary copy)
+        self.path = path or cache_path(csv_path)
+        self.fingerprint = source_fingerprint(csv_path)
+        self._temp_path = f"{self.path}.{os.getpid()}.tmp"
+        self._writer = None
+        self._schema = None
+        self.rows_written = 0
+
+    def write(self, df: 'pd.DataFrame'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            # Text columns throughout, as read from the CSV
+            self._schema = pa.schema([(name, pa.string()) for name in df.columns],
+                                     metadata={SOURCE_METADATA_KEY: json.dumps(self.fingerprint)})
+            self._writer = pq.ParquetWriter(self._temp_path, self._schema)
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        self.rows_written += len(df)
+
+    def commit(self) -> bool:
+        """Publish the cache, unless the CSV changed while it was being read"""
+        if self._writer is None:
+            return False
+        self._writer.close()
+        self._writer = None
+        if source_fingerprint(self.csv_path) != self.fingerprint:
+            self.discard()
+            return False
+        os.replace(self._temp_path, self.path)
+        return True
+
+    def discard(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
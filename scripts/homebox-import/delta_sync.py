@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Delta sync helpers for re-importing a HomeBox export
+
+Every imported container and item carries an importHash: a stable hash of
+the fields the import owns. On a sync the generated document's hash is
+compared with the stored one; equal hashes mean nothing to write, otherwise
+only the fields whose values differ are updated.
+
+Fields the import doesn't own (timestamps, the image fields set by the image
+importer or --with-images) are left out of the hash and never overwritten by
+a sync.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+HASH_FIELD = 'importHash'
+
+# Not compared or overwritten by a sync: set once, or owned by someone else
+SYNC_IGNORED_FIELDS = {'createdAt', 'updatedAt', 'imageUrl', 'hasImage', 'thumbnailUrl', 'imagePlaceholder',
+                       HASH_FIELD}
+
+
+def normalize_value(value: Any) -> Any:
+    """Comparable form of a field value, as generated or as read back from Firestore"""
+    if isinstance(value, datetime):
+        # Firestore returns timezone-aware UTC timestamps; generated dates are naive UTC
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalize_value(item) for key, item in value.items()}
+    return value
+
+
+def _json_default(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def document_hash(document: Dict) -> str:
+    """Stable hash of the import-owned fields of a generated document"""
+    content = {key: value for key, value in document.items() if key not in SYNC_IGNORED_FIELDS}
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':'), default=_json_default)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:20]
+
+
+def changed_fields(document: Dict, existing: Dict) -> Dict:
+    """Import-owned fields of document whose values differ from the existing document"""
+    return {
+        key: value for key, value in document.items()
+        if key not in SYNC_IGNORED_FIELDS
+        and (key not in existing or normalize_value(value) != normalize_value(existing[key]))
+    }
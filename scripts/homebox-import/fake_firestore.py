@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+In-memory Firestore stand-in
+
+Implements the subset of the google-cloud-firestore client the import
+scripts use (collections, document references, write batches and simple
+queries) on plain dictionaries, with optional latency per request and
+injected transient errors. Useful for benchmarks and dry runs without a
+Firebase project.
+
+Usage:
+    db = FakeFirestore(commit_latency=0.05)
+    importer = HomeBoxImporter('export.csv', user_id='bench-user')
+    importer.db = db  # initialize_firebase() keeps an existing client
+    importer.run_import()
+
+Server timestamps, DELETE_FIELD and Increment transforms are applied when
+firebase-admin is installed; without it, values are stored as given.
+"""
+
+import contextlib
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    from google.cloud.firestore_v1 import DELETE_FIELD, SERVER_TIMESTAMP
+    from google.cloud.firestore_v1.transforms import Increment
+except ImportError:
+    DELETE_FIELD = SERVER_TIMESTAMP = Increment = None
+
+FIRESTORE_BATCH_LIMIT = 500
+
+_OPERATORS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a is not None and a < b,
+    '<=': lambda a, b: a is not None and a <= b,
+    '>': lambda a, b: a is not None and a > b,
+    '>=': lambda a, b: a is not None and a >= b,
+    'in': lambda a, b: a in b,
+    'not-in': lambda a, b: a not in b,
+    'array_contains': lambda a, b: isinstance(a, list) and b in a,
+    'array_contains_any': lambda a, b: isinstance(a, list) and any(value in a for value in b),
+}
+
+
+class NotFound(Exception):
+    """Update of a document that doesn't exist"""
+
+
+class Unavailable(Exception):
+    """Injected transient error; code is the HTTP status, as on google.api_core exceptions"""
+
+    def __init__(self, message: str, code: int = 503):
+        super().__init__(message)
+        self.code = code
+
+
+def _apply_fields(current: Dict, data: Dict) -> Dict:
+    """Merge data into a copy of current, resolving Firestore sentinels"""
+    result = dict(current)
+    now = datetime.now(timezone.utc)
+    for field, value in data.items():
+        if DELETE_FIELD is not None and value is DELETE_FIELD:
+            result.pop(field, None)
+        elif SERVER_TIMESTAMP is not None and value is SERVER_TIMESTAMP:
+            result[field] = now
+        elif Increment is not None and isinstance(value, Increment):
+            result[field] = (result.get(field) or 0) + value.value
+        else:
+            result[field] = list(value) if isinstance(value, list) else value
+    return result
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference: 'FakeDocumentReference', data: Optional[Dict]):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict]:
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field: str) -> Any:
+        return (self._data or {}).get(field)
+
+
+class FakeDocumentReference:
+    def __init__(self, db: 'FakeFirestore', collection: str, document_id: str):
+        self._db = db
+        self.id = document_id
+        self.path = f"{collection}/{document_id}"
+        self._collection = collection
+
+    def _documents(self) -> Dict[str, Dict]:
+        return self._db.data.setdefault(self._collection, {})
+
+    def set(self, data: Dict, merge: bool = False):
+        with self._db._call():
+            self._db._write([(self, 'set_merge' if merge else 'set', data)])
+
+    def update(self, data: Dict):
+        with self._db._call():
+            self._db._write([(self, 'update', data)])
+
+    def delete(self):
+        with self._db._call():
+            self._db._write([(self, 'delete', None)])
+
+    def get(self) -> FakeDocumentSnapshot:
+        self._db._request()
+        with self._db.lock:
+            self._db.reads += 1
+            return FakeDocumentSnapshot(self, self._documents().get(self.id))
+
+
+class FakeQuery:
+    def __init__(self, db: 'FakeFirestore', collection: str, filters=(), orders=(),
+                 limit: Optional[int] = None, fields: Optional[List[str]] = None, cursor=None):
+        self._db = db
+        self._collection = collection
+        self._filters = list(filters)
+        self._orders = list(orders)
+        self._limit = limit
+        self._fields = fields
+        self._cursor = cursor
+
+    def _copy(self, **changes) -> 'FakeQuery':
+        state = dict(filters=self._filters, orders=self._orders, limit=self._limit,
+                     fields=self._fields, cursor=self._cursor)
+        state.update(changes)
+        return FakeQuery(self._db, self._collection, **state)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None,
+              value: Any = None, filter=None) -> 'FakeQuery':
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + [(field_path, op_string, value)])
+
+    def order_by(self, field_path: str, direction: str = 'ASCENDING') -> 'FakeQuery':
+        return self._copy(orders=self._orders + [(field_path, direction)])
+
+    def limit(self, count: int) -> 'FakeQuery':
+        return self._copy(limit=count)
+
+    def select(self, field_paths: List[str]) -> 'FakeQuery':
+        return self._copy(fields=list(field_paths))
+
+    def start_after(self, document_fields) -> 'FakeQuery':
+        return self._copy(cursor=document_fields)
+
+    def _sort_key(self, document_id: str, data: Dict):
+        # Missing and null values sort first, as in Firestore
+        values = tuple((data.get(field) is not None, data.get(field)) for field, _ in self._orders)
+        return values + ((True, document_id),)
+
+    def stream(self) -> Iterator[FakeDocumentSnapshot]:
+        self._db._request()
+        with self._db.lock:
+            documents = list(self._db.data.get(self._collection, {}).items())
+
+        matches = [
+            (document_id, data) for document_id, data in documents
+            if all(_OPERATORS[op](data.get(field), value) for field, op, value in self._filters)
+        ]
+        # Firestore orders by the requested fields, then by document ID
+        descending = bool(self._orders) and self._orders[0][1] == 'DESCENDING'
+        matches.sort(key=lambda match: self._sort_key(*match), reverse=descending)
+
+        if self._cursor is not None:
+            if isinstance(self._cursor, FakeDocumentSnapshot):
+                cursor_key = self._sort_key(self._cursor.id, self._cursor._data or {})
+            else:
+                cursor_key = tuple((self._cursor.get(field) is not None, self._cursor.get(field))
+                                   for field, _ in self._orders)
+            width = len(cursor_key)
+            if descending:
+                matches = [match for match in matches if self._sort_key(*match)[:width] < cursor_key]
+            else:
+                matches = [match for match in matches if self._sort_key(*match)[:width] > cursor_key]
+
+        if self._limit is not None:
+            matches = matches[:self._limit]
+
+        with self._db.lock:
+            self._db.reads += len(matches)
+        for document_id, data in matches:
+            if self._fields is not None:
+                data = {field: data[field] for field in self._fields if field in data}
+            yield FakeDocumentSnapshot(FakeDocumentReference(self._db, self._collection, document_id), data)
+
+    def get(self) -> List[FakeDocumentSnapshot]:
+        return list(self.stream())
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, db: 'FakeFirestore', name: str):
+        super().__init__(db, name)
+        self.id = name
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        # Firestore auto-IDs are 20 characters
+        return FakeDocumentReference(self._db, self._collection, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, data: Dict):
+        doc_ref = self.document()
+        doc_ref.set(data)
+        return datetime.now(timezone.utc), doc_ref
+
+
+class FakeWriteBatch:
+    def __init__(self, db: 'FakeFirestore'):
+        self._db = db
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def set(self, reference: FakeDocumentReference, data: Dict, merge: bool = False):
+        self._writes.append((reference, 'set_merge' if merge else 'set', data))
+
+    def update(self, reference: FakeDocumentReference, data: Dict):
+        self._writes.append((reference, 'update', data))
+
+    def delete(self, reference: FakeDocumentReference):
+        self._writes.append((reference, 'delete', None))
+
+    def commit(self):
+        if len(self._writes) > FIRESTORE_BATCH_LIMIT:
+            raise ValueError(f"A batch can contain at most {FIRESTORE_BATCH_LIMIT} writes")
+        with self._db._call(latency=self._db.commit_latency):
+            self._db._write(self._writes)
+        with self._db.lock:
+            self._db.commits += 1
+        self._writes = []
+
+
+class FakeFirestore:
+    """
+    failure_rate makes that share of writes fail with UNAVAILABLE, and
+    max_concurrent_writes rejects writes beyond that many at once with
+    RESOURCE_EXHAUSTED, to exercise retries and adaptive concurrency.
+    """
+
+    def __init__(self, latency: float = 0.0, commit_latency: float = 0.0, failure_rate: float = 0.0,
+                 max_concurrent_writes: Optional[int] = None, seed: Optional[int] = None):
+        self.data: Dict[str, Dict[str, Dict]] = {}
+        self.latency = latency
+        self.commit_latency = commit_latency
+        self.failure_rate = failure_rate
+        self.max_concurrent_writes = max_concurrent_writes
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        self.failures = 0
+        self._writes_in_flight = 0
+        self._random = random.Random(seed)
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def _request(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    @contextlib.contextmanager
+    def _call(self, latency: Optional[float] = None):
+        """One write request: latency, then maybe an injected error, then the write"""
+        with self.lock:
+            self._writes_in_flight += 1
+            overloaded = (self.max_concurrent_writes is not None
+                          and self._writes_in_flight > self.max_concurrent_writes)
+            failed = self.failure_rate and self._random.random() < self.failure_rate
+        try:
+            latency = self.latency if latency is None else latency
+            if latency:
+                time.sleep(latency)
+            if overloaded or failed:
+                with self.lock:
+                    self.failures += 1
+                raise Unavailable('Injected RESOURCE_EXHAUSTED' if overloaded else 'Injected UNAVAILABLE',
+                                  429 if overloaded else 503)
+            yield
+        finally:
+            with self.lock:
+                self._writes_in_flight -= 1
+
+    def _write(self, writes):
+        """Apply writes atomically, like a batch commit"""
+        with self.lock:
+            for reference, kind, _ in writes:
+                if kind == 'update' and reference.id not in reference._documents():
+                    raise NotFound(f"No document to update: {reference.path}")
+            for reference, kind, data in writes:
+                documents = reference._documents()
+                if kind == 'delete':
+                    documents.pop(reference.id, None)
+                elif kind == 'set':
+                    documents[reference.id] = _apply_fields({}, data)
+                else:
+                    documents[reference.id] = _apply_fields(documents.get(reference.id, {}), data)
+                self.writes += 1
+
+    def count(self, collection: str) -> int:
+        with self.lock:
+            return len(self.data.get(collection, {}))
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Fake HomeBox Server
+
+A small local stand-in for the HomeBox API, for testing the import scripts
+without a real HomeBox instance. It serves generated items and JPEG
+attachments with optional artificial latency, random 503s and a 429 limit
+on concurrent requests.
+
+Usage:
+    python fake_homebox_server.py --port 3100 --items 500 --token test-token
+    python homebox_image_importer.py --homebox-url http://127.0.0.1:3100 --token test-token --user-id YOUR_USER_ID --test-only
+
+Endpoints:
+    GET /api/v1/items                                  item list (supports page/pageSize)
+    GET /api/v1/items/{itemId}/attachments/{imageId}   JPEG image
+"""
+
+import argparse
+import io
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+ATTACHMENT_PATH = re.compile(r'^/api/v1/items/([^/]+)/attachments/([^/]+)$')
+
+
+def generate_items(count: int, image_ratio: float = 0.5) -> List[Dict]:
+    """Generate deterministic HomeBox item summaries"""
+    items = []
+    every = max(1, round(1 / image_ratio)) if image_ratio > 0 else 0
+    for i in range(count):
+        items.append({
+            'id': f'00000000-0000-4000-8000-{i:012d}',
+            'assetId': f'{i // 1000:03d}-{i % 1000:03d}',
+            'name': f'Item {i}',
+            'description': '',
+            'quantity': 1,
+            'archived': False,
+            'location': {'id': f'loc-{i % 10}', 'name': f'Location {i % 10}'},
+            'labels': [],
+            'imageId': f'10000000-0000-4000-8000-{i:012d}' if every and i % every == 0 else None
+        })
+    return items
+
+
+class FakeHomeBoxServer:
+    def __init__(self, items: List[Dict], token: str = 'test-token', host: str = '127.0.0.1',
+                 port: int = 0, latency: float = 0.0, image_size: tuple = (2000, 1500),
+                 default_page_size: int = 0, image_corpus: Optional[List[bytes]] = None,
+                 failure_rate: float = 0.0, max_concurrent: Optional[int] = None, seed: Optional[int] = None):
+        self.items = items
+        self.items_by_id = {item['id']: item for item in items}
+        self.token = token
+        self.latency = latency
+        self.image_size = image_size
+        self.default_page_size = default_page_size
+        self.image_corpus = image_corpus
+        self.failure_rate = failure_rate
+        self.max_concurrent = max_concurrent
+        self.requests_served = 0
+        self.requests_failed = 0
+        self._in_flight = 0
+        self._random = random.Random(seed)
+        self._images = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def image_bytes(self, image_id: str) -> bytes:
+        """Return a deterministic JPEG for the attachment, generated once or picked from the corpus"""
+        if self.image_corpus:
+            return self.image_corpus[zlib.crc32(image_id.encode()) % len(self.image_corpus)]
+        with self._lock:
+            if image_id not in self._images:
+                seed = sum(image_id.encode())
+                image = Image.linear_gradient('L').resize(self.image_size).convert('RGB')
+                tint = Image.new('RGB', self.image_size, (seed % 256, (seed * 7) % 256, (seed * 13) % 256))
+                image = Image.blend(image, tint, 0.5)
+                output = io.BytesIO()
+                image.save(output, format='JPEG', quality=92)
+                self._images[image_id] = output.getvalue()
+            return self._images[image_id]
+
+    def items_page(self, query: Dict) -> Dict:
+        page = int(query.get('page', ['1'])[0] or 1)
+        page_size = int(query.get('pageSize', [str(self.default_page_size)])[0] or 0)
+        if page_size <= 0:
+            selected = self.items
+            page, page_size = 1, len(self.items)
+        else:
+            start = (page - 1) * page_size
+            selected = self.items[start:start + page_size]
+        return {'items': selected, 'page': page, 'pageSize': page_size, 'total': len(self.items)}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_body(self, status: int, body: bytes = b'', content_type: str = 'application/json',
+                          include_body: bool = True):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if include_body and body:
+                    self.wfile.write(body)
+
+            def handle_request(self, include_body: bool):
+                with server._lock:
+                    server.requests_served += 1
+                    server._in_flight += 1
+                try:
+                    self.respond(include_body)
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+
+            def respond(self, include_body: bool):
+                with server._lock:
+                    overloaded = server.max_concurrent is not None and server._in_flight > server.max_concurrent
+                    failed = server.failure_rate and server._random.random() < server.failure_rate
+                if server.latency:
+                    time.sleep(server.latency)
+                if overloaded or failed:
+                    with server._lock:
+                        server.requests_failed += 1
+                    self.send_body(429 if overloaded else 503, include_body=include_body)
+                    return
+
+                if self.headers.get('Authorization') != f'Bearer {server.token}':
+                    self.send_body(401, b'{"error":"unauthorized"}', include_body=include_body)
+                    return
+
+                parsed = urlparse(self.path)
+                match = ATTACHMENT_PATH.match(parsed.path)
+                if match:
+                    item = server.items_by_id.get(match.group(1))
+                    if not item or item.get('imageId') != match.group(2):
+                        self.send_body(404, include_body=include_body)
+                        return
+                    self.send_body(200, server.image_bytes(match.group(2)), 'image/jpeg', include_body)
+                elif parsed.path.rstrip('/') == '/api/v1/items':
+                    body = json.dumps(server.items_page(parse_qs(parsed.query))).encode()
+                    self.send_body(200, body, include_body=include_body)
+                else:
+                    self.send_body(404, include_body=include_body)
+
+            def do_GET(self):
+                self.handle_request(include_body=True)
+
+            def do_HEAD(self):
+                self.handle_request(include_body=False)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fake HomeBox API server for local testing')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=3100, help='Port to listen on (default: 3100)')
+    parser.add_argument('--items', type=int, default=100, help='Number of generated items (default: 100)')
+    parser.add_argument('--image-ratio', type=float, default=0.5, help='Share of items with an image (default: 0.5)')
+    parser.add_argument('--token', default='test-token', help='Accepted API token (default: test-token)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of delay added to each request')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with 503 (default: 0)')
+    parser.add_argument('--max-concurrent', type=int, help='Answer 429 beyond this many concurrent requests')
+    parser.add_argument('--default-page-size', type=int, default=0, help='Page size when a request has no pageSize (0 = all items)')
+
+    args = parser.parse_args()
+
+    server = FakeHomeBoxServer(generate_items(args.items, args.image_ratio), token=args.token,
+                               host=args.host, port=args.port, latency=args.latency,
+                               default_page_size=args.default_page_size,
+                               failure_rate=args.failure_rate, max_concurrent=args.max_concurrent)
+    print(f"🧪 Fake HomeBox serving {args.items} items at {server.url} (token: {args.token})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
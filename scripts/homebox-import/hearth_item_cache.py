@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Compact cache of a user's Hearth items for the image importer
+
+Items are read page by page, projected to their name, HomeBox IDs and a
+hasImage flag, so existing image data URLs (up to ~1MB each) are never
+downloaded. The cache keeps parallel arrays of document IDs, names and image
+flags plus name and HomeBox ID to position maps, so memory grows with the
+names rather than with the images.
+
+Items imported by homebox_import.py carry the HomeBox item ID and asset ID,
+so those are looked up directly; names are only needed for older imports.
+
+The image importer sets hasImage next to imageUrl. Items given an image
+some other way (the Hearth app, older imports) only have imageUrl; a second
+query reads just the IDs of items with one and flags those too.
+"""
+
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Set to true alongside imageUrl by the image importer
+HAS_IMAGE_FIELD = 'hasImage'
+
+# The image itself (a data URL or a storage URL), however it was set
+IMAGE_URL_FIELD = 'imageUrl'
+
+# Set by homebox_import.py from HB.url and HB.asset_id
+HOMEBOX_ID_FIELD = 'homeboxId'
+HOMEBOX_ASSET_ID_FIELD = 'homeboxAssetId'
+
+# Hearth items read per query page
+DEFAULT_PAGE_SIZE = 1000
+
+
+class HearthItem(NamedTuple):
+    """A cached Hearth item; only created for items that are looked up"""
+    id: str
+    name: str
+    has_image: bool
+
+
+class HearthItemCache:
+    def __init__(self):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.has_image = bytearray()
+        # Name -> position of the last item with that name, in first-seen order
+        self._by_name: Dict[str, int] = {}
+        # HomeBox item ID / asset ID -> position, for items that have them
+        self._by_homebox_id: Dict[str, int] = {}
+        self._by_asset_id: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def add(self, document_id: str, name: str, has_image: bool = False,
+            homebox_id: Optional[str] = None, asset_id: Optional[str] = None):
+        position = len(self.ids)
+        self.ids.append(document_id)
+        self.names.append(name)
+        self.has_image.append(1 if has_image else 0)
+        self._by_name[name] = position
+        if homebox_id:
+            self._by_homebox_id[homebox_id] = position
+        if asset_id and asset_id.strip('0-'):
+            # All-zero asset IDs mean none was assigned
+            self._by_asset_id[asset_id] = position
+
+    def mark_images(self, document_ids: Iterable[str]) -> int:
+        """Flag the given items as having an image; returns how many were newly flagged"""
+        positions = {document_id: position for position, document_id in enumerate(self.ids)}
+        flagged = 0
+        for document_id in document_ids:
+            position = positions.get(document_id)
+            if position is not None and not self.has_image[position]:
+                self.has_image[position] = 1
+                flagged += 1
+        return flagged
+
+    def load_image_urls(self, db, user_id: str, fetch: Optional[Callable] = None) -> int:
+        """
+        Flag the items that have an imageUrl but no hasImage. Only document
+        IDs are read; the query needs a composite index on (userId, imageUrl),
+        which Firestore's error message links to if it is missing.
+        """
+        fetch = fetch or (lambda query: query.get())
+        # An empty projection would return every field, image data included
+        query = (db.collection('items').where('userId', '==', user_id)
+                 .where(IMAGE_URL_FIELD, '>', '').select(['__name__']))
+        return self.mark_images(snapshot.id for snapshot in fetch(query))
+
+    @property
+    def linked(self) -> int:
+        """Items carrying a HomeBox item ID"""
+        return len(self._by_homebox_id)
+
+    def item(self, position: int) -> HearthItem:
+        return HearthItem(self.ids[position], self.names[position], bool(self.has_image[position]))
+
+    def get(self, name: str) -> Optional[HearthItem]:
+        position = self._by_name.get(name)
+        return None if position is None else self.item(position)
+
+    def get_by_homebox_id(self, homebox_id: Optional[str] = None,
+                          asset_id: Optional[str] = None) -> Optional[HearthItem]:
+        """The item imported from a HomeBox item, by item ID or else asset ID"""
+        position = self._by_homebox_id.get(homebox_id) if homebox_id else None
+        if position is None and asset_id:
+            position = self._by_asset_id.get(asset_id)
+        return None if position is None else self.item(position)
+
+    def entries(self) -> Iterator[Tuple[str, int]]:
+        """(name, position) of every distinct name, in the order first seen"""
+        return iter(self._by_name.items())
+
+    @classmethod
+    def load(cls, db, user_id: str, page_size: int = DEFAULT_PAGE_SIZE,
+             fetch: Optional[Callable] = None) -> 'HearthItemCache':
+        """
+        Read the user's items page by page. fetch(query) runs one page query
+        and returns its snapshots (default: query.get()), e.g. with retries.
+        """
+        fetch = fetch or (lambda query: query.get())
+        cache = cls()
+        query = (db.collection('items').where('userId', '==', user_id)
+                 .select(['name', HAS_IMAGE_FIELD, HOMEBOX_ID_FIELD, HOMEBOX_ASSET_ID_FIELD]).limit(page_size))
+        last = None
+        while True:
+            page = fetch(query.start_after(last) if last is not None else query)
+            for snapshot in page:
+                data = snapshot.to_dict() or {}
+                cache.add(snapshot.id, data.get('name', ''), bool(data.get(HAS_IMAGE_FIELD)),
+                          data.get(HOMEBOX_ID_FIELD), data.get(HOMEBOX_ASSET_ID_FIELD))
+            if len(page) < page_size:
+                return cache
+            last = page[-1]
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Async HomeBox API client
+
+Wraps an aiohttp session with a pooled, keep-alive connector, per-request
+timeouts and a cap on concurrent requests, so hundreds of attachment
+downloads can be in flight at once without overwhelming the HomeBox server.
+
+Usage:
+    async with AsyncHomeBoxClient('http://YOUR_HOMEBOX_IP:3100', 'YOUR_API_TOKEN') as client:
+        status, data = await client.get_json('/api/v1/items')
+        image_data = await client.download_attachment(item_id, attachment_id)
+
+The client can be pointed at fake_homebox_server.py for local testing.
+aiohttp is only imported once a session is opened.
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Tuple
+
+if TYPE_CHECKING:
+    import aiohttp
+
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_MAX_CONCURRENT_REQUESTS = 64
+DEFAULT_REQUEST_TIMEOUT = 30
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_KEEPALIVE_TIMEOUT = 30
+
+
+class HomeBoxRequestError(Exception):
+    """A HomeBox request failed with an unexpected status code"""
+
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+
+
+class AsyncHomeBoxClient:
+    def __init__(self, homebox_url: str, api_token: str,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT):
+        self.homebox_url = homebox_url.rstrip('/')
+        self.api_token = api_token
+        self.max_connections = max(1, max_connections)
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.session: Optional['aiohttp.ClientSession'] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """Create the pooled session (must be called inside a running event loop)"""
+        if self.session is not None:
+            return
+
+        import aiohttp
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self._timeout(self.request_timeout),
+            headers={
+                'Authorization': f'Bearer {self.api_token}',
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            }
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+    async def close(self):
+        """Close the session and its pooled connections"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def url(self, path: str) -> str:
+        return f"{self.homebox_url}/{path.lstrip('/')}"
+
+    def _timeout(self, total: Optional[float]) -> 'aiohttp.ClientTimeout':
+        import aiohttp
+        return aiohttp.ClientTimeout(total=total, sock_connect=self.connect_timeout)
+
+    async def get(self, path: str, params: Optional[Dict] = None,
+                  timeout: Optional[float] = None) -> Tuple[int, bytes]:
+        """GET a path and return (status, body)"""
+        if self.session is None:
+            await self.open()
+
+        async with self._semaphore:
+            async with self.session.get(self.url(path), params=params,
+                                        timeout=self._timeout(timeout or self.request_timeout)) as response:
+                body = await response.read()
+                return response.status, body
+
+    async def get_json(self, path: str, params: Optional[Dict] = None,
+                       timeout: Optional[float] = None) -> Tuple[int, Any]:
+        """GET a path and return (status, decoded JSON or None)"""
+        if self.session is None:
+            await self.open()
+
+        async with self._semaphore:
+            async with self.session.get(self.url(path), params=params,
+                                        timeout=self._timeout(timeout or self.request_timeout)) as response:
+                if response.status != 200:
+                    return response.status, None
+                return response.status, await response.json(content_type=None)
+
+    async def head(self, path: str, timeout: Optional[float] = None) -> Tuple[int, Mapping[str, str]]:
+        """HEAD a path and return (status, response headers)"""
+        if self.session is None:
+            await self.open()
+
+        async with self._semaphore:
+            async with self.session.head(self.url(path),
+                                         timeout=self._timeout(timeout or self.request_timeout)) as response:
+                return response.status, response.headers
+
+    async def attachment_info(self, item_id: str, attachment_id: str,
+                              timeout: Optional[float] = None) -> Tuple[Optional[int], Optional[str]]:
+        """
+        (size in bytes, content type) of an item attachment without downloading
+        it; either is None when the server doesn't report it. Raises
+        HomeBoxRequestError on non-200 responses.
+        """
+        path = f'/api/v1/items/{item_id}/attachments/{attachment_id}'
+        status, headers = await self.head(path, timeout=timeout)
+        if status != 200:
+            raise HomeBoxRequestError(status, self.url(path))
+        length = headers.get('Content-Length')
+        size = int(length) if length and length.isdigit() else None
+        content_type = headers.get('Content-Type', '').split(';')[0].strip() or None
+        return size, content_type
+
+    async def download_attachment(self, item_id: str, attachment_id: str,
+                                  timeout: Optional[float] = None) -> bytes:
+        """Download an item attachment, raising HomeBoxRequestError on non-200 responses"""
+        path = f'/api/v1/items/{item_id}/attachments/{attachment_id}'
+        status, body = await self.get(path, timeout=timeout)
+        if status != 200:
+            raise HomeBoxRequestError(status, self.url(path))
+        return body
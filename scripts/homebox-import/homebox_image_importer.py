@@ -11,56 +11,440 @@ Usage:
 """
 
 import argparse
-import requests
+import asyncio
 import json
+import multiprocessing
 import os
 import sys
-from typing import Dict, List, Optional, Tuple
-from urllib.parse import urljoin
-import firebase_admin
-from firebase_admin import credentials, firestore
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
-import hashlib
 import mimetypes
 import base64
-from PIL import Image
 import io
+import math
 import re
-from difflib import SequenceMatcher
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from checkpoint_journal import CheckpointJournal
+from hearth_item_cache import HAS_IMAGE_FIELD, HearthItem, HearthItemCache
+from homebox_client import AsyncHomeBoxClient, HomeBoxRequestError, DEFAULT_REQUEST_TIMEOUT
+from image_cache import ImageCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB
+from image_plan import CACHED_DATA_URL, CACHED_DOWNLOAD, PlanEntry, estimate_plan, read_plan, write_plan
+from image_storage import FirebaseImageStore, ImageStore, ImageVariants, LocalImageStore, object_path
+from metrics import Metrics, format_bytes
+from name_index import FuzzyNameIndex
+from sinks import JsonlSink, Sink
+from throttle import AdaptiveLimiter, AsyncAdaptiveLimiter, DEFAULT_RETRY_ATTEMPTS, RetryPolicy
+
+# Pillow and firebase-admin are imported where they're used (and Pillow in
+# the compression workers), so --test-only and --plan start quickly
+if TYPE_CHECKING:
+    from PIL import Image
 
 # Load environment variables
 load_dotenv()
 
+# Default worker counts per pipeline stage (downloads are async, so many
+# can be in flight on a single thread)
+DEFAULT_DOWNLOAD_WORKERS = 32
+DEFAULT_COMPRESS_WORKERS = os.cpu_count() or 2
+DEFAULT_WRITE_WORKERS = 4
+
+# HomeBox items requested per page; the next page is fetched while the
+# current one is being processed
+DEFAULT_PAGE_SIZE = 100
+PREFETCH_PAGES = 1
+
+# Progress journal for resuming an interrupted image import
+DEFAULT_JOURNAL_PATH = 'homebox_images.journal.sqlite'
+
+# Marks the end of work on a pipeline queue
+_STOP = object()
+
+# Identify compress_image_data's and compress_image_variants' output in the
+# image cache; change them whenever the compression settings change so stale
+# results aren't reused
+COMPRESSION_SETTINGS = 'max1024-800kb-v3'
+VARIANT_SETTINGS = 'max1024-800kb-thumb256-v1'
+
+# Hearth's image limits
+MAX_IMAGE_DIMENSION = 1024
+MAX_IMAGE_BYTES = 800 * 1024
+
+# Extra sizes made when images go to object storage (compress_image_variants)
+THUMBNAIL_DIMENSION = 256
+MAX_THUMBNAIL_BYTES = 40 * 1024
+PLACEHOLDER_DIMENSION = 16
+MAX_PLACEHOLDER_BYTES = 1024
+
+# Decompression-bomb guard: images that would still decode to more pixels
+# than this (after reduce-on-decode) are skipped, which bounds the memory a
+# compression worker needs for one image (~3 bytes per pixel in RGB)
+DEFAULT_MAX_PIXELS = 40_000_000
+
+# Formats in order of preference with their starting quality; lower
+# qualities down to MIN_QUALITY are searched only when the start is too big
+IMAGE_FORMATS = [
+    ('WEBP', 'image/webp', 85),
+    ('JPEG', 'image/jpeg', 80)
+]
+MIN_QUALITY = 50
+
+# Upper bound on encodes per format during the quality search
+MAX_ENCODES_PER_FORMAT = 6
+
+
+def encode_image(image: 'Image.Image', format_name: str, quality: int, optimize: bool = False) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format=format_name, quality=quality, optimize=optimize)
+    return output.getvalue()
+
+
+def search_quality(image: 'Image.Image', format_name: str, start_quality: int,
+                   max_bytes: int = MAX_IMAGE_BYTES) -> Tuple[Optional[int], Optional[bytes], int]:
+    """
+    Find the highest quality between MIN_QUALITY and start_quality whose
+    encode fits in max_bytes. Returns (quality, data, encodes), with
+    quality None when even MIN_QUALITY is too big.
+
+    Encoded size grows with quality, so the answer is bracketed between the
+    best fitting and the lowest failing quality seen so far. Each probe is
+    interpolated from the sizes at the bracket ends, which usually lands
+    within a step or two of the answer, and the search is capped at
+    MAX_ENCODES_PER_FORMAT encodes.
+    """
+    data = encode_image(image, format_name, start_quality)
+    encodes = 1
+    if len(data) <= max_bytes:
+        return start_quality, data, encodes
+
+    fail_quality, fail_size = start_quality, len(data)
+    best_quality, best_data = None, None
+    low, high = MIN_QUALITY, start_quality - 1
+
+    while low <= high and encodes < MAX_ENCODES_PER_FORMAT:
+        if best_quality is None and encodes == MAX_ENCODES_PER_FORMAT - 1:
+            # Last encode without a fit: settle whether anything fits at all
+            quality = low
+        elif best_quality is None:
+            # Only a failing point so far: assume size scales with quality
+            quality = int(fail_quality * max_bytes / fail_size)
+        else:
+            fit_size = len(best_data)
+            quality = best_quality + int((fail_quality - best_quality) * (max_bytes - fit_size) / (fail_size - fit_size))
+        quality = min(max(quality, low), high)
+
+        data = encode_image(image, format_name, quality)
+        encodes += 1
+        if len(data) <= max_bytes:
+            best_quality, best_data = quality, data
+            low = quality + 1
+        else:
+            fail_quality, fail_size = quality, len(data)
+            high = quality - 1
+
+    return best_quality, best_data, encodes
+
+
+def open_image_for_target(image_data: bytes, max_pixels: int = DEFAULT_MAX_PIXELS) -> 'Image.Image':
+    """
+    Open an image so it decodes no larger than needed for MAX_IMAGE_DIMENSION.
+
+    JPEGs are decoded in draft mode: libjpeg scales by 1/2, 1/4 or 1/8 during
+    the DCT, picking the largest reduction that still leaves the image at or
+    above the 1024px target, so a 48MP photo never exists at full size in
+    memory. Other formats decode at native size. Raises ValueError when the
+    decoded size would exceed max_pixels.
+    """
+    from PIL import Image
+    
+    image = Image.open(io.BytesIO(image_data))
+    
+    if image.format == 'JPEG' and max(image.size) > MAX_IMAGE_DIMENSION:
+        scale = MAX_IMAGE_DIMENSION / max(image.size)
+        image.draft(None, (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+    
+    # Size is known from the header (and draft scale) before any pixel data is decoded
+    if image.width * image.height > max_pixels:
+        raise ValueError(f"{image.width}x{image.height} exceeds the {max_pixels:,} pixel limit")
+    return image
+
+
+def decode_for_target(image_data: bytes, filename: str, max_pixels: int,
+                      messages: List[str], stats: Dict) -> Optional['Image.Image']:
+    """
+    Decode an image no larger than needed (see open_image_for_target), as RGB
+    and scaled down to MAX_IMAGE_DIMENSION. Returns None, with a message,
+    for images that are too large.
+    """
+    from PIL import Image
+    
+    # Open image with PIL, decoding no larger than needed
+    start = time.perf_counter()
+    try:
+        image = open_image_for_target(image_data, max_pixels)
+        image.load()
+    except (ValueError, Image.DecompressionBombError) as e:
+        messages.append(f"⚠️  Skipping {filename}: {e}")
+        return None
+    stats['decode_seconds'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    
+    # Convert to RGB if necessary (for JPEG compatibility)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Create white background for transparent images
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    
+    # Resize if needed (maintain aspect ratio); every encode reuses this one
+    # decoded, resized RGB image
+    if image.width > MAX_IMAGE_DIMENSION or image.height > MAX_IMAGE_DIMENSION:
+        image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.Resampling.LANCZOS)
+        messages.append(f"📐 Resized image to {image.width}x{image.height}")
+    stats['resize_seconds'] = time.perf_counter() - start
+    return image
+
+
+def encode_within(image: 'Image.Image', max_bytes: int, stats: Dict) -> Optional[Tuple[str, str, int, bytes]]:
+    """
+    Encode in the first of IMAGE_FORMATS that fits in max_bytes, at the
+    highest quality that fits. Returns (format, mime type, quality, data),
+    or None when nothing fits; encodes and their time are added to stats.
+    """
+    # Try WebP first (better compression)
+    for format_name, mime_type, start_quality in IMAGE_FORMATS:
+        start = time.perf_counter()
+        try:
+            quality, compressed_data, format_encodes = search_quality(image, format_name, start_quality, max_bytes)
+        except Exception:
+            # Format not supported (e.g. Pillow built without WebP)
+            continue
+        finally:
+            stats['encode_seconds'] += time.perf_counter() - start
+        stats['encodes'] += format_encodes
+        if quality is None:
+            continue
+        
+        if format_name == 'JPEG':
+            # The search encodes without Huffman optimization for speed;
+            # only the chosen quality gets the optimized encode
+            start = time.perf_counter()
+            optimized_data = encode_image(image, format_name, quality, optimize=True)
+            stats['encode_seconds'] += time.perf_counter() - start
+            stats['encodes'] += 1
+            if len(optimized_data) <= len(compressed_data):
+                compressed_data = optimized_data
+        return format_name, mime_type, quality, compressed_data
+    return None
+
+
+def data_url(mime_type: str, data: bytes) -> str:
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+def compression_stats(image_data: bytes) -> Dict:
+    return {'encodes': 0, 'decode_seconds': None, 'resize_seconds': None,
+            'encode_seconds': 0.0, 'bytes_in': len(image_data), 'bytes_out': None}
+
+
+def compress_image_data(image_data: bytes, filename: str,
+                        max_pixels: int = DEFAULT_MAX_PIXELS) -> Tuple[Optional[str], List[str], Dict]:
+    """
+    Compress image to match Hearth's specifications:
+    - Max 1024px width/height
+    - Max 800KB file size
+    - WebP or JPEG format, at the highest quality that fits
+    - Base64 data URL
+    
+    Large JPEGs are decoded at reduced resolution, and images decoding to
+    more than max_pixels are rejected (see open_image_for_target).
+    
+    Module-level so it can run in a worker process. Returns the data URL (or
+    None), the log lines for the caller to print and a stats dictionary
+    (encodes, decode/resize/encode seconds, bytes in and out) for metrics.
+    """
+    messages = []
+    stats = compression_stats(image_data)
+    try:
+        image = decode_for_target(image_data, filename, max_pixels, messages, stats)
+        if image is None:
+            return None, messages, stats
+        
+        encoded = encode_within(image, MAX_IMAGE_BYTES, stats)
+        if encoded is None:
+            messages.append(f"⚠️  Could not compress {filename} under 800KB")
+            return None, messages, stats
+        format_name, mime_type, quality, compressed_data = encoded
+        
+        original_size = len(image_data) / 1024
+        size_kb = len(compressed_data) / 1024
+        encodes = stats['encodes']
+        messages.append(f"📸 Compressed {filename}: {original_size:.1f}KB → {size_kb:.1f}KB "
+                        f"({format_name}, Q{quality}, {encodes} encode{'s' if encodes != 1 else ''})")
+        
+        stats['bytes_out'] = len(compressed_data)
+        return data_url(mime_type, compressed_data), messages, stats
+    
+    except Exception as e:
+        messages.append(f"❌ Error compressing image {filename}: {e}")
+        return None, messages, stats
+
+
+def compress_image_variants(image_data: bytes, filename: str,
+                            max_pixels: int = DEFAULT_MAX_PIXELS) -> Tuple[Optional[str], List[str], Dict]:
+    """
+    Like compress_image_data, but for object storage: the detail image (same
+    limits), a list thumbnail and an inline placeholder, all made from one
+    decode. Returns the encoded ImageVariants (see image_storage.py) or None.
+    """
+    from PIL import Image
+    
+    messages = []
+    stats = compression_stats(image_data)
+    try:
+        image = decode_for_target(image_data, filename, max_pixels, messages, stats)
+        if image is None:
+            return None, messages, stats
+        
+        detail = encode_within(image, MAX_IMAGE_BYTES, stats)
+        if detail is None:
+            messages.append(f"⚠️  Could not compress {filename} under 800KB")
+            return None, messages, stats
+        
+        # Smaller sizes are scaled from the already decoded detail image
+        start = time.perf_counter()
+        thumbnail_image = image.copy()
+        thumbnail_image.thumbnail((THUMBNAIL_DIMENSION, THUMBNAIL_DIMENSION), Image.Resampling.LANCZOS)
+        placeholder_image = thumbnail_image.copy()
+        placeholder_image.thumbnail((PLACEHOLDER_DIMENSION, PLACEHOLDER_DIMENSION), Image.Resampling.LANCZOS)
+        stats['resize_seconds'] = (stats['resize_seconds'] or 0) + time.perf_counter() - start
+        
+        thumbnail = encode_within(thumbnail_image, MAX_THUMBNAIL_BYTES, stats)
+        placeholder = encode_within(placeholder_image, MAX_PLACEHOLDER_BYTES, stats)
+        if thumbnail is None or placeholder is None:
+            messages.append(f"⚠️  Could not make a thumbnail of {filename}")
+            return None, messages, stats
+        
+        variants = ImageVariants(detail[3], detail[1], thumbnail[3], thumbnail[1],
+                                 data_url(placeholder[1], placeholder[3]))
+        encodes = stats['encodes']
+        messages.append(f"📸 Compressed {filename}: {len(image_data) / 1024:.1f}KB → "
+                        f"{len(variants.detail) / 1024:.1f}KB detail ({detail[0]}, Q{detail[2]}), "
+                        f"{len(variants.thumbnail) / 1024:.1f}KB thumbnail, {len(variants.placeholder)}B placeholder "
+                        f"({encodes} encode{'s' if encodes != 1 else ''})")
+        
+        stats['bytes_out'] = len(variants.detail)
+        return variants.encode(), messages, stats
+    
+    except Exception as e:
+        messages.append(f"❌ Error compressing image {filename}: {e}")
+        return None, messages, stats
+
+
 class HomeBoxImageImporter:
-    def __init__(self, homebox_url: str, api_token: str, user_id: str):
+    def __init__(self, homebox_url: str, api_token: str, user_id: str,
+                 download_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+                 compress_workers: int = DEFAULT_COMPRESS_WORKERS,
+                 write_workers: int = DEFAULT_WRITE_WORKERS,
+                 max_connections: Optional[int] = None,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 page_size: int = DEFAULT_PAGE_SIZE,
+                 journal_path: str = DEFAULT_JOURNAL_PATH,
+                 image_cache: Optional[ImageCache] = None,
+                 max_pixels: int = DEFAULT_MAX_PIXELS,
+                 metrics: Optional[Metrics] = None,
+                 retry_attempts: int = DEFAULT_RETRY_ATTEMPTS,
+                 sink: Optional[Sink] = None,
+                 image_store: Optional[ImageStore] = None):
         self.homebox_url = homebox_url.rstrip('/')
         self.api_token = api_token
         self.user_id = user_id
         self.db = None
-        self.session = requests.Session()
+        self.download_workers = max(1, download_workers)
+        self.compress_workers = max(1, compress_workers)
+        self.write_workers = max(1, write_workers)
         
-        # Cache for Hearth items to avoid repeated queries
-        self.hearth_items_cache = None
+        # HomeBox connection pool: by default one keep-alive connection per
+        # concurrent download
+        self.max_connections = max_connections or self.download_workers
+        self.request_timeout = request_timeout
+        self.page_size = max(1, page_size)
+        self.journal_path = journal_path
+        self.journal = None
+        
+        # Largest decoded image a compression worker will accept
+        self.max_pixels = max_pixels
+        
+        # Optional on-disk cache of downloads and compressed data URLs
+        self.image_cache = image_cache
+        
+        # Per-stage timings and byte counts (see metrics.py)
+        self.metrics = metrics or Metrics()
         
-        # Set up API headers
-        self.session.headers.update({
-            'Authorization': f'Bearer {api_token}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        })
+        # Transient HomeBox and Firestore errors are retried with backoff, and
+        # downloads and updates in flight adapt to what each backend accepts
+        self.homebox_retry = RetryPolicy(retry_attempts, metrics=self.metrics, name='homebox')
+        self.firestore_retry = RetryPolicy(retry_attempts, metrics=self.metrics, name='firestore')
+        self.storage_retry = RetryPolicy(retry_attempts, metrics=self.metrics, name='storage')
+        self.download_limiter = None  # Created on the download stage's event loop
+        self.write_limiter = AdaptiveLimiter(self.write_workers)
+        
+        # Optional destination for the image updates instead of writing them
+        # to Firestore directly, e.g. a JsonlSink to stage them (see sinks.py)
+        self.sink = sink
+        if sink:
+            sink.on_batch = self.handle_sink_batch
+        
+        # Optional object storage for the images (see image_storage.py); without
+        # it, images go into the item documents as data URLs
+        self.image_store = image_store
+        self.compress_function = compress_image_variants if image_store else compress_image_data
+        self.compression_settings = VARIANT_SETTINGS if image_store else COMPRESSION_SETTINGS
+        
+        # Compact cache of the user's Hearth items (names, IDs, image flags)
+        self.hearth_items_cache = None
+        self.name_index = None
         
         # Statistics
+        self.homebox_items_seen = 0
+        self.homebox_items_total = None
         self.items_processed = 0
         self.images_found = 0
         self.images_imported = 0
+        self.id_matches_found = 0
         self.name_matches_found = 0
         self.fuzzy_matches_found = 0
         self.no_matches_found = 0
+        self.images_skipped = 0
+        self.images_present = 0
+        self.images_duplicate = 0
+        self.images_missing = 0
+        self.downloads_cached = 0
+        self.images_compressed = 0
+        self.image_encodes = 0
+        self.compressions_cached = 0
         self.errors = []
+        self._stats_lock = threading.Lock()
     
     def initialize_firebase(self):
         """Initialize Firebase Admin SDK"""
+        if self.db is not None:
+            # Already connected, e.g. to a stand-in database (fake_firestore.py)
+            return True
+        
         try:
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+            
             service_account_path = os.getenv('FIREBASE_SERVICE_ACCOUNT_KEY')
             if service_account_path and os.path.exists(service_account_path):
                 cred = credentials.Certificate(service_account_path)
@@ -79,20 +463,25 @@ class HomeBoxImageImporter:
     def load_hearth_items_cache(self):
         """Load all Hearth items for the user into cache for fuzzy matching"""
         try:
-            items_ref = self.db.collection('items')
-            query = items_ref.where('userId', '==', self.user_id)
-            docs = query.get()
+            def fetch_page(query):
+                with self.metrics.timer('firestore.load_items_page'):
+                    return self.firestore_retry.call(query.get)
+            
+            # Paged and projected: names and image flags, never the image data
+            with self.metrics.timer('firestore.load_items'):
+                self.hearth_items_cache = HearthItemCache.load(self.db, self.user_id, fetch=fetch_page)
+            self.metrics.count('firestore.items_read', len(self.hearth_items_cache.ids))
             
-            self.hearth_items_cache = {}
-            for doc in docs:
-                item_data = doc.to_dict()
-                item_name = item_data.get('name', '')
-                self.hearth_items_cache[item_name] = {
-                    'doc_ref': doc.reference,
-                    'data': item_data,
-                    'normalized_name': self.normalize_name(item_name)
-                }
+            # Items given an image by the Hearth app or an older import have no hasImage flag
+            try:
+                with self.metrics.timer('firestore.load_image_urls'):
+                    flagged = self.hearth_items_cache.load_image_urls(self.db, self.user_id, fetch=fetch_page)
+                if flagged:
+                    print(f"🖼️  {flagged} Hearth items already have an image set outside this importer")
+            except Exception as e:
+                print(f"⚠️  Could not check Hearth items for existing images, relying on hasImage only: {e}")
             
+            self.build_name_index()
             print(f"📋 Loaded {len(self.hearth_items_cache)} Hearth items into cache")
             return True
             
@@ -100,6 +489,12 @@ class HomeBoxImageImporter:
             print(f"❌ Failed to load Hearth items cache: {e}")
             return False
     
+    def build_name_index(self):
+        """Index cached names for fuzzy matching (in cache order, so ties resolve the same way)"""
+        self.name_index = FuzzyNameIndex(threshold=0.85)  # 85% similarity threshold
+        for hearth_name, position in self.hearth_items_cache.entries():
+            self.name_index.add(self.normalize_name(hearth_name), position)
+    
     def normalize_name(self, name: str) -> str:
         """Normalize a name for better matching"""
         if not name:
@@ -123,210 +518,308 @@ class HomeBoxImageImporter:
         
         return normalized
     
-    def find_matching_hearth_item(self, homebox_name: str) -> Optional[Dict]:
+    def find_hearth_item(self, homebox_item: Dict) -> Tuple[Optional[HearthItem], Optional[str]]:
+        """
+        Hearth item for a HomeBox item, and how it was found ('id', 'exact' or
+        'fuzzy'). Items carry the HomeBox item and asset IDs since
+        homebox_import.py stores them; names are matched only for older imports.
+        """
+        if self.hearth_items_cache:
+            hearth_item = self.hearth_items_cache.get_by_homebox_id(homebox_item.get('id'), homebox_item.get('assetId'))
+            if hearth_item:
+                self.id_matches_found += 1
+                return hearth_item, 'id'
+        
+        fuzzy_matches = self.fuzzy_matches_found
+        hearth_item = self.find_matching_hearth_item(homebox_item.get('name', 'Unknown'))
+        if not hearth_item:
+            return None, None
+        return hearth_item, 'fuzzy' if self.fuzzy_matches_found > fuzzy_matches else 'exact'
+    
+    def find_matching_hearth_item(self, homebox_name: str) -> Optional[HearthItem]:
         """Find matching Hearth item using exact match, then fuzzy matching"""
+        with self.metrics.timer('match.total'):
+            return self._find_matching_hearth_item(homebox_name)
+    
+    def _find_matching_hearth_item(self, homebox_name: str) -> Optional[HearthItem]:
         if not self.hearth_items_cache:
             return None
         
         # Try exact match first
         if homebox_name in self.hearth_items_cache:
             self.name_matches_found += 1
-            return self.hearth_items_cache[homebox_name]
+            return self.hearth_items_cache.get(homebox_name)
         
         # Try exact match with stripped spaces
         stripped_name = homebox_name.strip()
         if stripped_name in self.hearth_items_cache:
             self.name_matches_found += 1
-            return self.hearth_items_cache[stripped_name]
-        
-        # Try fuzzy matching
-        normalized_homebox = self.normalize_name(homebox_name)
-        best_match = None
-        best_score = 0.0
+            return self.hearth_items_cache.get(stripped_name)
         
-        for hearth_name, hearth_item in self.hearth_items_cache.items():
-            # Compare normalized names
-            score = SequenceMatcher(None, normalized_homebox, hearth_item['normalized_name']).ratio()
-            
-            if score > best_score and score >= 0.85:  # 85% similarity threshold
-                best_score = score
-                best_match = hearth_item
+        # Try fuzzy matching against the candidates from the name index
+        if self.name_index is None:
+            self.build_name_index()
         
-        if best_match:
+        with self.metrics.timer('match.fuzzy'):
+            match = self.name_index.best_match(self.normalize_name(homebox_name))
+        if match:
+            position, best_score = match
+            hearth_item = self.hearth_items_cache.item(position)
             self.fuzzy_matches_found += 1
-            print(f"🔍 Fuzzy match found: '{homebox_name}' → '{list(self.hearth_items_cache.keys())[list(self.hearth_items_cache.values()).index(best_match)]}' (score: {best_score:.2f})")
-            return best_match
+            print(f"🔍 Fuzzy match found: '{homebox_name}' → '{hearth_item.name}' (score: {best_score:.2f})")
+            return hearth_item
         
         self.no_matches_found += 1
         return None
     
     def compress_image_to_base64(self, image_data: bytes, filename: str) -> Optional[str]:
-        """
-        Compress image to match Hearth's specifications:
-        - Max 1024px width/height
-        - Max 800KB file size
-        - WebP or JPEG format
-        - Base64 data URL
-        """
-        try:
-            # Open image with PIL
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Convert to RGB if necessary (for JPEG compatibility)
-            if image.mode in ('RGBA', 'LA', 'P'):
-                # Create white background for transparent images
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
-                image = background
-            elif image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize if needed (maintain aspect ratio)
-            max_size = 1024
-            if image.width > max_size or image.height > max_size:
-                image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                print(f"📐 Resized image to {image.width}x{image.height}")
-            
-            # Try WebP first (better compression)
-            formats_to_try = [
-                ('WEBP', 'image/webp', 85),
-                ('JPEG', 'image/jpeg', 80)
-            ]
-            
-            for format_name, mime_type, quality in formats_to_try:
-                # Compress image
-                output = io.BytesIO()
-                
-                if format_name == 'WEBP':
-                    try:
-                        image.save(output, format=format_name, quality=quality, optimize=True)
-                    except Exception:
-                        # WebP not supported, skip to JPEG
-                        continue
-                else:
-                    image.save(output, format=format_name, quality=quality, optimize=True)
-                
-                compressed_data = output.getvalue()
-                
-                # Check if under 800KB
-                size_kb = len(compressed_data) / 1024
-                if size_kb <= 800:
-                    # Convert to base64 data URL
-                    base64_data = base64.b64encode(compressed_data).decode('utf-8')
-                    data_url = f"data:{mime_type};base64,{base64_data}"
-                    
-                    original_size = len(image_data) / 1024
-                    print(f"📸 Compressed {filename}: {original_size:.1f}KB → {size_kb:.1f}KB ({format_name})")
-                    
-                    return data_url
-                
-                # If still too large, reduce quality
-                for reduced_quality in [70, 60, 50]:
-                    output = io.BytesIO()
-                    if format_name == 'WEBP':
-                        try:
-                            image.save(output, format=format_name, quality=reduced_quality, optimize=True)
-                        except Exception:
-                            continue
-                    else:
-                        image.save(output, format=format_name, quality=reduced_quality, optimize=True)
-                    
-                    compressed_data = output.getvalue()
-                    size_kb = len(compressed_data) / 1024
-                    
-                    if size_kb <= 800:
-                        base64_data = base64.b64encode(compressed_data).decode('utf-8')
-                        data_url = f"data:{mime_type};base64,{base64_data}"
-                        
-                        original_size = len(image_data) / 1024
-                        print(f"📸 Compressed {filename}: {original_size:.1f}KB → {size_kb:.1f}KB ({format_name}, Q{reduced_quality})")
-                        
-                        return data_url
-            
-            print(f"⚠️  Could not compress {filename} under 800KB")
-            return None
-            
-        except Exception as e:
-            print(f"❌ Error compressing image {filename}: {e}")
-            return None
+        """Compress image to Hearth's specifications (see compress_image_data and compress_image_variants)"""
+        data_url, messages, stats = self.compress_function(image_data, filename, self.max_pixels)
+        for message in messages:
+            print(message)
+        self.record_compression(stats)
+        return data_url
+    
+    def record_compression(self, stats: Dict):
+        """Add one compression run to the statistics and metrics"""
+        with self._stats_lock:
+            self.images_compressed += 1
+            self.image_encodes += stats['encodes']
+        
+        metrics = self.metrics
+        if stats['decode_seconds'] is not None:
+            metrics.observe('image.decode', stats['decode_seconds'])
+        if stats['resize_seconds'] is not None:
+            metrics.observe('image.resize', stats['resize_seconds'])
+        if stats['encodes']:
+            metrics.observe('image.encode', stats['encode_seconds'])
+            metrics.observe('image.encodes', stats['encodes'], unit='encodes')
+        metrics.count('image.original_bytes', stats['bytes_in'])
+        if stats['bytes_out']:
+            metrics.count('image.compressed_bytes', stats['bytes_out'])
+            metrics.observe('image.compression_ratio', stats['bytes_in'] / stats['bytes_out'], unit='ratio')
+    
+    def create_homebox_client(self) -> AsyncHomeBoxClient:
+        """Create an async HomeBox client (open it inside the event loop that uses it)"""
+        return AsyncHomeBoxClient(self.homebox_url, self.api_token,
+                                  max_connections=self.max_connections,
+                                  max_concurrent_requests=self.download_workers,
+                                  request_timeout=self.request_timeout)
     
     def test_homebox_connection(self):
         """Test connection to HomeBox API"""
         try:
+            return asyncio.run(self._test_homebox_connection())
+        except Exception as e:
+            print(f"❌ Connection test failed: {e}")
+            return False
+    
+    async def _test_homebox_connection(self) -> bool:
+        async with self.create_homebox_client() as client:
             # Test API access
-            api_url = urljoin(self.homebox_url, '/api/v1/')
-            response = self.session.get(api_url, timeout=10)
+            api_url = client.url('/api/v1/')
+            status, _ = await client.get('/api/v1/', timeout=10)
             
             print(f"🔍 Testing HomeBox API at: {api_url}")
-            print(f"Status: {response.status_code}")
+            print(f"Status: {status}")
             
-            if response.status_code == 404:
+            if status == 404:
                 print("✅ API endpoint accessible (404 is expected for root)")
             
-            # Test items endpoint
-            items_url = urljoin(self.homebox_url, '/api/v1/items')
-            items_response = self.session.get(items_url, timeout=10)
+            # Test items endpoint (a single-item page is enough to get the total)
+            items_status, items_data = await client.get_json('/api/v1/items', params={'page': 1, 'pageSize': 1}, timeout=10)
             
-            if items_response.status_code == 200:
-                items_data = items_response.json()
-                print(f"✅ Successfully authenticated! Found {len(items_data.get('items', []))} items")
+            if items_status == 200:
+                total = items_data.get('total', len(items_data.get('items', [])))
+                print(f"✅ Successfully authenticated! Found {total} items")
                 return True
-            elif items_response.status_code == 401:
+            elif items_status == 401:
                 print("❌ Authentication failed. Check your API token.")
                 return False
             else:
-                print(f"⚠️  Unexpected response: {items_response.status_code}")
+                print(f"⚠️  Unexpected response: {items_status}")
                 return False
-                
-        except Exception as e:
-            print(f"❌ Connection test failed: {e}")
-            return False
     
     def get_homebox_items(self) -> List[Dict]:
         """Get all items from HomeBox API"""
         try:
-            items_url = urljoin(self.homebox_url, '/api/v1/items')
-            response = self.session.get(items_url, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                items = data.get('items', [])
-                print(f"📋 Retrieved {len(items)} items from HomeBox")
-                return items
-            else:
-                print(f"❌ Failed to get items: {response.status_code}")
-                return []
-                
+            items = list(self.iter_homebox_items())
+            print(f"📋 Retrieved {len(items)} items from HomeBox")
+            return items
         except Exception as e:
             print(f"❌ Error getting items: {e}")
             return []
     
+    def iter_homebox_items(self) -> Iterator[Dict]:
+        """
+        Stream all HomeBox items page by page. A background thread fetches up
+        to PREFETCH_PAGES pages ahead while the caller processes the current one,
+        so memory and time to the first item don't grow with the inventory size.
+        """
+        pages = queue.Queue(maxsize=PREFETCH_PAGES)
+        closed = threading.Event()
+        
+        def put(page):
+            # Give up if the consumer stopped iterating
+            while not closed.is_set():
+                try:
+                    pages.put(page, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        async def fetch_pages():
+            loop = asyncio.get_running_loop()
+            async with self.create_homebox_client() as client:
+                page_number = 1
+                fetched = 0
+                
+                async def get_page():
+                    status, data = await client.get_json('/api/v1/items', params={'page': page_number, 'pageSize': self.page_size})
+                    if status != 200:
+                        raise HomeBoxRequestError(status, client.url('/api/v1/items'))
+                    return data
+                
+                while True:
+                    try:
+                        with self.metrics.timer('homebox.list_page'):
+                            data = await self.homebox_retry.call_async(get_page)
+                    except HomeBoxRequestError as e:
+                        raise RuntimeError(f"Failed to get items page {page_number}: {e.status}")
+                    
+                    items = data.get('items', [])
+                    if data.get('total') is not None:
+                        self.homebox_items_total = data['total']
+                    fetched += len(items)
+                    
+                    if items and not await loop.run_in_executor(None, put, items):
+                        return
+                    
+                    total = data.get('total')
+                    if len(items) < self.page_size or (total is not None and fetched >= total):
+                        return
+                    page_number += 1
+        
+        def fetcher():
+            try:
+                asyncio.run(fetch_pages())
+            except Exception as e:
+                put(e)
+            finally:
+                put(_STOP)
+        
+        thread = threading.Thread(target=fetcher, name='homebox-pages', daemon=True)
+        thread.start()
+        try:
+            while True:
+                page = pages.get()
+                if page is _STOP:
+                    break
+                if isinstance(page, Exception):
+                    raise page
+                for item in page:
+                    self.homebox_items_seen += 1
+                    yield item
+        finally:
+            closed.set()
+    
+    def load_cached_image(self, item_id: str, image_id: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """Return (raw bytes, data URL) from the image cache; the data URL wins when both exist"""
+        if not self.image_cache:
+            return None, None
+        
+        digest = self.image_cache.attachment_hash(item_id, image_id)
+        if not digest:
+            return None, None
+        
+        data_url = self.image_cache.get_data_url(digest, self.compression_settings)
+        if data_url:
+            with self._stats_lock:
+                self.compressions_cached += 1
+            return None, data_url
+        
+        image_data = self.image_cache.get_raw(item_id, image_id)
+        if image_data is not None:
+            with self._stats_lock:
+                self.downloads_cached += 1
+        return image_data, None
+    
+    def compress_cached(self, homebox_item: Dict, image_data: bytes, compress) -> Optional[str]:
+        """Compress through the image cache: store the download, reuse a data URL for identical content"""
+        if not self.image_cache:
+            return compress(image_data)
+        
+        digest = self.image_cache.put_raw(homebox_item['id'], homebox_item['imageId'], image_data)
+        data_url = self.image_cache.get_data_url(digest, self.compression_settings)
+        if data_url:
+            with self._stats_lock:
+                self.compressions_cached += 1
+            return data_url
+        
+        data_url = compress(image_data)
+        if data_url:
+            self.image_cache.put_data_url(digest, self.compression_settings, data_url)
+        return data_url
+    
     def download_item_image(self, item_id: str, image_id: str) -> Optional[bytes]:
         """Download image directly using item_id and image_id"""
+        async def download():
+            async with self.create_homebox_client() as client:
+                return await self.download_item_image_async(client, item_id, image_id)
+        
+        return asyncio.run(download())
+    
+    async def download_item_image_async(self, client: AsyncHomeBoxClient, item_id: str, image_id: str,
+                                        limiter: Optional[AsyncAdaptiveLimiter] = None) -> Optional[bytes]:
+        """Download an image through a shared async client, retrying transient errors"""
         try:
-            image_url = urljoin(self.homebox_url, f'/api/v1/items/{item_id}/attachments/{image_id}')
-            response = self.session.get(image_url, timeout=30)
-            
-            if response.status_code == 200:
-                return response.content
-            else:
-                print(f"❌ Failed to download image {image_id}: {response.status_code}")
-                return None
-                
+            with self.metrics.timer('homebox.download'):
+                image_data = await self.homebox_retry.call_async(
+                    lambda: client.download_attachment(item_id, image_id), limiter
+                )
+            if image_data:
+                self.metrics.count('homebox.downloaded_bytes', len(image_data))
+            return image_data
         except Exception as e:
             print(f"❌ Error downloading image {image_id}: {e}")
             return None
     
-    def update_hearth_item_image(self, hearth_item: Dict, base64_data_url: str) -> bool:
+    def image_update(self, hearth_item: HearthItem, base64_data_url: str) -> Dict:
+        """
+        Fields written for a new image: the data URL, or with an image store the
+        uploaded files' URLs and an inline placeholder. The flag lets the item
+        cache skip the image.
+        """
+        if not self.image_store:
+            return {'imageUrl': base64_data_url, HAS_IMAGE_FIELD: True}
+        
+        variants = ImageVariants.decode(base64_data_url)
+        return {
+            'imageUrl': self.upload_image(hearth_item, 'detail', variants.detail, variants.detail_type),
+            'thumbnailUrl': self.upload_image(hearth_item, 'thumbnail', variants.thumbnail, variants.thumbnail_type),
+            'imagePlaceholder': variants.placeholder,
+            HAS_IMAGE_FIELD: True
+        }
+    
+    def upload_image(self, hearth_item: HearthItem, variant: str, data: bytes, content_type: str) -> str:
+        """Upload one image file to the image store, retrying transient errors, and return its URL"""
+        path = object_path(self.user_id, hearth_item.id, variant, data, content_type)
+        with self.metrics.timer('storage.upload'):
+            url = self.storage_retry.call(lambda: self.image_store.upload(path, data, content_type))
+        self.metrics.count('storage.uploaded_bytes', len(data))
+        return url
+    
+    def update_hearth_item_image(self, hearth_item: HearthItem, base64_data_url: str) -> bool:
         """Update Hearth item with base64 image data using cached item reference"""
         try:
-            doc_ref = hearth_item['doc_ref']
-            doc_ref.update({'imageUrl': base64_data_url})
+            update = self.image_update(hearth_item, base64_data_url)
+            doc_ref = self.db.collection('items').document(hearth_item.id)
+            with self.metrics.timer('firestore.update'):
+                self.firestore_retry.call(lambda: doc_ref.update(update), self.write_limiter)
+            self.metrics.count('firestore.image_bytes', sum(len(value) for value in update.values() if isinstance(value, str)))
             
-            item_name = hearth_item['data'].get('name', 'Unknown')
-            print(f"✅ Updated '{item_name}' with compressed image")
+            print(f"✅ Updated '{hearth_item.name or 'Unknown'}' with compressed image")
             return True
             
         except Exception as e:
@@ -345,20 +838,26 @@ class HomeBoxImageImporter:
         print(f"📸 Processing image for '{item_name}' (imageId: {image_id})")
         
         # Find matching Hearth item using intelligent matching
-        hearth_item = self.find_matching_hearth_item(item_name)
+        hearth_item, _ = self.find_hearth_item(homebox_item)
         if not hearth_item:
             print(f"⚠️  No matching Hearth item found for '{item_name}'")
             return 0
         
-        # Download the image directly using the imageId
-        image_data = self.download_item_image(item_id, image_id)
-        if not image_data:
-            return 0
-        
-        # Compress to base64 (matching Hearth's format)
-        base64_data_url = self.compress_image_to_base64(image_data, f"{item_name}.jpg")
+        # Reuse a cached download or data URL, otherwise download by imageId
+        image_data, base64_data_url = self.load_cached_image(item_id, image_id)
         if not base64_data_url:
-            return 0
+            if image_data is None:
+                image_data = self.download_item_image(item_id, image_id)
+            if not image_data:
+                return 0
+            
+            # Compress to base64 (matching Hearth's format)
+            base64_data_url = self.compress_cached(
+                homebox_item, image_data,
+                lambda data: self.compress_image_to_base64(data, f"{item_name}.jpg")
+            )
+            if not base64_data_url:
+                return 0
         
         # Update Hearth item
         if self.update_hearth_item_image(hearth_item, base64_data_url):
@@ -366,44 +865,418 @@ class HomeBoxImageImporter:
         
         return 0
     
-    def run_import(self):
-        """Run the full image import process with intelligent matching"""
+    def _start_stage(self, name: str, handler, in_queue: queue.Queue,
+                     out_queue: Optional[queue.Queue], workers: int) -> List[threading.Thread]:
+        """Start worker threads that move tasks from in_queue through handler to out_queue"""
+        def worker():
+            while True:
+                task = in_queue.get()
+                if task is _STOP:
+                    break
+                try:
+                    result = handler(task)
+                except Exception as e:
+                    result = None
+                    self._record_error(f"{name} stage failed: {e}")
+                if result is not None and out_queue is not None:
+                    out_queue.put(result)
+        
+        threads = [threading.Thread(target=worker, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        return threads
+    
+    def _stop_stage(self, threads: List[threading.Thread], in_queue: queue.Queue):
+        """Signal end of input to a stage and wait for its workers to finish"""
+        for _ in threads:
+            in_queue.put(_STOP)
+        for thread in threads:
+            thread.join()
+    
+    def _start_download_stage(self, in_queue: queue.Queue, out_queue: queue.Queue) -> List[threading.Thread]:
+        """
+        Start the download stage: one thread running an event loop that keeps
+        up to download_workers downloads in flight over a pooled connection.
+        """
+        stopped = threading.Event()
+        
+        async def dispatch(client: AsyncHomeBoxClient):
+            loop = asyncio.get_running_loop()
+            in_flight = asyncio.Semaphore(self.download_workers)
+            self.download_limiter = AsyncAdaptiveLimiter(self.download_workers)
+            tasks = set()
+            
+            async def download(task):
+                try:
+                    homebox_item, hearth_item = task
+                    image_data, data_url = await loop.run_in_executor(
+                        None, self.load_cached_image, homebox_item['id'], homebox_item['imageId']
+                    )
+                    if image_data is None and data_url is None:
+                        image_data = await self.download_item_image_async(client, homebox_item['id'], homebox_item['imageId'],
+                                                                          self.download_limiter)
+                    if image_data or data_url:
+                        # Blocks (off the loop) while the compress stage is behind
+                        await loop.run_in_executor(None, out_queue.put, (homebox_item, hearth_item, image_data, data_url))
+                finally:
+                    in_flight.release()
+            
+            while True:
+                await in_flight.acquire()
+                task = await loop.run_in_executor(None, in_queue.get)
+                if task is _STOP:
+                    stopped.set()
+                    in_flight.release()
+                    break
+                download_task = asyncio.create_task(download(task))
+                tasks.add(download_task)
+                download_task.add_done_callback(tasks.discard)
+            
+            if tasks:
+                await asyncio.gather(*tasks)
+        
+        async def run():
+            # Enough executor threads for every download to block on a full queue
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.download_workers + 1))
+            async with self.create_homebox_client() as client:
+                await dispatch(client)
+        
+        def worker():
+            try:
+                asyncio.run(run())
+            except Exception as e:
+                self._record_error(f"download stage failed: {e}")
+                # Keep draining so the producer never blocks on a dead stage
+                while not stopped.is_set():
+                    if in_queue.get() is _STOP:
+                        stopped.set()
+        
+        thread = threading.Thread(target=worker, name='download', daemon=True)
+        thread.start()
+        return [thread]
+    
+    def _record_error(self, error_msg: str):
+        print(f"❌ {error_msg}")
+        with self._stats_lock:
+            self.errors.append(error_msg)
+    
+    def run_pipeline(self, homebox_items: Iterable, feed: Optional[Callable] = None,
+                     write: Optional[Callable] = None):
+        """
+        Process items through a staged pipeline connected by bounded queues:
+        download (async, pooled HTTP) → compress (process pool) → Firestore update (I/O threads).
+        All stages run concurrently, so downloads, encoding and writes overlap.
+        feed(homebox_items, download_queue) queues the work (default: match HomeBox items),
+        and write((homebox_item, hearth_item, data_url)) stores each image (default: update the item).
+        """
+        download_queue = queue.Queue(maxsize=self.download_workers * 2)
+        compress_queue = queue.Queue(maxsize=self.compress_workers * 2)
+        write_queue = queue.Queue(maxsize=self.write_workers * 2)
+        
+        print(f"⚙️  Pipeline workers: {self.download_workers} download, "
+              f"{self.compress_workers} compress, {self.write_workers} write")
+        
+        # Spawned, not forked: Firebase's gRPC client and the stage threads
+        # already run here, and a forked child could inherit their held locks
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.compress_workers, mp_context=context) as pool:
+            def compress(task):
+                homebox_item, hearth_item, image_data, data_url = task
+                item_name = homebox_item.get('name', 'Unknown Item')
+                
+                def compress_in_pool(data):
+                    # Each compress thread keeps exactly one worker process busy
+                    compressed, messages, stats = pool.submit(self.compress_function, data, f"{item_name}.jpg", self.max_pixels).result()
+                    for message in messages:
+                        print(message)
+                    self.record_compression(stats)
+                    return compressed
+                
+                if not data_url:
+                    data_url = self.compress_cached(homebox_item, image_data, compress_in_pool)
+                if not data_url:
+                    return None
+                return homebox_item, hearth_item, data_url
+            
+            def update_item(task):
+                homebox_item, hearth_item, data_url = task
+                if self.sink:
+                    # Counted and journaled once the sink reports the batch
+                    self.sink.update('items', hearth_item.id, self.image_update(hearth_item, data_url),
+                                     ('image', homebox_item['id'], hearth_item.name or 'Unknown'))
+                    return None
+                if self.update_hearth_item_image(hearth_item, data_url):
+                    if self.journal:
+                        self.journal.mark_done('image', [(homebox_item['id'], hearth_item.id)])
+                    with self._stats_lock:
+                        self.images_found += 1
+                        self.images_imported += 1
+                return None
+            
+            download_threads = self._start_download_stage(download_queue, compress_queue)
+            compress_threads = self._start_stage('compress', compress, compress_queue, write_queue, self.compress_workers)
+            write_threads = self._start_stage('write', write or update_item, write_queue, None, self.write_workers)
+            
+            # Match in the main thread and feed the pipeline as pages arrive;
+            # put() blocks when downstream stages fall behind
+            try:
+                (feed or self._feed_pipeline)(homebox_items, download_queue)
+            except Exception as e:
+                self._record_error(f"Error getting items: {e}")
+            
+            # Drain stage by stage
+            self._stop_stage(download_threads, download_queue)
+            self._stop_stage(compress_threads, compress_queue)
+            self._stop_stage(write_threads, write_queue)
+    
+    def handle_sink_batch(self, batch_number: int, ops: List, error: Optional[Exception]):
+        """Record image updates the sink has written (or failed to write)"""
+        if error is not None:
+            self._record_error(f"Image batch {batch_number} failed ({len(ops)} images): {error}")
+            return
+        if self.journal:
+            self.journal.mark_done('image', [(op.tag[1], op.doc_ref.id) for op in ops])
+        with self._stats_lock:
+            self.images_found += len(ops)
+            self.images_imported += len(ops)
+        for op in ops:
+            print(f"✅ Staged image for '{op.tag[2]}'")
+    
+    def _feed_pipeline(self, homebox_items: Iterable[Dict], download_queue: queue.Queue):
+        """Match HomeBox items with images to Hearth items and queue them for download"""
+        for item in homebox_items:
+            # Only items with an image are processed
+            if not item.get('imageId'):
+                continue
+            
+            item_name = item.get('name', 'Unknown')
+            total = f"/{self.homebox_items_total}" if self.homebox_items_total is not None else ""
+            print(f"\n📋 [{self.homebox_items_seen}{total}] Processing: {item_name}")
+            self.items_processed += 1
+            
+            if not item.get('id'):
+                continue
+            
+            if self.journal and self.journal.is_done('image', item['id']):
+                print("⏩ Image already imported, skipping")
+                self.images_skipped += 1
+                continue
+            
+            hearth_item, _ = self.find_hearth_item(item)
+            if not hearth_item:
+                print(f"⚠️  No matching Hearth item found for '{item_name}'")
+                continue
+            if hearth_item.has_image:
+                print("⏩ Hearth item already has an image, skipping")
+                self.images_present += 1
+                continue
+            
+            download_queue.put((item, hearth_item))
+    
+    def _feed_plan(self, entries: List[PlanEntry], download_queue: queue.Queue):
+        """Queue the planned images, skipping those imported since the plan was made"""
+        for number, entry in enumerate(entries, 1):
+            print(f"\n📋 [{number}/{len(entries)}] Processing: {entry.name}")
+            self.items_processed += 1
+            
+            if self.journal and self.journal.is_done('image', entry.homebox_id):
+                print("⏩ Image already imported, skipping")
+                self.images_skipped += 1
+                continue
+            
+            if entry.match == 'id':
+                self.id_matches_found += 1
+            elif entry.match == 'fuzzy':
+                self.fuzzy_matches_found += 1
+            else:
+                self.name_matches_found += 1
+            homebox_item = {'id': entry.homebox_id, 'imageId': entry.image_id, 'name': entry.name}
+            download_queue.put((homebox_item, HearthItem(entry.hearth_id, entry.hearth_name, False)))
+    
+    def cached_state(self, item_id: str, image_id: str) -> Optional[str]:
+        """What the image cache already holds for an attachment (image_plan.CACHED_*), if anything"""
+        if not self.image_cache:
+            return None
+        
+        digest = self.image_cache.attachment_hash(item_id, image_id)
+        if not digest:
+            return None
+        if self.image_cache.has_data_url(digest, self.compression_settings):
+            return CACHED_DATA_URL
+        return CACHED_DOWNLOAD if self.image_cache.has_raw(digest) else None
+    
+    def plan_entries(self, homebox_items: Iterable[Dict]) -> List[PlanEntry]:
+        """Match HomeBox items with images to the Hearth items that still need one"""
+        done_images = self.journal.completed('image') if self.journal else set()
+        planned = set()
+        entries = []
+        for item in homebox_items:
+            if not item.get('imageId') or not item.get('id'):
+                continue
+            self.items_processed += 1
+        
+            if item['id'] in done_images:
+                self.images_skipped += 1
+                continue
+        
+            item_name = item.get('name', 'Unknown')
+            hearth_item, match = self.find_hearth_item(item)
+            if not hearth_item:
+                print(f"⚠️  No matching Hearth item found for '{item_name}'")
+                continue
+            if hearth_item.has_image:
+                self.images_present += 1
+                continue
+            if hearth_item.id in planned:
+                # Several HomeBox items matched one Hearth item; only the first image would stay
+                self.images_duplicate += 1
+                continue
+        
+            planned.add(hearth_item.id)
+            entries.append(PlanEntry(item['id'], item['imageId'], item_name, hearth_item.id, hearth_item.name,
+                                     match,
+                                     cached=self.cached_state(item['id'], item['imageId'])))
+        return entries
+    
+    async def resolve_attachments(self, entries: List[PlanEntry]) -> List[PlanEntry]:
+        """Fill in the size and type of every attachment to download with concurrent HEAD requests"""
+        limiter = AsyncAdaptiveLimiter(self.download_workers)
+        async with self.create_homebox_client() as client:
+            async def resolve(entry: PlanEntry) -> Optional[PlanEntry]:
+                if entry.cached:
+                    return entry
+                try:
+                    with self.metrics.timer('homebox.head'):
+                        size, content_type = await self.homebox_retry.call_async(
+                            lambda: client.attachment_info(entry.homebox_id, entry.image_id), limiter
+                        )
+                except HomeBoxRequestError as e:
+                    if e.status == 404:
+                        print(f"⚠️  Image of '{entry.name}' not found in HomeBox, leaving it out")
+                        self.images_missing += 1
+                        return None
+                    # e.g. a server that doesn't allow HEAD: the size stays unknown
+                    return entry
+                except Exception as e:
+                    print(f"⚠️  Couldn't look up the image of '{entry.name}': {e}")
+                    return entry
+                return entry._replace(bytes=size, content_type=content_type)
+        
+            resolved = await asyncio.gather(*(resolve(entry) for entry in entries))
+        return [entry for entry in resolved if entry is not None]
+    
+    def build_plan(self, plan_path: str) -> bool:
+        """Write the images a run would import, with their sizes and an estimate, to plan_path"""
+        print("🗺️  HomeBox Image Import Planning")
+        print("=" * 60)
+        
+        if not self.initialize_firebase():
+            return False
+        if not self.load_hearth_items_cache():
+            return False
+        if not self.test_homebox_connection():
+            return False
+        
+        self.journal = CheckpointJournal(self.journal_path, self.user_id)
+        print(f"📋 Streaming HomeBox items ({self.page_size} per page)")
+        try:
+            entries = self.plan_entries(self.iter_homebox_items())
+        except Exception as e:
+            print(f"❌ Error getting items: {e}")
+            return False
+        finally:
+            self.journal.close()
+        
+        if not self.homebox_items_seen:
+            print("❌ No items found in HomeBox")
+            return False
+        
+        downloads = sum(1 for entry in entries if not entry.cached)
+        print(f"\n📏 Looking up {downloads} image sizes")
+        with self.metrics.timer('plan.resolve'):
+            entries = asyncio.run(self.resolve_attachments(entries))
+        summary = estimate_plan(entries, self.compress_workers, self.write_workers)
+        write_plan(plan_path, self.user_id, self.homebox_url, entries, summary)
+        
+        print(f"\n✅ PLAN WRITTEN: {plan_path}")
+        print("=" * 60)
+        print(f"Items with images: {self.items_processed} of {self.homebox_items_seen}")
+        if self.images_present:
+            print(f"Already have an image: {self.images_present}")
+        if self.images_skipped:
+            print(f"Already imported (journal): {self.images_skipped}")
+        if self.images_duplicate:
+            print(f"Matched an already planned Hearth item: {self.images_duplicate}")
+        if self.images_missing:
+            print(f"Missing in HomeBox: {self.images_missing}")
+        print(f"HomeBox ID matches: {self.id_matches_found}")
+        print(f"No matches found: {self.no_matches_found}")
+        print(f"Images to import: {summary['images']} ({summary['fuzzyMatches']} fuzzy matches)")
+        print(f"Downloads: {summary['downloads']} ({format_bytes(summary['downloadBytes'])}"
+              f"{', ' + str(summary['unknownSizes']) + ' sizes estimated' if summary['unknownSizes'] else ''})")
+        if summary['downloads'] < summary['images']:
+            print(f"From the image cache: {summary['images'] - summary['downloads']} "
+                  f"({summary['images'] - summary['compressions']} already compressed)")
+        print(f"Estimated time: ~{summary['estimatedSeconds']:.0f}s "
+              f"({self.download_workers} download, {self.compress_workers} compress, {self.write_workers} write workers)")
+        print(f"Run with --from-plan {plan_path} to import exactly these images")
+        return True
+    
+    def run_import(self, plan_path: Optional[str] = None):
+        """Run the full image import process with intelligent matching, or only the images in a plan"""
         print("🖼️  HomeBox Image Import Starting")
         print("=" * 60)
         
+        entries = None
+        if plan_path:
+            try:
+                plan, entries = read_plan(plan_path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"❌ Couldn't read plan {plan_path}: {e}")
+                return False
+            if plan.get('userId') != self.user_id:
+                print(f"❌ Plan {plan_path} was made for user {plan.get('userId')}, not {self.user_id}")
+                return False
+            if plan.get('homeboxUrl') != self.homebox_url:
+                print(f"⚠️  Plan {plan_path} was made for {plan.get('homeboxUrl')}")
+            print(f"🗺️  Plan from {plan.get('createdAt')}: {len(entries)} images")
+        
         # Initialize Firebase
         if not self.initialize_firebase():
             return False
         
-        # Load Hearth items cache for intelligent matching
-        if not self.load_hearth_items_cache():
+        # Load Hearth items cache for intelligent matching (a plan is already matched)
+        if entries is None and not self.load_hearth_items_cache():
             return False
         
         # Test HomeBox connection
         if not self.test_homebox_connection():
             return False
         
-        # Get all HomeBox items
-        homebox_items = self.get_homebox_items()
-        if not homebox_items:
-            print("❌ No items found in HomeBox")
-            return False
+        # Stream HomeBox items page by page straight into the pipeline, which
+        # downloads, compresses and updates concurrently
+        self.journal = CheckpointJournal(self.journal_path, self.user_id)
+        done_images = self.journal.completed('image')
+        if done_images:
+            print(f"⏩ Resuming from {self.journal_path}: {len(done_images)} images already imported")
         
-        # Filter items that have images
-        items_with_images = [item for item in homebox_items if item.get('imageId')]
-        print(f"📋 Found {len(items_with_images)} items with images out of {len(homebox_items)} total")
+        if entries is None:
+            print(f"📋 Streaming HomeBox items ({self.page_size} per page)")
+        try:
+            if entries is None:
+                self.run_pipeline(self.iter_homebox_items())
+            else:
+                self.run_pipeline(entries, feed=self._feed_plan)
+        finally:
+            if self.sink:
+                self.sink.close()
+            self.journal.close()
         
-        # Process each item
-        for i, item in enumerate(items_with_images):
-            item_name = item.get('name', 'Unknown')
-            print(f"\n📋 [{i+1}/{len(items_with_images)}] Processing: {item_name}")
-            
-            self.items_processed += 1
-            
-            images_count = self.process_item_images(item)
-            if images_count > 0:
-                self.images_found += 1
-                self.images_imported += images_count
+        if entries is None:
+            if not self.homebox_items_seen:
+                print("❌ No items found in HomeBox")
+                return False
+            print(f"\n📋 Found {self.items_processed} items with images out of {self.homebox_items_seen} total")
         
         # Print detailed summary
         print(f"\n✅ IMAGE IMPORT COMPLETE")
@@ -411,10 +1284,31 @@ class HomeBoxImageImporter:
         print(f"Items processed: {self.items_processed}")
         print(f"Images found: {self.images_found}")
         print(f"Images imported: {self.images_imported}")
+        if self.images_skipped:
+            print(f"Images skipped (already imported): {self.images_skipped}")
+        if self.images_present:
+            print(f"Images skipped (item already has an image): {self.images_present}")
+        if self.image_cache:
+            print(f"Image cache: {self.downloads_cached} downloads and {self.compressions_cached} compressions reused "
+                  f"({self.image_cache.size_bytes / 1024 / 1024:.1f}MB in {self.image_cache.directory})")
+        print(f"HomeBox ID matches: {self.id_matches_found}")
         print(f"Exact name matches: {self.name_matches_found}")
         print(f"Fuzzy matches found: {self.fuzzy_matches_found}")
         print(f"No matches found: {self.no_matches_found}")
-        print(f"Format: Base64 data URLs (max 1024px, 800KB)")
+        if self.image_store:
+            print(f"Format: images (max 1024px, 800KB) and {THUMBNAIL_DIMENSION}px thumbnails in {self.image_store.label}, "
+                  f"URLs and a {PLACEHOLDER_DIMENSION}px placeholder in the item")
+        else:
+            print("Format: Base64 data URLs (max 1024px, 800KB)")
+        for label, retry, limiter in [('HomeBox requests', self.homebox_retry, self.download_limiter),
+                                      ('Firestore writes', self.firestore_retry, self.write_limiter),
+                                      ('Storage uploads', self.storage_retry, None)]:
+            if retry.retries:
+                backoff = f" (concurrency backed off to {int(limiter.lowest_limit)})" if limiter and limiter.decreases else ""
+                print(f"{label} retried: {retry.retries}{backoff}")
+        if self.images_compressed:
+            print(f"Encodes per image: {self.image_encodes / self.images_compressed:.2f} "
+                  f"({self.image_encodes} for {self.images_compressed} images)")
         
         if self.errors:
             print(f"\n⚠️  ERRORS:")
@@ -431,11 +1325,65 @@ def main():
     parser.add_argument('--token', required=True, help='HomeBox API token')
     parser.add_argument('--user-id', required=True, help='Hearth user ID')
     parser.add_argument('--test-only', action='store_true', help='Only test connection, don\'t import')
+    parser.add_argument('--download-workers', type=int, default=DEFAULT_DOWNLOAD_WORKERS, help=f'Image downloads in flight at once (default: {DEFAULT_DOWNLOAD_WORKERS})')
+    parser.add_argument('--compress-workers', type=int, default=DEFAULT_COMPRESS_WORKERS, help=f'Processes compressing images (default: {DEFAULT_COMPRESS_WORKERS}, CPU count)')
+    parser.add_argument('--max-connections', type=int, help='HomeBox connection pool size (default: same as --download-workers)')
+    parser.add_argument('--request-timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT, help=f'Per-request HomeBox timeout in seconds (default: {DEFAULT_REQUEST_TIMEOUT})')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help=f'HomeBox items requested per page (default: {DEFAULT_PAGE_SIZE})')
+    parser.add_argument('--write-workers', type=int, default=DEFAULT_WRITE_WORKERS, help=f'Concurrent Firestore updates (default: {DEFAULT_WRITE_WORKERS})')
+    parser.add_argument('--journal', help=f'Progress journal path for resuming (default: {DEFAULT_JOURNAL_PATH}, or <jsonl>.journal.sqlite with --stage)')
+    parser.add_argument('--restart', action='store_true', help='Ignore previous progress in the journal and import all images again')
+    parser.add_argument('--plan', metavar='JSON', help='Only plan: write the images still to import, with sizes and an estimate, to this file')
+    parser.add_argument('--from-plan', metavar='JSON', help='Import exactly the images in a plan written by --plan')
+    parser.add_argument('--stage', metavar='JSONL', help='Write the image updates to a JSONL file instead of Firestore; load it later with load_staged.py')
+    parser.add_argument('--storage-bucket', help='Upload images and thumbnails to this Firebase Storage bucket and store only their URLs in the items')
+    parser.add_argument('--storage-dir', help='Like --storage-bucket, but write the files to this directory (a local stand-in bucket)')
+    parser.add_argument('--storage-base-url', help='URL the --storage-dir files are served from (default: file:// URLs)')
+    parser.add_argument('--max-pixels', type=int, default=DEFAULT_MAX_PIXELS, help=f'Skip images that decode to more pixels than this (default: {DEFAULT_MAX_PIXELS:,})')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'Image cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_CACHE_SIZE_MB, help=f'Image cache size limit in MB (default: {DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--no-cache', action='store_true', help='Always download and compress images, without the on-disk cache')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_RETRY_ATTEMPTS - 1, help=f'Retries after a transient HomeBox or Firestore error (default: {DEFAULT_RETRY_ATTEMPTS - 1})')
+    parser.add_argument('--metrics-json', help='Write per-stage timings and counters to this JSON file')
+    parser.add_argument('--metrics-interval', type=float, default=0, help='Print a live metrics summary every N seconds during the import (default: off)')
     
     args = parser.parse_args()
+    if args.plan and args.from_plan:
+        parser.error('--plan and --from-plan are separate runs')
+    if args.storage_bucket and args.storage_dir:
+        parser.error('choose either --storage-bucket or --storage-dir')
+    
+    image_cache = None
+    if not args.no_cache and not args.test_only:
+        image_cache = ImageCache(args.cache_dir, args.cache_size_mb * 1024 * 1024)
+    
+    # Staging keeps its own journal, so a later Firestore import isn't skipped
+    journal_path = args.journal or (f"{args.stage}.journal.sqlite" if args.stage else DEFAULT_JOURNAL_PATH)
+    sink = None
+    if args.stage and not args.test_only and not args.plan:
+        # Small batches: every line carries a data URL of up to ~1MB
+        sink = JsonlSink(args.stage, batch_size=20, append=not args.restart)
+    
+    image_store = None
+    if args.storage_bucket:
+        image_store = FirebaseImageStore(args.storage_bucket)
+    elif args.storage_dir:
+        image_store = LocalImageStore(args.storage_dir, args.storage_base_url)
     
     # Create importer
-    importer = HomeBoxImageImporter(args.homebox_url, args.token, args.user_id)
+    importer = HomeBoxImageImporter(args.homebox_url, args.token, args.user_id,
+                                    download_workers=args.download_workers,
+                                    compress_workers=args.compress_workers,
+                                    write_workers=args.write_workers,
+                                    max_connections=args.max_connections,
+                                    request_timeout=args.request_timeout,
+                                    page_size=args.page_size,
+                                    journal_path=journal_path,
+                                    image_cache=image_cache,
+                                    max_pixels=args.max_pixels,
+                                    retry_attempts=args.max_retries + 1,
+                                    sink=sink,
+                                    image_store=image_store)
     
     if args.test_only:
         print("🧪 Testing connection only...")
@@ -445,8 +1393,28 @@ def main():
             print("❌ Connection test failed!")
         return
     
+    if args.restart and os.path.exists(journal_path):
+        journal = CheckpointJournal(journal_path, args.user_id)
+        journal.reset()
+        journal.close()
+        print(f"🔄 Cleared image import progress in {journal_path}")
+    
     # Run full import
-    success = importer.run_import()
+    if args.metrics_interval > 0:
+        importer.metrics.start_live_summary(args.metrics_interval)
+    try:
+        if args.plan:
+            success = importer.build_plan(args.plan)
+        else:
+            success = importer.run_import(plan_path=args.from_plan)
+    finally:
+        importer.metrics.stop_live_summary()
+        if image_cache:
+            image_cache.close()
+    importer.metrics.print_summary()
+    if args.metrics_json:
+        importer.metrics.write_json(args.metrics_json)
+        print(f"💾 Metrics written to {args.metrics_json}")
     sys.exit(0 if success else 1)
 
 if __name__ == '__main__':
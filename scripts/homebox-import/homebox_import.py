@@ -8,6 +8,7 @@ It creates containers based on locations and imports items with full metadata.
 Usage:
     python homebox_import.py --csv ~/Downloads/homebox-items_YYYY-MM-DD_HH-MM-SS.csv --preview
     python homebox_import.py --csv ~/Downloads/homebox-items_YYYY-MM-DD_HH-MM-SS.csv --import --user-id YOUR_USER_ID
+    python homebox_import.py --csv ~/Downloads/homebox-items_YYYY-MM-DD_HH-MM-SS.csv --import --sync --user-id YOUR_USER_ID
 
 Requirements:
     pip install firebase-admin pandas python-dotenv
@@ -15,36 +16,166 @@ Requirements:
 
 import argparse
 import csv
+import hashlib
 import json
+import multiprocessing
 import os
 import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-import pandas as pd
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Any
 from dotenv import load_dotenv
 
+from batch_writer import FIRESTORE_BATCH_LIMIT, MAX_BATCH_BYTES
+import columnar_input
+from checkpoint_journal import CheckpointJournal
+from delta_sync import HASH_FIELD, changed_fields, document_hash
+from item_fields import (HOMEBOX_ITEM_URL, IMPORT_COLUMNS, parse_date_value, parse_labels_value,
+                         parse_price_value)
+from metrics import Metrics
+from sinks import SERVER_TIMESTAMP, DryRunSink, FirestoreSink, JsonlSink, Sink, firestore_sentinel
+from throttle import DEFAULT_RETRY_ATTEMPTS, RetryPolicy
+
+# pandas, pyarrow and firebase-admin are imported by the code paths that use
+# them: --preview needs none of them and --dry-run no Firebase
+if TYPE_CHECKING:
+    import pandas as pd
+
 # Load environment variables
 load_dotenv()
 
-try:
-    import firebase_admin
-    from firebase_admin import credentials, firestore
-except ImportError:
-    print("❌ Firebase Admin SDK not installed. Run: pip install firebase-admin")
-    sys.exit(1)
+# Rows per CSV chunk; peak memory scales with this, not with the file size
+DEFAULT_CHUNK_SIZE = 10000
+
+# Rows kept per location for previews and dry runs
+SAMPLE_ITEMS_PER_LOCATION = 5
+
+# CSVs up to this size are read with the csv module and transformed row by
+# row: for them, importing pandas takes longer than the whole import
+PLAIN_CSV_MAX_BYTES = 4 * 1024 * 1024
+
+# Cells pandas' CSV reader turns into NaN (its default na_values); the plain
+# reader used for --preview treats them the same way
+CSV_NA_VALUES = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+})
+
+# Placeholder owner for documents built during a dry run without --user-id
+DRY_RUN_USER_ID = 'dry-run-user'
+
+# Tag colors offered by the Hearth app (src/services/tagService.ts)
+TAG_COLORS = [
+    '#dc3545',  # Red
+    '#fd7e14',  # Orange
+    '#ffc107',  # Yellow
+    '#198754',  # Green
+    '#20c997',  # Teal
+    '#0dcaf0',  # Cyan
+    '#0d6efd',  # Blue
+    '#6610f2',  # Indigo
+    '#6f42c1',  # Purple
+    '#d63384',  # Pink
+    '#6c757d',  # Gray
+    '#495057',  # Dark Gray
+]
+
+# Fields read back from Firestore for --sync: everything the import owns,
+# leaving out timestamps and the (possibly large) image data URL
+CONTAINER_SYNC_FIELDS = ['name', 'description', 'location', 'userId', HASH_FIELD]
+TAG_SYNC_FIELDS = ['name', 'color', 'usageCount', 'userId', HASH_FIELD]
+ITEM_SYNC_FIELDS = ['name', 'description', 'containerId', 'userId', 'purchasePrice', 'currentValue',
+                    'purchaseDate', 'manufacturer', 'model', 'serialNumber', 'warranty', 'brand',
+                    'notes', 'tags', 'homeboxId', 'homeboxAssetId', 'categoryId', 'condition', HASH_FIELD]
 
 class HomeBoxImporter:
-    def __init__(self, csv_path: str, user_id: str = None):
+    def __init__(self, csv_path: str, user_id: str = None,
+                 batch_size: int = FIRESTORE_BATCH_LIMIT, commit_workers: int = 4,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, journal_path: Optional[str] = None,
+                 metrics: Optional[Metrics] = None, retry_attempts: int = DEFAULT_RETRY_ATTEMPTS,
+                 sink: Optional[Sink] = None, sync: bool = False, delete_missing: bool = True,
+                 images=None, csv_cache: bool = True):
         self.csv_path = csv_path
         self.user_id = user_id
+        self.chunk_size = chunk_size
+        # Keep a Parquet copy of the CSV's import columns for later passes
+        # and runs (see columnar_input.py)
+        self.csv_cache = csv_cache
         self.db = None
+        # Where documents go; defaults to Firestore (see sinks.py)
+        self.sink = sink
+        self.writer = None
+        self.batch_size = batch_size
+        self.commit_workers = commit_workers
+        self.metrics = metrics or Metrics()
+        self.retry_attempts = retry_attempts
+        
+        # Progress journal next to the CSV so an interrupted import can resume
+        self.journal_path = journal_path or f"{csv_path}.journal.sqlite"
+        self.journal = None
+        self.resumed_items = frozenset()
+        
+        # Delta sync: compare with what is already in Hearth and only write
+        # the differences (see delta_sync.py)
+        self.sync = sync
+        self.delete_missing = delete_missing
+        self.existing_containers = {}
+        self.existing_tags = {}
+        self.existing_items = {}
+        
+        # Label -> tag document ID, for every label in the export
+        self.tag_ids = {}
+        
+        # Optional ItemImageAttacher: items with a HomeBox image are written
+        # once, with the image already set (see image_attach.py)
+        self.images = images
+        # Items are queued from the CSV pass and the image pipeline's threads
+        self._write_lock = threading.Lock()
+        self._pending_image_bytes = 0
+        
         self.containers_created = {}
+        self.tags_created = {}
+        # Tag documents written new, updated or left as they were by a sync
+        self.tags_new = 0
+        self.tags_updated = 0
+        self.tags_unchanged = 0
         self.items_imported = 0
+        self.items_skipped = 0
+        self.items_created = 0
+        self.items_updated = 0
+        self.items_unchanged = 0
+        self.items_deleted = 0
         self.errors = []
         
+        # Server timestamp for the documents: a stand-in until Firebase is
+        # initialized, which dry runs and staging never need (see sinks.py)
+        self.server_timestamp = SERVER_TIMESTAMP
+        
+        # Prefix of progress lines, to tell worker processes apart
+        self.log_prefix = ''
+        
     def initialize_firebase(self):
         """Initialize Firebase Admin SDK"""
         try:
+            self.server_timestamp = firestore_sentinel(SERVER_TIMESTAMP)
+        except ImportError:
+            # A stand-in database (fake_firestore.py) takes the stand-in
+            if self.db is None:
+                print("❌ Firebase Admin SDK not installed. Run: pip install firebase-admin")
+                return False
+        
+        if self.db is not None:
+            # Already connected, e.g. to a stand-in database (fake_firestore.py)
+            return True
+        
+        try:
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+            
             # Try to use service account key if available
             service_account_path = os.getenv('FIREBASE_SERVICE_ACCOUNT_KEY')
             if service_account_path and os.path.exists(service_account_path):
@@ -65,58 +196,159 @@ class HomeBoxImporter:
             print("   2. Or run 'gcloud auth application-default login'")
             return False
     
-    def load_csv_data(self) -> List[Dict]:
-        """Load and parse the HomeBox CSV export"""
+    def iter_csv_frames(self) -> Iterator['pd.DataFrame']:
+        """Stream the HomeBox export as cleaned DataFrame chunks of the import columns"""
+        import pandas as pd
+        
+        if columnar_input.columnar_format(self.csv_path):
+            yield from self._timed_chunks(columnar_input.iter_columnar_frames(
+                self.csv_path, self.chunk_size, IMPORT_COLUMNS))
+            return
+        
+        cached_path = columnar_input.cached_columns(self.csv_path) if self.csv_cache else None
+        if cached_path:
+            yield from self._timed_chunks(columnar_input.iter_columnar_frames(
+                cached_path, self.chunk_size, IMPORT_COLUMNS))
+            return
+        
+        converter = None
+        if self.csv_cache and columnar_input.available():
+            converter = columnar_input.CsvConverter(self.csv_path)
+        
+        # Read every column as text so each chunk gets the same types no
+        # matter which values happen to fall into it
+        reader = pd.read_csv(self.csv_path, dtype=str, chunksize=self.chunk_size,
+                             usecols=lambda name: name in IMPORT_COLUMNS)
         try:
-            df = pd.read_csv(self.csv_path)
-            print(f"📊 Loaded {len(df)} items from CSV")
-            
-            # Convert to list of dictionaries for easier processing
-            items = df.to_dict('records')
-            
-            # Clean up the data
-            for item in items:
-                # Handle NaN values
-                for key, value in item.items():
-                    if pd.isna(value):
-                        item[key] = None
-                    elif isinstance(value, str):
-                        item[key] = value.strip()
-            
-            return items
-            
-        except Exception as e:
-            print(f"❌ Error loading CSV: {e}")
-            return []
+            with reader:
+                for df in self._timed_chunks(self.clean_frame(df) for df in reader):
+                    if converter:
+                        converter.write(df)
+                    yield df
+            if converter and converter.commit():
+                print(f"💾 Cached the CSV's columns in {converter.path} for faster reruns")
+        finally:
+            if converter:
+                converter.discard()
+    
+    def _timed_chunks(self, chunks: Iterator) -> Iterator:
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            self.metrics.observe('csv.read_chunk', time.perf_counter() - start)
+            self.metrics.count('csv.rows_read', len(chunk))
+            yield chunk
     
-    def analyze_data(self, items: List[Dict]) -> Dict:
-        """Analyze the HomeBox data to understand structure"""
+    def plain_csv(self) -> bool:
+        """Whether the export is a CSV small enough to import without pandas"""
+        return (not columnar_input.columnar_format(self.csv_path)
+                and os.path.getsize(self.csv_path) <= PLAIN_CSV_MAX_BYTES)
+    
+    def iter_csv_chunks(self) -> Iterator[List[Dict]]:
+        """Stream the HomeBox CSV export as chunks of cleaned rows"""
+        if self.plain_csv():
+            yield from self._timed_chunks(self.iter_plain_csv_chunks())
+            return
+        for df in self.iter_csv_frames():
+            yield df.to_dict('records')
+    
+    def iter_plain_csv_chunks(self) -> Iterator[List[Dict]]:
+        """
+        Stream the CSV as chunks of cleaned rows with the csv module. Rows
+        equal iter_csv_frames' without loading pandas, which takes longer
+        than analyzing a typical export; used for --preview and small CSVs.
+        """
+        with open(self.csv_path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header = next(reader, None) or []
+            columns = [(index, name) for index, name in enumerate(header) if name in IMPORT_COLUMNS]
+            chunk = []
+            for row in reader:
+                if not row:
+                    # pandas skips blank lines
+                    continue
+                chunk.append({name: (row[index].strip() if index < len(row) and row[index] not in CSV_NA_VALUES else None)
+                              for index, name in columns})
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+    
+    def clean_frame(self, df: 'pd.DataFrame') -> 'pd.DataFrame':
+        """Strip whitespace and turn empty cells into None, column by column"""
+        for column in df.columns:
+            df[column] = df[column].str.strip()
+        return df.astype(object).where(df.notna(), None)
+    
+    def clean_chunk(self, df: 'pd.DataFrame') -> List[Dict]:
+        """Cleaned rows of a raw CSV chunk as dictionaries"""
+        return self.clean_frame(df).to_dict('records')
+    
+    def analyze_data(self, chunks: Optional[Iterable[List[Dict]]] = None) -> Dict:
+        """Analyze the HomeBox data to understand structure (single streaming pass)"""
+        if chunks is None:
+            chunks = self.iter_csv_chunks()
+        
         locations = {}
+        location_samples = {}
         labels_set = set()
+        # Imported (located) items per label, stored on the tag documents
+        label_counts = {}
+        sample_items = []
+        total_items = 0
+        unlocated_items = 0
         
-        for item in items:
-            location = item.get('HB.location', '').strip()
-            if location:
-                if location not in locations:
-                    locations[location] = []
-                locations[location].append(item)
+        try:
+            for chunk in chunks:
+                for item in chunk:
+                    total_items += 1
+                    if len(sample_items) < 3:
+                        sample_items.append(item)
+                    
+                    # Parse labels (tags)
+                    labels = item.get('HB.labels', '')
+                    item_labels = []
+                    if labels:
+                        # Split by semicolon and clean up
+                        item_labels = [label.strip() for label in labels.split(';') if label.strip()]
+                        labels_set.update(item_labels)
+                    
+                    location = (item.get('HB.location') or '').strip()
+                    if location:
+                        if location not in locations:
+                            locations[location] = 0
+                            location_samples[location] = []
+                        locations[location] += 1
+                        if len(location_samples[location]) < SAMPLE_ITEMS_PER_LOCATION:
+                            location_samples[location].append(item)
+                        for label in set(item_labels):
+                            label_counts[label] = label_counts.get(label, 0) + 1
+                    else:
+                        unlocated_items += 1
             
-            # Parse labels (tags)
-            labels = item.get('HB.labels', '')
-            if labels:
-                # Split by semicolon and clean up
-                item_labels = [label.strip() for label in labels.split(';') if label.strip()]
-                labels_set.update(item_labels)
+            print(f"📊 Loaded {total_items} items from CSV")
+            
+        except Exception as e:
+            print(f"❌ Error loading CSV: {e}")
+            total_items = 0
         
         return {
             'locations': locations,
+            'location_samples': location_samples,
+            'sample_items': sample_items,
             'all_labels': sorted(list(labels_set)),
-            'total_items': len(items)
+            'label_counts': label_counts,
+            'total_items': total_items,
+            'unlocated_items': unlocated_items
         }
     
-    def preview_import(self, items: List[Dict]):
+    def preview_import(self, analysis: Optional[Dict] = None):
         """Preview what would be imported without actually importing"""
-        analysis = self.analyze_data(items)
+        if analysis is None:
+            analysis = self.analyze_data()
         
         print("\n🔍 IMPORT PREVIEW")
         print("=" * 50)
@@ -124,8 +356,8 @@ class HomeBoxImporter:
         print(f"Containers to create: {len(analysis['locations'])}")
         
         print("\n📦 CONTAINERS (by location):")
-        for location, location_items in analysis['locations'].items():
-            print(f"  • {location}: {len(location_items)} items")
+        for location, items_count in analysis['locations'].items():
+            print(f"  • {location}: {items_count} items")
         
         print(f"\n🏷️  AVAILABLE LABELS ({len(analysis['all_labels'])}):")
         for i, label in enumerate(analysis['all_labels'][:20]):  # Show first 20
@@ -134,11 +366,11 @@ class HomeBoxImporter:
             print(f"  ... and {len(analysis['all_labels']) - 20} more")
         
         print("\n📋 SAMPLE ITEMS:")
-        for i, item in enumerate(items[:3]):  # Show first 3 items
+        for i, item in enumerate(analysis['sample_items']):  # Show first 3 items
             print(f"\n  Item {i+1}: {item.get('HB.name', 'Unnamed')}")
             print(f"    Location: {item.get('HB.location', 'None')}")
             print(f"    Labels: {item.get('HB.labels', 'None')}")
-            print(f"    Description: {item.get('HB.description', 'None')[:100]}...")
+            print(f"    Description: {(item.get('HB.description') or 'None')[:100]}...")
             print(f"    Purchase Price: ${item.get('HB.purchase_price', 0)}")
             print(f"    Manufacturer: {item.get('HB.manufacturer', 'None')}")
             print(f"    Model: {item.get('HB.model_number', 'None')}")
@@ -146,8 +378,8 @@ class HomeBoxImporter:
         print("\n💡 To proceed with import, run with --import flag and --user-id")
     
     def create_container(self, location: str, items_count: int) -> Optional[str]:
-        """Create a container in Hearth for the given location"""
-        if not self.db or not self.user_id:
+        """Queue a container in Hearth for the given location and return its ID"""
+        if not self.user_id or not self.writer:
             return None
         
         try:
@@ -156,16 +388,24 @@ class HomeBoxImporter:
                 'description': f'Imported from HomeBox - Contains {items_count} items',
                 'location': 'Imported from HomeBox',
                 'userId': self.user_id,
-                'createdAt': firestore.SERVER_TIMESTAMP,
-                'updatedAt': firestore.SERVER_TIMESTAMP,
+                'createdAt': self.server_timestamp,
+                'updatedAt': self.server_timestamp,
                 'imageUrl': None
             }
+            container_data[HASH_FIELD] = document_hash(container_data)
             
-            # Add to Firestore
-            doc_ref = self.db.collection('containers').add(container_data)
-            container_id = doc_ref[1].id
+            # Deterministic document ID, so a rerun overwrites instead of duplicating
+            container_id = self.document_id('container', location)
+            existing = self.existing_containers.get(container_id)
+            if existing is None:
+                self.writer.set('containers', container_id, container_data, ('container', location))
+                return container_id
             
-            print(f"✅ Created container: {location} (ID: {container_id})")
+            changes = self.sync_changes(container_data, existing)
+            if changes:
+                self.writer.update('containers', container_id, changes, ('container', location))
+            else:
+                self.containers_created[location] = container_id
             return container_id
             
         except Exception as e:
@@ -174,97 +414,142 @@ class HomeBoxImporter:
             self.errors.append(error_msg)
             return None
     
-    def parse_date(self, date_str: str) -> Optional[datetime]:
-        """Parse HomeBox date format"""
-        if not date_str or str(date_str).strip() == '' or date_str == '0001-02-16' or date_str == '0001-03-20':
+    def create_tag(self, label: str, usage_count: int) -> Optional[str]:
+        """Queue the Hearth tag for a HomeBox label and return its ID"""
+        if not self.user_id or not self.writer:
             return None
         
         try:
-            # Try different date formats
-            for fmt in ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%m/%d/%Y']:
-                try:
-                    return datetime.strptime(str(date_str).strip(), fmt)
-                except ValueError:
-                    continue
-            return None
-        except:
+            tag_data = {
+                'name': label,
+                'color': self.tag_color(label),
+                'userId': self.user_id,
+                # Precomputed over the whole export, so a retried or resumed
+                # write sets the same value instead of counting twice
+                'usageCount': usage_count,
+                'createdAt': self.server_timestamp,
+                'updatedAt': self.server_timestamp
+            }
+            tag_data[HASH_FIELD] = document_hash(tag_data)
+            
+            tag_id = self.tag_id(label)
+            existing = self.existing_tags.get(tag_id)
+            if existing is None:
+                self.writer.set('tags', tag_id, tag_data, ('tag', label))
+                return tag_id
+            
+            changes = self.sync_changes(tag_data, existing)
+            if changes:
+                self.writer.update('tags', tag_id, changes, ('tag', label))
+            else:
+                self.tags_created[label] = tag_id
+                self.tags_unchanged += 1
+            return tag_id
+            
+        except Exception as e:
+            error_msg = f"Failed to create tag '{label}': {e}"
+            print(f"❌ {error_msg}")
+            self.errors.append(error_msg)
             return None
     
+    def tag_id(self, label: str) -> str:
+        """Tag document ID for a label; the same label always maps to the same tag"""
+        tag_id = self.tag_ids.get(label)
+        if tag_id is None:
+            tag_id = self.tag_ids[label] = self.document_id('tag', label)
+        return tag_id
+    
+    def tag_color(self, label: str) -> str:
+        """Stable color for a label, so tags keep their color across imports"""
+        return TAG_COLORS[zlib.crc32(label.encode('utf-8')) % len(TAG_COLORS)]
+    
+    def document_id(self, kind: str, key: str) -> str:
+        """Stable Firestore document ID for a HomeBox container or item of this user"""
+        return hashlib.sha1(f"{self.user_id}:{kind}:{key}".encode('utf-8')).hexdigest()[:20]
+    
+    def homebox_item_id(self, item: Dict) -> Optional[str]:
+        """HomeBox item ID taken from the item link in HB.url"""
+        match = HOMEBOX_ITEM_URL.search(item.get('HB.url') or '')
+        return match.group(1) if match else None
+    
+    def item_key(self, item: Dict, row_number: int) -> str:
+        """Stable key for a CSV row: HomeBox item ID, import ref, asset ID, or row number"""
+        homebox_id = self.homebox_item_id(item)
+        if homebox_id:
+            return f"id:{homebox_id}"
+        if item.get('HB.import_ref'):
+            return f"ref:{item['HB.import_ref']}"
+        if item.get('HB.asset_id'):
+            return f"asset:{item['HB.asset_id']}"
+        return f"row:{row_number}"
+    
+    def parse_date(self, date_str: str) -> Optional[datetime]:
+        """Parse HomeBox date format"""
+        return parse_date_value(date_str)
+    
     def parse_labels_as_tags(self, labels_str: str) -> List[str]:
         """Parse HomeBox labels into Hearth tags"""
-        if not labels_str:
-            return []
-        
-        # Split by semicolon and clean up
-        tags = [label.strip() for label in str(labels_str).split(';') if label.strip()]
-        return tags
+        return parse_labels_value(labels_str)
     
-    def import_item(self, item: Dict, container_id: str) -> bool:
-        """Import a single item into Hearth"""
-        if not self.db or not self.user_id:
-            return False
+    def build_item_document(self, item: Dict, container_id: str) -> Dict:
+        """
+        Build the Hearth item document for a HomeBox row. This is the
+        reference for item_transform.build_item_documents, which builds the
+        same documents for a whole chunk at once.
+        """
+        # Parse purchase date
+        purchase_date = self.parse_date(item.get('HB.purchase_time'))
         
-        try:
-            # Parse purchase date
-            purchase_date = self.parse_date(item.get('HB.purchase_time'))
+        # Parse purchase price, and sold price (as current value)
+        purchase_price = parse_price_value(item.get('HB.purchase_price', ''))
+        current_value = parse_price_value(item.get('HB.sold_price', ''))
+        
+        return {
+            'name': str(item.get('HB.name', 'Unnamed Item')).strip(),
+            'description': str(item.get('HB.description', '')).strip() or None,
+            'containerId': container_id,
+            'userId': self.user_id,
+            'createdAt': self.server_timestamp,
+            'updatedAt': self.server_timestamp,
             
-            # Parse purchase price
-            purchase_price = None
-            try:
-                price_str = str(item.get('HB.purchase_price', '')).strip()
-                if price_str and price_str != '0' and price_str != '':
-                    purchase_price = float(price_str)
-            except (ValueError, TypeError):
-                pass
+            # Metadata
+            'purchasePrice': purchase_price,
+            'currentValue': current_value,
+            'purchaseDate': purchase_date,
+            'manufacturer': str(item.get('HB.manufacturer', '')).strip() or None,
+            'model': str(item.get('HB.model_number', '')).strip() or None,
+            'serialNumber': str(item.get('HB.serial_number', '')).strip() or None,
+            'warranty': str(item.get('HB.warranty_details', '')).strip() or None,
+            'brand': str(item.get('HB.manufacturer', '')).strip() or None,  # Use manufacturer as brand
             
-            # Parse sold price (as current value)
-            current_value = None
-            try:
-                sold_price_str = str(item.get('HB.sold_price', '')).strip()
-                if sold_price_str and sold_price_str != '0' and sold_price_str != '':
-                    current_value = float(sold_price_str)
-            except (ValueError, TypeError):
-                pass
+            # HomeBox specific fields (stored in notes or description)
+            'notes': self.build_notes(item),
             
-            # Create item data
-            item_data = {
-                'name': str(item.get('HB.name', 'Unnamed Item')).strip(),
-                'description': str(item.get('HB.description', '')).strip() or None,
-                'containerId': container_id,
-                'userId': self.user_id,
-                'createdAt': firestore.SERVER_TIMESTAMP,
-                'updatedAt': firestore.SERVER_TIMESTAMP,
-                
-                # Metadata
-                'purchasePrice': purchase_price,
-                'currentValue': current_value,
-                'purchaseDate': purchase_date,
-                'manufacturer': str(item.get('HB.manufacturer', '')).strip() or None,
-                'model': str(item.get('HB.model_number', '')).strip() or None,
-                'serialNumber': str(item.get('HB.serial_number', '')).strip() or None,
-                'warranty': str(item.get('HB.warranty_details', '')).strip() or None,
-                'brand': str(item.get('HB.manufacturer', '')).strip() or None,  # Use manufacturer as brand
-                
-                # HomeBox specific fields (stored in notes or description)
-                'notes': self.build_notes(item),
-                
-                # Tags from labels
-                'tags': self.parse_labels_as_tags(item.get('HB.labels', '')),
-                
-                # Additional fields
-                'imageUrl': None,
-                'categoryId': None,
-                'condition': None
-            }
+            # Tag document IDs from labels
+            'tags': [self.tag_id(label) for label in self.parse_labels_as_tags(item.get('HB.labels', ''))],
             
-            # Add to Firestore
-            doc_ref = self.db.collection('items').add(item_data)
-            item_id = doc_ref[1].id
+            # Links back to the HomeBox item, for matching images by ID
+            'homeboxId': self.homebox_item_id(item),
+            'homeboxAssetId': item.get('HB.asset_id') or None,
             
-            self.items_imported += 1
-            if self.items_imported % 10 == 0:
-                print(f"📋 Imported {self.items_imported} items...")
+            # Additional fields
+            'imageUrl': None,
+            'categoryId': None,
+            'condition': None
+        }
+    
+    def import_item(self, item: Dict, container_id: str, row_number: int = 0) -> bool:
+        """Queue a single item for the batched import into Hearth"""
+        if not self.user_id or not self.writer:
+            return False
+        
+        try:
+            key = self.item_key(item, row_number)
+            if self.journal and self.journal.is_done('item', key):
+                self.items_skipped += 1
+                return True
             
+            self.queue_item(key, self.build_item_document(item, container_id))
             return True
             
         except Exception as e:
@@ -273,6 +558,189 @@ class HomeBoxImporter:
             self.errors.append(error_msg)
             return False
     
+    def import_rows(self, rows: List[Dict], first_row_number: int) -> int:
+        """Queue cleaned CSV rows one by one, without pandas; returns items queued"""
+        queued = 0
+        for offset, item in enumerate(rows):
+            container_id = self.containers_created.get((item.get('HB.location') or '').strip())
+            if container_id:
+                queued += self.import_item(item, container_id, first_row_number + offset)
+        return queued
+    
+    def import_chunk(self, df: 'pd.DataFrame', first_row_number: int) -> int:
+        """Queue a cleaned CSV chunk, transforming it column-wise; returns items queued"""
+        if not self.user_id or not self.writer:
+            return 0
+        
+        import pandas as pd
+        from item_transform import build_item_documents, item_keys
+        
+        if 'HB.location' in df.columns:
+            locations = df['HB.location'].fillna('').str.strip()
+        else:
+            locations = pd.Series('', index=df.index)
+        container_ids = locations.map(self.containers_created)
+        keys = pd.Series(item_keys(df, first_row_number, HOMEBOX_ITEM_URL), index=df.index)
+        
+        # Rows without a container are skipped; rows finished by an earlier run too
+        to_import = container_ids.notna()
+        if self.resumed_items:
+            done = keys.isin(self.resumed_items)
+            self.items_skipped += int((to_import & done).sum())
+            to_import &= ~done
+        if not to_import.any():
+            return 0
+        
+        # Positions of the imported rows in the chunk, which row numbers count
+        positions = to_import.to_numpy().nonzero()[0].tolist()
+        df = df[to_import]
+        keys = keys[to_import].tolist()
+        container_ids = container_ids[to_import].tolist()
+        try:
+            with self.metrics.timer('csv.transform_chunk'):
+                documents = build_item_documents(df, container_ids, self.user_id,
+                                                 self.server_timestamp, self.tag_ids)
+        except Exception as e:
+            # Fall back to the row-by-row path, which reports the failing rows
+            print(f"⚠️  Column-wise transform failed ({e}), importing chunk row by row")
+            queued = 0
+            for position, container_id, item in zip(positions, container_ids, df.to_dict('records')):
+                queued += self.import_item(item, container_id, first_row_number + position)
+            return queued
+        
+        for key, item_data in zip(keys, documents):
+            self.queue_item(key, item_data)
+        return len(documents)
+    
+    def queue_item(self, key: str, item_data: Dict):
+        """Write an item document, or with --with-images hand it over to be written with its image"""
+        if self.images:
+            doc_id = self.document_id('item', key)
+            # Items already in Hearth keep the image they have; a sync never replaces it
+            if not (self.sync and doc_id in self.existing_items) and self.images.submit(key, doc_id, item_data):
+                return
+        self.write_item(key, item_data)
+    
+    def write_item(self, key: str, item_data: Dict):
+        """Queue an item document; in sync mode only if it differs from the one in Hearth"""
+        item_data[HASH_FIELD] = document_hash(item_data)
+        
+        # Deterministic document ID, so a rerun overwrites instead of duplicating
+        doc_id = self.document_id('item', key)
+        tag = ('item', item_data['name'], key)
+        with self._write_lock:
+            existing = self.existing_items.pop(doc_id, None) if self.sync else None
+            if existing is None:
+                image_bytes = len(item_data.get('imageUrl') or '')
+                if image_bytes:
+                    # Keep batches of documents with inline images under the commit size limit
+                    if self._pending_image_bytes + image_bytes > MAX_BATCH_BYTES:
+                        self.writer.flush()
+                        self._pending_image_bytes = 0
+                    self._pending_image_bytes += image_bytes
+                self.writer.set('items', doc_id, item_data, tag)
+                return
+            
+            changes = self.sync_changes(item_data, existing)
+            if changes:
+                self.writer.update('items', doc_id, changes, tag)
+            else:
+                self.items_unchanged += 1
+    
+    def sync_changes(self, document: Dict, existing: Dict) -> Dict:
+        """Field-level update turning existing into document; empty if nothing changed"""
+        if existing.get(HASH_FIELD) == document[HASH_FIELD]:
+            return {}
+        # Documents from before hashes were stored are compared field by field
+        changes = changed_fields(document, existing)
+        if not changes:
+            return {}
+        changes[HASH_FIELD] = document[HASH_FIELD]
+        changes['updatedAt'] = self.server_timestamp
+        return changes
+    
+    def load_existing(self, collection: str, fields: List[str]) -> Dict[str, Dict]:
+        """This user's documents in a collection, projected to fields, by document ID"""
+        query = self.db.collection(collection).where('userId', '==', self.user_id).select(fields)
+        with self.metrics.timer(f'firestore.load_{collection}'):
+            existing = {snapshot.id: snapshot.to_dict() for snapshot in query.stream()}
+        self.metrics.count('firestore.documents_read', len(existing))
+        return existing
+    
+    def delete_missing_items(self):
+        """Delete imported items whose rows are no longer in the export (sync mode)"""
+        # Only documents carrying an import hash came from an import; items
+        # added in Hearth itself are never touched
+        stale = {doc_id: data for doc_id, data in self.existing_items.items() if data.get(HASH_FIELD)}
+        if not stale:
+            return
+        if self.errors:
+            print(f"⚠️  Not deleting {len(stale)} items missing from the export because of the errors above")
+            return
+        if not self.delete_missing:
+            print(f"⚠️  Keeping {len(stale)} items that are no longer in the export")
+            return
+        
+        print(f"\n🗑️  Deleting {len(stale)} items no longer in the export...")
+        for doc_id, data in stale.items():
+            self.writer.delete('items', doc_id, ('deleted', data.get('name') or doc_id, doc_id))
+    
+    def handle_batch_result(self, batch_number: int, ops: List, error: Optional[Exception]):
+        """Record the outcome of a committed (or failed) write batch"""
+        items = [op for op in ops if op.tag and op.tag[0] == 'item']
+        containers = [op for op in ops if op.tag and op.tag[0] == 'container']
+        tags = [op for op in ops if op.tag and op.tag[0] == 'tag']
+        deleted = [op for op in ops if op.tag and op.tag[0] == 'deleted']
+        
+        if error is not None:
+            names = [op.tag[1] for op in ops if op.tag]
+            sample = ', '.join(f"'{name}'" for name in names[:3])
+            if len(names) > 3:
+                sample += f" ... (+{len(names) - 3} more)"
+            error_msg = (f"Batch {batch_number} failed ({len(containers)} containers, {len(tags)} tags, "
+                         f"{len(items) + len(deleted)} items: {sample}): {error}")
+            print(f"❌ {error_msg}")
+            self.errors.append(error_msg)
+            return
+        
+        if self.journal:
+            self.journal.mark_done('container', [(op.tag[1], op.doc_ref.id) for op in containers])
+            self.journal.mark_done('tag', [(op.tag[1], op.doc_ref.id) for op in tags])
+            self.journal.mark_done('item', [(op.tag[2], op.doc_ref.id) for op in items])
+        
+        quiet = self.writer.dry_run
+        for op in containers:
+            location = op.tag[1]
+            self.containers_created[location] = op.doc_ref.id
+            if not quiet:
+                action = 'Updated' if op.kind == 'update' else 'Created'
+                print(f"✅ {action} container: {location} (ID: {op.doc_ref.id})")
+        
+        if tags:
+            for op in tags:
+                self.tags_created[op.tag[1]] = op.doc_ref.id
+            updated = sum(op.kind == 'update' for op in tags)
+            self.tags_updated += updated
+            self.tags_new += len(tags) - updated
+            if not quiet:
+                progress = f"Created {self.tags_new} tags"
+                if self.tags_updated:
+                    progress += f", updated {self.tags_updated}"
+                print(f"🏷️  {progress}... (batch {batch_number})")
+        
+        if items:
+            self.items_imported += len(items)
+            updated = sum(op.kind == 'update' for op in items)
+            self.items_updated += updated
+            self.items_created += len(items) - updated
+            if not quiet:
+                print(f"📋 {self.log_prefix}Imported {self.items_imported} items... (batch {batch_number}, {len(ops)} writes)")
+        
+        if deleted:
+            self.items_deleted += len(deleted)
+            if not quiet:
+                print(f"🗑️  Deleted {self.items_deleted} items... (batch {batch_number})")
+    
     def build_notes(self, item: Dict) -> str:
         """Build notes field from HomeBox metadata"""
         notes_parts = []
@@ -310,44 +778,272 @@ class HomeBoxImporter:
         
         return '\n'.join(notes_parts) if notes_parts else None
     
-    def run_import(self, items: List[Dict]):
-        """Run the full import process"""
+    def firestore_sink(self) -> FirestoreSink:
+        """Batched, retried Firestore write pipeline"""
+        return FirestoreSink(
+            self.db, batch_size=self.batch_size, max_in_flight=self.commit_workers, metrics=self.metrics,
+            retry=RetryPolicy(self.retry_attempts, metrics=self.metrics, name='firestore')
+        )
+    
+    def import_items(self):
+        """Stream the CSV and queue its items chunk by chunk"""
+        # Full batches commit in the background while the next batch is being built
+        rows_read = 0
+        try:
+            if self.plain_csv():
+                for rows in self.iter_csv_chunks():
+                    self.import_rows(rows, rows_read + 1)
+                    rows_read += len(rows)
+            else:
+                for df in self.iter_csv_frames():
+                    self.import_chunk(df, rows_read + 1)
+                    rows_read += len(df)
+        except Exception as e:
+            error_msg = f"Error reading CSV during import: {e}"
+            print(f"❌ {error_msg}")
+            self.errors.append(error_msg)
+    
+    def worker_input(self) -> Tuple[str, Optional[str]]:
+        """
+        (file the import workers read, temporary file to remove afterwards).
+        Every worker reads the whole input and keeps its own locations, so a
+        large CSV is converted to Parquet here, once, rather than parsed by
+        each worker; reading the Parquet copy costs a fraction of parsing.
+        """
+        if columnar_input.columnar_format(self.csv_path) or self.plain_csv():
+            return self.csv_path, None
+        if not columnar_input.available():
+            print("⚠️  Every import process parses the whole CSV; install pyarrow to parse it once")
+            return self.csv_path, None
+        
+        if self.csv_cache:
+            # The analysis pass has usually written the cache already
+            if not columnar_input.cached_columns(self.csv_path):
+                for _ in self.iter_csv_frames():
+                    pass
+            cached_path = columnar_input.cached_columns(self.csv_path)
+            if cached_path:
+                return cached_path, None
+        
+        # --no-csv-cache: a temporary copy, removed after the import
+        fd, temp_path = tempfile.mkstemp(prefix='hearth-import-', suffix='.parquet')
+        os.close(fd)
+        converter = columnar_input.CsvConverter(self.csv_path, temp_path)
+        csv_cache, self.csv_cache = self.csv_cache, False
+        converted = False
+        try:
+            for df in self.iter_csv_frames():
+                converter.write(df)
+            converted = converter.commit()
+        finally:
+            self.csv_cache = csv_cache
+            converter.discard()
+            if not converted:
+                os.remove(temp_path)
+        return (temp_path, temp_path) if converted else (self.csv_path, None)
+    
+    def import_items_in_processes(self, analysis: Dict, processes: int,
+                                  db_factory: Optional[Callable] = None):
+        """Import the items with locations split across worker processes"""
+        locations = {location: count for location, count in analysis['locations'].items()
+                     if location in self.containers_created}
+        shards = shard_locations(locations, processes)
+        input_path, temp_path = self.worker_input()
+        try:
+            self._run_shards(analysis, shards, input_path, db_factory)
+        finally:
+            if temp_path:
+                os.remove(temp_path)
+    
+    def _run_shards(self, analysis: Dict, shards: List[List[str]], input_path: str,
+                    db_factory: Optional[Callable]):
+        print(f"\n📋 Importing {analysis['total_items']} items in {len(shards)} processes...")
+        
+        config = {
+            'csv_path': input_path, 'user_id': self.user_id, 'batch_size': self.batch_size,
+            'commit_workers': self.commit_workers, 'chunk_size': self.chunk_size,
+            'journal_path': self.journal_path, 'retry_attempts': self.retry_attempts,
+            'tag_ids': self.tag_ids, 'csv_cache': self.csv_cache
+        }
+        # Spawned, not forked: each worker starts its own Firebase app, and
+        # the gRPC client of this process must not be copied into a child
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as pool:
+            futures = []
+            for number, shard in enumerate(shards, 1):
+                shard_config = dict(config, shard=f"{number}/{len(shards)}",
+                                    containers={location: self.containers_created[location] for location in shard})
+                futures.append(pool.submit(import_shard, shard_config, db_factory))
+            
+            for number, future in enumerate(futures, 1):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error_msg = f"Import process {number}/{len(shards)} failed: {e}"
+                    print(f"❌ {error_msg}")
+                    self.errors.append(error_msg)
+                    continue
+                self.items_imported += result['items_imported']
+                self.items_skipped += result['items_skipped']
+                self.errors.extend(result['errors'])
+                self.metrics.merge(result['metrics'])
+    
+    def run_import(self, analysis: Optional[Dict] = None, processes: int = 1,
+                   db_factory: Optional[Callable] = None):
+        """
+        Run the full import process, streaming items from the CSV. With
+        processes > 1, containers and tags are still created here, once, and
+        the items are imported by that many worker processes, split by
+        location. db_factory builds each worker's database client instead
+        of Firebase (e.g. a FakeFirestore); it must be picklable.
+        """
         if not self.user_id:
             print("❌ User ID is required for import")
             return False
         
-        if not self.initialize_firebase():
+        if processes > 1 and (self.sync or self.sink is not None or self.images):
+            print("❌ Multi-process import only writes to Firestore and can't be combined with --sync or --with-images")
+            return False
+        
+        # A sync reads the current documents from Firestore, and images uploaded
+        # to Firebase Storage need the Firebase app too, whatever the output
+        image_store = self.images.image_importer.image_store if self.images else None
+        uploads_to_firebase = image_store is not None and image_store.needs_firebase
+        if (self.sink is None or self.sync or uploads_to_firebase) and not self.initialize_firebase():
             return False
         
-        analysis = self.analyze_data(items)
+        if analysis is None:
+            analysis = self.analyze_data()
         
         print(f"\n🚀 STARTING IMPORT")
         print("=" * 50)
         print(f"Total items: {analysis['total_items']}")
         print(f"Containers to create: {len(analysis['locations'])}")
+        print(f"Tags to create: {len(analysis['label_counts'])}")
         print(f"User ID: {self.user_id}")
         
-        # Create containers for each location
-        for location, location_items in analysis['locations'].items():
-            print(f"\n📦 Processing location: {location}")
+        self.writer = self.sink or self.firestore_sink()
+        self.writer.on_batch = self.handle_batch_result
+        print(f"Output: {self.writer.label}")
+        
+        self.tag_ids = {label: self.document_id('tag', label) for label in analysis['all_labels']}
+        
+        done_containers = {}
+        done_tags = {}
+        if self.sync:
+            # No journal needed: a rerun finds the writes that already landed
+            # by comparing with Firestore again
+            try:
+                self.existing_containers = self.load_existing('containers', CONTAINER_SYNC_FIELDS)
+                self.existing_tags = self.load_existing('tags', TAG_SYNC_FIELDS)
+                self.existing_items = self.load_existing('items', ITEM_SYNC_FIELDS)
+            except Exception as e:
+                print(f"❌ Failed to read existing documents: {e}")
+                self.writer.close()
+                return False
+            print(f"🔄 Syncing against {len(self.existing_containers)} containers, {len(self.existing_tags)} tags "
+                  f"and {len(self.existing_items)} items already in Hearth")
+        else:
+            self.journal = CheckpointJournal(self.journal_path, self.user_id)
+            done_containers = self.journal.completed('container')
+            done_tags = self.journal.completed('tag')
+            done_items = self.journal.completed('item')
+            self.resumed_items = frozenset(done_items)
+            if done_containers or done_tags or done_items:
+                print(f"⏩ Resuming from {self.journal_path}: {len(done_containers)} containers, "
+                      f"{len(done_tags)} tags and {len(done_items)} items already imported")
+        
+        try:
+            # Create all containers first so items are only written into
+            # containers that actually exist
+            print(f"\n📦 Creating {len(analysis['locations'])} containers...")
+            for location, items_count in analysis['locations'].items():
+                if location in done_containers:
+                    self.containers_created[location] = done_containers[location]
+                    continue
+                self.create_container(location, items_count)
+            
+            # One tag document per label, however many items carry it
+            print(f"\n🏷️  Creating {len(analysis['label_counts'])} tags...")
+            for label, usage_count in analysis['label_counts'].items():
+                if label in done_tags:
+                    self.tags_created[label] = done_tags[label]
+                    continue
+                self.create_tag(label, usage_count)
+            self.writer.drain()
+            
+            for location in analysis['locations']:
+                if location not in self.containers_created:
+                    print(f"❌ Skipping items in '{location}' due to container creation failure")
+            if analysis['unlocated_items']:
+                print(f"⚠️  Skipping {analysis['unlocated_items']} items without a location")
             
-            container_id = self.create_container(location, len(location_items))
-            if not container_id:
-                print(f"❌ Skipping items in '{location}' due to container creation failure")
-                continue
+            if self.images:
+                print("\n🖼️  Listing HomeBox items with images...")
+                try:
+                    homebox_images = self.images.load_homebox_images()
+                except Exception as e:
+                    error_msg = f"Failed to list HomeBox items, importing without images: {e}"
+                    print(f"❌ {error_msg}")
+                    self.errors.append(error_msg)
+                else:
+                    print(f"🖼️  {homebox_images} HomeBox items have an image; attaching them during the import")
+                    self.images.write = self.write_item
+                    self.images.start()
             
-            self.containers_created[location] = container_id
+            # Second streaming pass over the CSV for the items
+            if processes > 1:
+                self.import_items_in_processes(analysis, processes, db_factory)
+            else:
+                print(f"\n📋 Importing {analysis['total_items']} items...")
+                try:
+                    self.import_items()
+                finally:
+                    if self.images:
+                        # Items still waiting for their image are written before the writer closes
+                        self.images.close()
             
-            # Import items for this container
-            print(f"📋 Importing {len(location_items)} items...")
-            for item in location_items:
-                self.import_item(item, container_id)
+            if self.sync:
+                # Wait for every write first: a failed batch cancels the deletes
+                self.writer.drain()
+                self.delete_missing_items()
+        finally:
+            self.writer.close()
+            if self.journal:
+                self.journal.close()
         
         # Print summary
-        print(f"\n✅ IMPORT COMPLETE")
+        dry_run = self.writer.dry_run
+        print(f"\n✅ {'DRY RUN' if dry_run else 'IMPORT'} COMPLETE")
         print("=" * 50)
-        print(f"Containers created: {len(self.containers_created)}")
-        print(f"Items imported: {self.items_imported}")
+        if self.sync:
+            print(f"Containers: {len(self.containers_created)}")
+            print(f"Tags {'to create' if dry_run else 'created'}: {self.tags_new}")
+            print(f"Tags {'to update' if dry_run else 'updated'}: {self.tags_updated}")
+            print(f"Tags unchanged: {self.tags_unchanged}")
+            print(f"Items {'to create' if dry_run else 'created'}: {self.items_created}")
+            print(f"Items {'to update' if dry_run else 'updated'}: {self.items_updated}")
+            print(f"Items {'to delete' if dry_run else 'deleted'}: {self.items_deleted}")
+            print(f"Items unchanged: {self.items_unchanged}")
+        else:
+            print(f"Containers {'to create' if dry_run else 'created'}: {len(self.containers_created)}")
+            print(f"Tags {'to create' if dry_run else 'created'}: {len(self.tags_created)}")
+            print(f"Items {'to import' if dry_run else 'imported'}: {self.items_imported}")
+        if self.items_skipped:
+            print(f"Items skipped (already imported): {self.items_skipped}")
+        if self.images:
+            print(f"Images attached: {self.images.images_attached}")
+            if self.images.images_missing:
+                print(f"Items written without their image (download or compression failed): {self.images.images_missing}")
+            self.errors.extend(f"Image: {error}" for error in self.images.errors)
+        # Counted in the metrics, which include those of worker processes
+        retries = int(self.metrics.counter('firestore.retries'))
+        limiter = getattr(self.writer, 'limiter', None)
+        if retries and processes > 1:
+            print(f"Commits retried: {retries}")
+        elif retries and limiter:
+            print(f"Commits retried: {retries} (concurrency backed off "
+                  f"{limiter.decreases} times, down to {int(limiter.lowest_limit)})")
         
         if self.errors:
             print(f"\n⚠️  ERRORS ({len(self.errors)}):")
@@ -358,13 +1054,75 @@ class HomeBoxImporter:
         
         return len(self.errors) == 0
 
+def shard_locations(locations: Dict[str, int], count: int) -> List[List[str]]:
+    """Split locations into at most count groups with similar item totals"""
+    shards = [[] for _ in range(max(1, min(count, len(locations))))]
+    totals = [0] * len(shards)
+    # Largest first, each into the emptiest group so far
+    for location, items_count in sorted(locations.items(), key=lambda entry: -entry[1]):
+        index = totals.index(min(totals))
+        shards[index].append(location)
+        totals[index] += items_count
+    return shards
+
+def import_shard(config: Dict, db_factory: Optional[Callable] = None) -> Dict:
+    """Worker process of a multi-process import: the items of some locations"""
+    importer = HomeBoxImporter(config['csv_path'], config['user_id'], batch_size=config['batch_size'],
+                               commit_workers=config['commit_workers'], chunk_size=config['chunk_size'],
+                               journal_path=config['journal_path'], retry_attempts=config['retry_attempts'],
+                               csv_cache=config['csv_cache'])
+    importer.log_prefix = f"[{config['shard']}] "
+    if db_factory is not None:
+        importer.db = db_factory()
+    if not importer.initialize_firebase():
+        raise RuntimeError('Firebase initialization failed')
+    
+    # Rows of locations outside this shard find no container and are skipped
+    importer.containers_created = dict(config['containers'])
+    importer.tag_ids = config['tag_ids']
+    importer.writer = importer.firestore_sink()
+    importer.writer.on_batch = importer.handle_batch_result
+    importer.journal = CheckpointJournal(importer.journal_path, importer.user_id)
+    importer.resumed_items = frozenset(importer.journal.completed('item'))
+    try:
+        importer.import_items()
+    finally:
+        importer.writer.close()
+        importer.journal.close()
+    
+    return {
+        'items_imported': importer.items_imported,
+        'items_skipped': importer.items_skipped,
+        'errors': [f"[{config['shard']}] {error}" for error in importer.errors],
+        'metrics': importer.metrics
+    }
+
 def main():
     parser = argparse.ArgumentParser(description='Import HomeBox CSV export to Hearth')
-    parser.add_argument('--csv', required=True, help='Path to HomeBox CSV export file')
+    parser.add_argument('--csv', required=True, help='Path to HomeBox CSV export file, or a Parquet/Arrow file with its columns')
+    parser.add_argument('--no-csv-cache', action='store_true', help=f'Always parse the CSV instead of reusing its Parquet copy (<csv>{columnar_input.CACHE_SUFFIX})')
     parser.add_argument('--preview', action='store_true', help='Preview import without actually importing')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be imported without actually importing (no Firebase required)')
     parser.add_argument('--import', action='store_true', dest='do_import', help='Actually perform the import')
+    parser.add_argument('--stage', metavar='JSONL', help='Write the Hearth documents to a JSONL file instead of Firestore; load it later with load_staged.py')
+    parser.add_argument('--sync', action='store_true', help='Only write what changed since the last import: create new items, update changed fields, delete items no longer in the export')
+    parser.add_argument('--keep-missing', action='store_true', help='With --sync, keep imported items that are no longer in the export')
     parser.add_argument('--user-id', help='Hearth user ID to import items for (required for --import)')
+    parser.add_argument('--batch-size', type=int, default=FIRESTORE_BATCH_LIMIT, help=f'Writes per Firestore batch commit (max {FIRESTORE_BATCH_LIMIT})')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help=f'CSV rows read per chunk; bounds memory use (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--journal', help='Progress journal path for resuming (default: <csv>.journal.sqlite, or <jsonl>.journal.sqlite with --stage)')
+    parser.add_argument('--restart', action='store_true', help='Ignore previous progress in the journal and import everything again')
+    parser.add_argument('--processes', type=int, default=1, help='Import items in this many processes, split by location; each has its own Firebase connection and --commit-workers commits (default: 1)')
+    parser.add_argument('--commit-workers', type=int, default=4, help='Most batch commits in flight at once; backs off automatically when Firestore throttles (default: 4)')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_RETRY_ATTEMPTS - 1, help=f'Retries of a batch commit after a transient Firestore error (default: {DEFAULT_RETRY_ATTEMPTS - 1})')
+    parser.add_argument('--metrics-json', help='Write per-stage timings and counters to this JSON file')
+    parser.add_argument('--metrics-interval', type=float, default=0, help='Print a live metrics summary every N seconds during the import (default: off)')
+    parser.add_argument('--with-images', action='store_true', help='Download each item\'s HomeBox image during the import and write the item once, with its image (needs --homebox-url and --token)')
+    parser.add_argument('--homebox-url', help='HomeBox base URL for --with-images (e.g., http://YOUR_HOMEBOX_IP:3100)')
+    parser.add_argument('--token', help='HomeBox API token for --with-images')
+    parser.add_argument('--storage-bucket', help='With --with-images, upload images and thumbnails to this Firebase Storage bucket and store only their URLs')
+    parser.add_argument('--storage-dir', help='Like --storage-bucket, but write the files to this directory (a local stand-in bucket)')
+    parser.add_argument('--storage-base-url', help='URL the --storage-dir files are served from (default: file:// URLs)')
     
     args = parser.parse_args()
     
@@ -372,57 +1130,107 @@ def main():
         print(f"❌ CSV file not found: {args.csv}")
         sys.exit(1)
     
-    if args.do_import and not args.user_id:
-        print("❌ --user-id is required when using --import")
+    if args.processes > 1 and (args.stage or args.sync or args.dry_run):
+        print("❌ --processes only works with --import, without --sync")
+        sys.exit(1)
+    
+    if args.with_images and not (args.homebox_url and args.token):
+        print("❌ --with-images needs --homebox-url and --token")
+        sys.exit(1)
+    
+    if args.with_images and args.processes > 1:
+        print("❌ --with-images can't be combined with --processes")
+        sys.exit(1)
+    
+    if args.storage_bucket and args.storage_dir:
+        print("❌ Choose either --storage-bucket or --storage-dir")
         sys.exit(1)
     
+    if (args.do_import or args.stage or args.sync) and not args.user_id:
+        print("❌ --user-id is required when using --import, --stage or --sync")
+        sys.exit(1)
+    
+    # Staging keeps its own journal, so a later Firestore import isn't skipped
+    journal_path = args.journal
+    if args.stage and not journal_path:
+        journal_path = f"{args.stage}.journal.sqlite"
+    
     # Create importer
-    importer = HomeBoxImporter(args.csv, args.user_id)
+    importer = HomeBoxImporter(args.csv, args.user_id, batch_size=args.batch_size,
+                               commit_workers=args.commit_workers, chunk_size=args.chunk_size,
+                               journal_path=journal_path, retry_attempts=args.max_retries + 1,
+                               sync=args.sync, delete_missing=not args.keep_missing,
+                               csv_cache=not args.no_csv_cache)
     
-    # Load CSV data
-    items = importer.load_csv_data()
-    if not items:
+    if args.restart and args.user_id and os.path.exists(importer.journal_path):
+        journal = CheckpointJournal(importer.journal_path, args.user_id)
+        journal.reset()
+        journal.close()
+        print(f"🔄 Cleared import progress in {importer.journal_path}")
+    
+    # Scan the CSV once (streaming) to find locations and labels; a preview
+    # of a CSV reads it without pandas
+    chunks = None
+    if args.preview and not columnar_input.columnar_format(args.csv):
+        chunks = importer.iter_plain_csv_chunks()
+    analysis = importer.analyze_data(chunks)
+    if not analysis['total_items']:
         print("❌ No items loaded from CSV")
         sys.exit(1)
     
     if args.preview:
-        importer.preview_import(items)
+        importer.preview_import(analysis)
     elif args.dry_run:
-        # Dry run mode - show what would be imported without Firebase
+        # Dry run mode - the real import pipeline, writing into a sink that
+        # only collects what would be written (no journal; no Firebase
+        # unless --sync has to compare with the current documents)
         print("🔍 DRY RUN MODE - Showing what would be imported")
         print("=" * 50)
-        
-        analysis = importer.analyze_data(items)
-        
-        print(f"Total items: {analysis['total_items']}")
-        print(f"User ID: {args.user_id}")
         print("⚠️  NO DATA WILL BE WRITTEN - THIS IS A SIMULATION")
         
-        for location, location_items in analysis['locations'].items():
-            print(f"\n📦 Would create container: '{location}'")
-            print(f"📋 Would import {len(location_items)} items:")
-            
-            for i, item in enumerate(location_items[:5]):  # Show first 5 items
-                name = item.get('HB.name', 'Unnamed')
-                price = item.get('HB.purchase_price', '0')
-                labels = item.get('HB.labels', '')
-                
-                print(f"  • {name}")
-                if price and price != '0':
-                    print(f"    Price: ${price}")
-                if labels:
-                    print(f"    Tags: {labels}")
+        sink = DryRunSink(samples_per_container=SAMPLE_ITEMS_PER_LOCATION)
+        importer.sink = sink
+        importer.user_id = args.user_id or DRY_RUN_USER_ID
+        importer.journal_path = ':memory:'
+        importer.run_import(analysis)
+        sink.print_summary()
+        print("\nTo actually import, use --import flag with Firebase authentication")
+    elif args.do_import or args.stage:
+        if args.stage:
+            importer.sink = JsonlSink(args.stage, batch_size=args.batch_size, append=not args.restart)
+        if args.with_images:
+            # Only needed here: the image pipeline brings in Pillow and aiohttp
+            from homebox_image_importer import HomeBoxImageImporter
+            from image_attach import ItemImageAttacher
+            from image_cache import ImageCache
+            from image_storage import FirebaseImageStore, LocalImageStore
             
-            if len(location_items) > 5:
-                print(f"  ... and {len(location_items) - 5} more items")
-        
-        print(f"\n✅ DRY RUN COMPLETE")
-        print("To actually import, use --import flag with Firebase authentication")
-    elif args.do_import:
-        success = importer.run_import(items)
+            image_store = None
+            if args.storage_bucket:
+                image_store = FirebaseImageStore(args.storage_bucket)
+            elif args.storage_dir:
+                image_store = LocalImageStore(args.storage_dir, args.storage_base_url)
+            image_importer = HomeBoxImageImporter(args.homebox_url, args.token, args.user_id,
+                                                  metrics=importer.metrics, image_cache=ImageCache(),
+                                                  retry_attempts=args.max_retries + 1,
+                                                  image_store=image_store)
+            importer.images = ItemImageAttacher(image_importer)
+        if args.metrics_interval > 0:
+            importer.metrics.start_live_summary(args.metrics_interval)
+        try:
+            success = importer.run_import(analysis, processes=args.processes)
+        finally:
+            importer.metrics.stop_live_summary()
+        if args.stage:
+            print(f"💾 Staged {importer.sink.lines_written} writes in {args.stage}; "
+                  f"load them with: python load_staged.py --input {args.stage}")
+        importer.metrics.print_summary()
+        if args.metrics_json:
+            importer.metrics.write_json(args.metrics_json)
+            print(f"💾 Metrics written to {args.metrics_json}")
         sys.exit(0 if success else 1)
     else:
-        print("❌ Use --preview, --dry-run, or --import")
+        print("❌ Use --preview, --dry-run, --import or --stage")
         sys.exit(1)
 
 if __name__ == '__main__':
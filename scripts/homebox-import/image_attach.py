@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Images attached to items during the CSV import (homebox_import.py --with-images)
+
+Importing images separately means a second pass: homebox_image_importer.py
+reads every item back and writes each one again to set its image. With
+--with-images, the CSV import lists HomeBox once to find the items that have
+an image and holds back those items' documents. Each image is downloaded and
+compressed by the image importer's pipeline while the import goes on, and the
+document is then written once, with its image already set.
+
+Items are linked to HomeBox items by the homeboxId / homeboxAssetId fields
+the import stores. Items whose image can't be downloaded or compressed are
+written without one when the import finishes.
+"""
+
+import queue
+import threading
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from hearth_item_cache import HearthItem
+from homebox_image_importer import HomeBoxImageImporter
+
+_STOP = object()
+
+
+class ItemImageAttacher:
+    def __init__(self, image_importer: HomeBoxImageImporter,
+                 write: Optional[Callable[[str, Dict], None]] = None):
+        self.image_importer = image_importer
+        # write(key, document) queues a finished item document
+        self.write = write
+        # HomeBox items with an image, by item ID and by asset ID
+        self.images_by_id: Dict[str, Dict] = {}
+        self.images_by_asset_id: Dict[str, Dict] = {}
+        # Documents waiting for their image, by document ID
+        self._pending: Dict[str, Tuple[str, Dict]] = {}
+        self._lock = threading.Lock()
+        self._tasks = queue.Queue(maxsize=image_importer.download_workers * 2)
+        self._thread = None
+
+        # Statistics
+        self.images_attached = 0
+        self.images_missing = 0
+
+    def load_homebox_images(self) -> int:
+        """List HomeBox once and remember the items that have an image"""
+        for item in self.image_importer.iter_homebox_items():
+            if not item.get('imageId') or not item.get('id'):
+                continue
+            homebox_item = {'id': item['id'], 'imageId': item['imageId'], 'name': item.get('name', '')}
+            self.images_by_id[item['id']] = homebox_item
+            asset_id = item.get('assetId')
+            if asset_id and asset_id.strip('0-'):
+                self.images_by_asset_id[asset_id] = homebox_item
+        return len(self.images_by_id)
+
+    def homebox_item(self, document: Dict) -> Optional[Dict]:
+        homebox_item = self.images_by_id.get(document.get('homeboxId') or '')
+        if homebox_item is None:
+            homebox_item = self.images_by_asset_id.get(document.get('homeboxAssetId') or '')
+        return homebox_item
+
+    def start(self):
+        """Start the download → compress pipeline on a background thread"""
+        def tasks() -> Iterator:
+            while True:
+                task = self._tasks.get()
+                if task is _STOP:
+                    return
+                yield task
+
+        self._thread = threading.Thread(target=self.image_importer.run_pipeline, args=(tasks(),),
+                                        kwargs={'feed': self._feed, 'write': self._attach},
+                                        name='item-images', daemon=True)
+        self._thread.start()
+
+    def submit(self, key: str, document_id: str, document: Dict) -> bool:
+        """
+        Hold back an item document until its image is ready. Returns False,
+        leaving the document to the caller, when the item has no image.
+        """
+        homebox_item = self.homebox_item(document)
+        if homebox_item is None or self._thread is None:
+            return False
+        with self._lock:
+            self._pending[document_id] = (key, document)
+        # Blocks while the pipeline is behind, which paces the CSV import
+        self._tasks.put((homebox_item, HearthItem(document_id, document.get('name', ''), False)))
+        return True
+
+    def _feed(self, tasks: Iterator, download_queue: queue.Queue):
+        for task in tasks:
+            download_queue.put(task)
+
+    def _attach(self, task):
+        homebox_item, hearth_item, data_url = task
+        with self._lock:
+            pending = self._pending.pop(hearth_item.id, None)
+        if pending is None:
+            return None
+        key, document = pending
+        try:
+            document.update(self.image_importer.image_update(hearth_item, data_url))
+        except Exception:
+            # e.g. a failed upload: the item goes in without its image
+            with self._lock:
+                self._pending[hearth_item.id] = pending
+            raise
+        self.write(key, document)
+        with self._lock:
+            self.images_attached += 1
+        return None
+
+    def close(self):
+        """Finish every image, then write the items whose image failed without one"""
+        if self._thread is None:
+            return
+        self._tasks.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for key, document in pending.values():
+            self.images_missing += 1
+            self.write(key, document)
+
+    @property
+    def errors(self):
+        return self.image_importer.errors
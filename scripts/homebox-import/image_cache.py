@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Content-addressed image cache for the HomeBox image importer.
+
+Raw attachment downloads are stored once per SHA-256 of their bytes, and
+HomeBox item/attachment IDs map onto those hashes. Compressed data URLs are
+stored per content hash and compression settings, so a repeat run skips both
+the download and Pillow for images that haven't changed. The cache is kept
+under a size limit by evicting the least recently used files.
+
+Layout:
+    <cache dir>/index.sqlite                     attachment → hash map, file sizes and last use
+    <cache dir>/objects/ab/<hash>.raw            downloaded bytes
+    <cache dir>/objects/ab/<hash>.<settings>.url compressed data URL
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DEFAULT_CACHE_DIR = '.homebox_image_cache'
+DEFAULT_CACHE_SIZE_MB = 2048
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ImageCache:
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_SIZE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS attachments (
+                item_id TEXT NOT NULL,
+                attachment_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                PRIMARY KEY (item_id, attachment_id)
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                name TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_last_used ON files (last_used);
+        """)
+        self._conn.commit()
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM files').fetchone()[0]
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, 'objects', name[:2], name)
+
+    def _read(self, name: str) -> Optional[bytes]:
+        """Read a cached file and mark it as recently used"""
+        try:
+            with open(self._path(name), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(name)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._conn.execute('UPDATE files SET last_used = ? WHERE name = ?', (time.time(), name))
+            self._conn.commit()
+            self.hits += 1
+        return data
+
+    def _write(self, name: str, data: bytes):
+        """Store a file atomically, then evict old files if over the size limit"""
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            previous = self._conn.execute('SELECT size FROM files WHERE name = ?', (name,)).fetchone()
+            self._total_bytes += len(data) - (previous[0] if previous else 0)
+            self._conn.execute('INSERT OR REPLACE INTO files (name, size, last_used) VALUES (?, ?, ?)',
+                               (name, len(data), time.time()))
+            self._evict()
+            self._conn.commit()
+
+    def _forget(self, name: str):
+        row = self._conn.execute('SELECT size FROM files WHERE name = ?', (name,)).fetchone()
+        if row:
+            self._total_bytes -= row[0]
+            self._conn.execute('DELETE FROM files WHERE name = ?', (name,))
+            self._conn.commit()
+
+    def _evict(self):
+        """Delete least recently used files until the cache fits its size limit"""
+        while self._total_bytes > self.max_bytes:
+            oldest = self._conn.execute('SELECT name, size FROM files ORDER BY last_used LIMIT 1').fetchone()
+            if not oldest:
+                break
+            name, size = oldest
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+            self._conn.execute('DELETE FROM files WHERE name = ?', (name,))
+            self._total_bytes -= size
+
+    def attachment_hash(self, item_id: str, attachment_id: str) -> Optional[str]:
+        """Content hash of a previously downloaded attachment"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT content_hash FROM attachments WHERE item_id = ? AND attachment_id = ?',
+                (item_id, attachment_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_raw(self, item_id: str, attachment_id: str) -> Optional[bytes]:
+        """Downloaded bytes of an attachment, or None if not cached"""
+        digest = self.attachment_hash(item_id, attachment_id)
+        if not digest:
+            with self._lock:
+                self.misses += 1
+            return None
+        return self._read(f"{digest}.raw")
+
+    def put_raw(self, item_id: str, attachment_id: str, data: bytes) -> str:
+        """Store downloaded bytes and return their content hash"""
+        digest = content_hash(data)
+        if not os.path.exists(self._path(f"{digest}.raw")):
+            self._write(f"{digest}.raw", data)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO attachments (item_id, attachment_id, content_hash) VALUES (?, ?, ?)',
+                (item_id, attachment_id, digest)
+            )
+            self._conn.commit()
+        return digest
+
+    def get_data_url(self, digest: str, settings: str) -> Optional[str]:
+        """Compressed data URL for image content, or None if not cached"""
+        data = self._read(f"{digest}.{settings}.url")
+        return data.decode('ascii') if data is not None else None
+
+    def has_data_url(self, digest: str, settings: str) -> bool:
+        return os.path.exists(self._path(f"{digest}.{settings}.url"))
+
+    def has_raw(self, digest: str) -> bool:
+        return os.path.exists(self._path(f"{digest}.raw"))
+
+    def put_data_url(self, digest: str, settings: str, data_url: str):
+        self._write(f"{digest}.{settings}.url", data_url.encode('ascii'))
+
+    @property
+    def size_bytes(self) -> int:
+        return self._total_bytes
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
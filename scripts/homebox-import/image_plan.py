@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Image import plans for the HomeBox image importer
+
+`homebox_image_importer.py --plan plan.json` matches HomeBox items to Hearth
+items, drops those that already have an image, and looks up each remaining
+attachment's size and type with a HEAD request (no download). The resulting
+work list, with estimated bytes and time, is written as JSON.
+
+`--from-plan plan.json` then imports exactly those images, without listing
+HomeBox or loading the Hearth items again. Images imported since the plan was
+made (per the journal) are skipped, so an interrupted run can be resumed with
+the same plan, and a fresh --plan only lists items that still need an image.
+
+Plan format:
+    {"version": 1, "userId": ..., "homeboxUrl": ..., "createdAt": ...,
+     "summary": {...}, "items": [{"homeboxId", "imageId", "name", "hearthId",
+     "hearthName", "match", "bytes", "contentType", "cached"}, ...]}
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+PLAN_VERSION = 1
+
+# Rough rates for the time estimate; the stages overlap, so the slowest one
+# sets the pace
+ESTIMATED_DOWNLOAD_BYTES_PER_SECOND = 20 * 1024 * 1024
+ESTIMATED_COMPRESS_SECONDS = 0.5  # per image and compress worker
+ESTIMATED_WRITE_SECONDS = 0.15  # per image and write worker
+
+# Assumed size of attachments the server didn't report one for
+ESTIMATED_IMAGE_BYTES = 2 * 1024 * 1024
+
+# PlanEntry.cached values: what the image cache already holds
+CACHED_DATA_URL = 'compressed'
+CACHED_DOWNLOAD = 'downloaded'
+
+
+class PlanEntry(NamedTuple):
+    homebox_id: str
+    image_id: str
+    name: str
+    hearth_id: str
+    hearth_name: str
+    match: str  # 'id', 'exact' or 'fuzzy'
+    bytes: Optional[int] = None
+    content_type: Optional[str] = None
+    cached: Optional[str] = None
+
+    def to_json(self) -> Dict:
+        return {
+            'homeboxId': self.homebox_id, 'imageId': self.image_id, 'name': self.name,
+            'hearthId': self.hearth_id, 'hearthName': self.hearth_name, 'match': self.match,
+            'bytes': self.bytes, 'contentType': self.content_type, 'cached': self.cached
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'PlanEntry':
+        return cls(data['homeboxId'], data['imageId'], data.get('name', ''), data['hearthId'],
+                   data.get('hearthName', ''), data.get('match', 'exact'), data.get('bytes'),
+                   data.get('contentType'), data.get('cached'))
+
+
+def estimate_plan(entries: List[PlanEntry], compress_workers: int, write_workers: int) -> Dict:
+    """Totals and a rough duration for importing the planned images"""
+    downloads = [entry for entry in entries if not entry.cached]
+    known_sizes = [entry.bytes for entry in downloads if entry.bytes is not None]
+    # Unknown sizes are assumed to be like the known ones
+    average = sum(known_sizes) / len(known_sizes) if known_sizes else ESTIMATED_IMAGE_BYTES
+    download_bytes = int(sum(known_sizes) + average * (len(downloads) - len(known_sizes)))
+    compressions = sum(1 for entry in entries if entry.cached != CACHED_DATA_URL)
+
+    download_seconds = download_bytes / ESTIMATED_DOWNLOAD_BYTES_PER_SECOND
+    compress_seconds = compressions * ESTIMATED_COMPRESS_SECONDS / max(1, compress_workers)
+    write_seconds = len(entries) * ESTIMATED_WRITE_SECONDS / max(1, write_workers)
+    return {
+        'images': len(entries),
+        'downloads': len(downloads),
+        'downloadBytes': download_bytes,
+        'unknownSizes': len(downloads) - len(known_sizes),
+        'compressions': compressions,
+        'fuzzyMatches': sum(1 for entry in entries if entry.match == 'fuzzy'),
+        'estimatedSeconds': round(max(download_seconds, compress_seconds, write_seconds), 1)
+    }
+
+
+def write_plan(path: str, user_id: str, homebox_url: str, entries: List[PlanEntry], summary: Dict):
+    plan = {
+        'version': PLAN_VERSION,
+        'userId': user_id,
+        'homeboxUrl': homebox_url,
+        'createdAt': datetime.now(timezone.utc).isoformat(),
+        'summary': summary,
+        'items': [entry.to_json() for entry in entries]
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=1)
+
+
+def read_plan(path: str) -> Tuple[Dict, List[PlanEntry]]:
+    """(plan without its items, entries); raises ValueError for an unsupported plan"""
+    with open(path, encoding='utf-8') as f:
+        plan = json.load(f)
+    if plan.get('version') != PLAN_VERSION:
+        raise ValueError(f"Unsupported plan version {plan.get('version')!r} in {path}")
+    entries = [PlanEntry.from_json(item) for item in plan.pop('items', [])]
+    return plan, entries
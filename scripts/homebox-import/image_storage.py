@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Object storage for imported images
+
+By default the image importer writes each image into its item document as a
+data URL of up to 800KB, close to Firestore's 1MB document limit, and every
+item list read in Hearth pulls the images along. With a store, the compressed
+image is uploaded instead, together with a small list thumbnail, and the item
+document only holds their URLs plus a tiny inline placeholder:
+
+    imageUrl          detail-size image (max 1024px), as before
+    thumbnailUrl      list thumbnail (max 256px)
+    imagePlaceholder  ~16px data URL to show while the thumbnail loads
+
+- FirebaseImageStore uploads to a Firebase Storage bucket and returns
+  download-token URLs, which load in an <img> without signing in
+- LocalImageStore writes into a directory, as a stand-in bucket for tests
+  and benchmarks
+
+Objects are named after their content, so a changed image gets a new URL and
+the old one can be cached forever.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+from urllib.parse import quote
+
+# Cached uploads never change: their names include a content hash
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+EXTENSIONS = {'image/webp': 'webp', 'image/jpeg': 'jpg', 'image/png': 'png'}
+
+
+class ImageVariants(NamedTuple):
+    """The encoded sizes of one image, made from a single decode"""
+    detail: bytes
+    detail_type: str
+    thumbnail: bytes
+    thumbnail_type: str
+    placeholder: str  # data URL
+
+    def encode(self) -> str:
+        """ASCII form, so variants are cached and passed around like data URLs"""
+        return json.dumps({
+            'detail': base64.b64encode(self.detail).decode('ascii'), 'detailType': self.detail_type,
+            'thumbnail': base64.b64encode(self.thumbnail).decode('ascii'), 'thumbnailType': self.thumbnail_type,
+            'placeholder': self.placeholder
+        })
+
+    @classmethod
+    def decode(cls, encoded: str) -> 'ImageVariants':
+        data = json.loads(encoded)
+        return cls(base64.b64decode(data['detail']), data['detailType'],
+                   base64.b64decode(data['thumbnail']), data['thumbnailType'], data['placeholder'])
+
+
+def object_path(user_id: str, item_id: str, variant: str, data: bytes, content_type: str) -> str:
+    digest = hashlib.sha1(data).hexdigest()[:12]
+    return f"items/{user_id}/{item_id}/{variant}-{digest}.{EXTENSIONS.get(content_type, 'bin')}"
+
+
+class ImageStore(ABC):
+    """Destination for image files; upload() returns the URL to store in the item"""
+
+    label = 'store'
+    # Whether uploads go through the Firebase app the importer initializes
+    needs_firebase = False
+
+    @abstractmethod
+    def upload(self, path: str, data: bytes, content_type: str) -> str:
+        """Store data at path and return its URL"""
+
+
+class FirebaseImageStore(ImageStore):
+    needs_firebase = True
+
+    def __init__(self, bucket_name: str):
+        self.bucket_name = bucket_name
+        self.label = f"gs://{bucket_name}"
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    @property
+    def bucket(self):
+        # Resolved on first use, after the importer has initialized Firebase
+        with self._lock:
+            if self._bucket is None:
+                from firebase_admin import storage
+                self._bucket = storage.bucket(self.bucket_name)
+            return self._bucket
+
+    def upload(self, path: str, data: bytes, content_type: str) -> str:
+        blob = self.bucket.blob(path)
+        # The token is what Firebase's getDownloadURL() hands out
+        token = str(uuid.uuid4())
+        blob.metadata = {'firebaseStorageDownloadTokens': token}
+        blob.cache_control = CACHE_CONTROL
+        blob.upload_from_string(data, content_type=content_type)
+        return (f"https://firebasestorage.googleapis.com/v0/b/{self.bucket_name}/o/"
+                f"{quote(path, safe='')}?alt=media&token={token}")
+
+
+class LocalImageStore(ImageStore):
+    """Writes objects under a directory; URLs use base_url, or file:// without one"""
+
+    def __init__(self, directory: str, base_url: Optional[str] = None):
+        self.directory = directory
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.label = directory
+        self.objects_written = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def upload(self, path: str, data: bytes, content_type: str) -> str:
+        full_path = os.path.join(self.directory, *path.split('/'))
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            self.objects_written += 1
+            self.bytes_written += len(data)
+        if self.base_url:
+            return f"{self.base_url}/{path}"
+        return 'file://' + os.path.abspath(full_path)
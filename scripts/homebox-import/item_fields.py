@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+HomeBox CSV fields: the columns the import reads and the scalar parsers for
+their values.
+
+Kept free of pandas so the row-wise import code and --preview can use them
+without loading it; item_transform.py builds its column versions on top.
+"""
+
+import re
+from datetime import datetime
+from typing import Any, List, Optional
+
+# HomeBox item links in HB.url end in /item/<item id>
+HOMEBOX_ITEM_URL = re.compile(r'/item/([0-9A-Za-z-]+)/?$')
+
+# Formats tried by the scalar parser, in order
+DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%m/%d/%Y']
+
+# Placeholder dates in HomeBox exports that mean "no date"
+DATE_SENTINELS = {'0001-02-16', '0001-03-20'}
+
+# Free-text columns copied onto the document (document field → CSV column)
+TEXT_FIELDS = [
+    ('manufacturer', 'HB.manufacturer'),
+    ('model', 'HB.model_number'),
+    ('serialNumber', 'HB.serial_number'),
+    ('warranty', 'HB.warranty_details'),
+    ('brand', 'HB.manufacturer'),  # Use manufacturer as brand
+]
+
+# Every CSV column the import reads; the rest of the export is never parsed
+IMPORT_COLUMNS = [
+    'HB.name', 'HB.description', 'HB.location', 'HB.labels', 'HB.url', 'HB.import_ref',
+    'HB.asset_id', 'HB.manufacturer', 'HB.model_number', 'HB.serial_number',
+    'HB.warranty_details', 'HB.warranty_expires', 'HB.purchase_price', 'HB.purchase_time',
+    'HB.purchase_from', 'HB.sold_price', 'HB.sold_time', 'HB.sold_to', 'HB.notes',
+]
+
+
+def parse_date_value(date_str: Any) -> Optional[datetime]:
+    """Parse one HomeBox date (see HomeBoxImporter.parse_date)"""
+    if not date_str or str(date_str).strip() == '' or date_str in DATE_SENTINELS:
+        return None
+
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(date_str).strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_price_value(value: Any) -> Optional[float]:
+    """Parse one HomeBox price; empty and "0" mean no price"""
+    try:
+        price_str = str(value).strip()
+        if price_str and price_str != '0':
+            return float(price_str)
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+def parse_labels_value(labels_str: Any) -> List[str]:
+    """Split one HomeBox label string on semicolons"""
+    if not labels_str:
+        return []
+    return [label.strip() for label in str(labels_str).split(';') if label.strip()]
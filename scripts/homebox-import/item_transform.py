@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Column-wise transformation of HomeBox CSV chunks into Hearth item documents.
+
+Produces exactly the documents HomeBoxImporter.build_item_document builds
+row by row, but works a column at a time:
+
+- Prices are converted with one C-level float cast per column, falling back
+  to per-value parsing only for chunks holding unparseable text.
+- Dates are parsed once per distinct value. The format is inferred from the
+  column's first parseable value and the distinct values are parsed with it
+  in one pandas call; anything that format doesn't cover goes through the
+  scalar parser.
+- Labels are split once per distinct label string.
+- Notes are assembled by concatenating whole columns of note lines.
+"""
+
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from item_fields import (DATE_FORMATS, DATE_SENTINELS, HOMEBOX_ITEM_URL, TEXT_FIELDS,
+                         parse_date_value, parse_labels_value, parse_price_value)
+
+
+def column(df: pd.DataFrame, name: str) -> pd.Series:
+    """A cleaned column, or all None when the export doesn't have it"""
+    if name in df.columns:
+        return df[name]
+    # Built from a list: Series(None, dtype=object) holds NaN on pandas 2+
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+
+def present(values: pd.Series) -> pd.Series:
+    """Mask of cells holding a non-empty string (truthy in the row-wise code)"""
+    return values.notna() & (values != '')
+
+
+def text_values(values: pd.Series) -> pd.Series:
+    """str(value).strip() or None, as the row-wise code computes it"""
+    return values.fillna('None').where(lambda text: text != '', None)
+
+
+def parse_prices(values: pd.Series) -> List[Optional[float]]:
+    """Column version of parse_price_value"""
+    result: List[Optional[float]] = [None] * len(values)
+    mask = (present(values) & (values != '0') & (values != 'None')).to_numpy()
+    if not mask.any():
+        return result
+
+    candidates = values[mask]
+    try:
+        # Object → float64 calls Python's float() on each cell, so values and
+        # accepted spellings match the scalar parser exactly
+        parsed = candidates.astype('float64').tolist()
+    except (ValueError, TypeError):
+        parsed = [parse_price_value(value) for value in candidates.tolist()]
+    for position, price in zip(mask.nonzero()[0].tolist(), parsed):
+        result[position] = price
+    return result
+
+
+def infer_date_format(values) -> Optional[str]:
+    """The first DATE_FORMATS entry that parses the first parseable value"""
+    for value in values:
+        if value in DATE_SENTINELS:
+            continue
+        for fmt in DATE_FORMATS:
+            try:
+                datetime.strptime(value, fmt)
+                return fmt
+            except ValueError:
+                continue
+    return None
+
+
+def parse_date_lookup(values: pd.Series) -> Dict[str, Optional[datetime]]:
+    """Parse each distinct date string once; returns {value: datetime or None}"""
+    lookup: Dict[str, Optional[datetime]] = {value: None for value in values[present(values)].unique()}
+    distinct = [value for value in lookup if value not in DATE_SENTINELS]
+    if not distinct:
+        return lookup
+
+    fmt = infer_date_format(distinct)
+    remaining = distinct
+    if fmt:
+        parsed = pd.to_datetime(pd.Series(distinct, dtype=object), format=fmt, errors='coerce')
+        remaining = []
+        for value, timestamp in zip(distinct, parsed):
+            if pd.isna(timestamp):
+                remaining.append(value)
+                continue
+            result = timestamp.to_pydatetime()
+            # Keep pandas' result only where it provably agrees with strptime
+            if result.strftime(fmt) == value:
+                lookup[value] = result
+            else:
+                remaining.append(value)
+
+    for value in remaining:
+        lookup[value] = parse_date_value(value)
+    return lookup
+
+
+def parse_dates(values: pd.Series) -> List[Optional[datetime]]:
+    """Column version of parse_date_value"""
+    lookup = parse_date_lookup(values)
+    return [lookup[value] if value else None for value in values.tolist()]
+
+
+def split_labels(values: pd.Series, tag_ids: Optional[Dict[str, str]] = None) -> List[List[str]]:
+    """
+    Column version of parse_labels_value; each row gets its own list. With
+    tag_ids, labels are replaced by their tag document IDs.
+    """
+    lookup = {value: parse_labels_value(value) for value in values[present(values)].unique()}
+    if tag_ids is not None:
+        lookup = {value: [tag_ids[label] for label in labels] for value, labels in lookup.items()}
+    return [list(lookup[value]) if value else [] for value in values.tolist()]
+
+
+def note_lines(prefix: str, values: pd.Series, mask: pd.Series) -> pd.Series:
+    """prefix + value where mask is set, '' elsewhere"""
+    return (prefix + values.where(mask, '')).where(mask, '')
+
+
+def date_note_lines(prefix: str, values: pd.Series, mask: pd.Series) -> pd.Series:
+    """prefix + the parsed date as YYYY-MM-DD where mask is set and the date parses"""
+    lookup = parse_date_lookup(values)
+    formatted = {value: prefix + date.strftime('%Y-%m-%d') for value, date in lookup.items() if date}
+    lines = values.map(lambda value: formatted.get(value, '') if value else '').astype(object)
+    return lines.where(mask, '')
+
+
+def assemble_notes(df: pd.DataFrame) -> pd.Series:
+    """Column version of HomeBoxImporter.build_notes"""
+    sold_to = column(df, 'HB.sold_to')
+    has_sold_to = present(sold_to)
+    warranty_expires = column(df, 'HB.warranty_expires')
+    sold_time = column(df, 'HB.sold_time')
+
+    parts = []
+    for prefix, name in [('HomeBox ID: ', 'HB.import_ref'), ('Asset ID: ', 'HB.asset_id'),
+                         ('Notes: ', 'HB.notes'), ('Purchased from: ', 'HB.purchase_from')]:
+        values = column(df, name)
+        parts.append(note_lines(prefix, values, present(values)))
+    parts.append(date_note_lines('Warranty expires: ', warranty_expires, present(warranty_expires)))
+    parts.append(note_lines('Sold to: ', sold_to, has_sold_to))
+    parts.append(date_note_lines('Sold on: ', sold_time, has_sold_to & present(sold_time)))
+    url = column(df, 'HB.url')
+    parts.append(note_lines('HomeBox URL: ', url, present(url)))
+
+    notes = pd.Series('', index=df.index, dtype=object)
+    for part in parts:
+        has_part = part != ''
+        has_notes = notes != ''
+        notes = notes.where(~has_part, part.where(~has_notes, notes + '\n' + part))
+    return notes.where(notes != '', None)
+
+
+def homebox_ids(df: pd.DataFrame, item_url: re.Pattern = HOMEBOX_ITEM_URL) -> pd.Series:
+    """HomeBox item IDs from the HB.url links, None where there is no link"""
+    ids = column(df, 'HB.url').fillna('').str.extract(item_url, expand=False)
+    return ids.astype(object).where(ids.notna(), None)
+
+
+def build_item_documents(df: pd.DataFrame, container_ids: List[str], user_id: str,
+                         timestamp: Any, tag_ids: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """
+    Turn a cleaned CSV chunk into Hearth item documents, one per row, equal
+    to HomeBoxImporter.build_item_document for the same rows. tag_ids maps
+    each label to its tag document ID; without it items keep the label names.
+    """
+    if df.empty:
+        return []
+
+    if 'HB.name' in df.columns:
+        names = df['HB.name'].fillna('None').tolist()
+    else:
+        names = ['Unnamed Item'] * len(df)
+
+    descriptions = text_values(df['HB.description']).tolist() if 'HB.description' in df.columns else [None] * len(df)
+    texts = {field: (text_values(df[name]).tolist() if name in df.columns else [None] * len(df))
+             for field, name in TEXT_FIELDS}
+    purchase_prices = parse_prices(column(df, 'HB.purchase_price'))
+    current_values = parse_prices(column(df, 'HB.sold_price'))
+    purchase_dates = parse_dates(column(df, 'HB.purchase_time'))
+    notes = assemble_notes(df).tolist()
+    tags = split_labels(column(df, 'HB.labels'), tag_ids)
+    item_ids = homebox_ids(df).tolist()
+    asset_ids = column(df, 'HB.asset_id')
+    asset_ids = asset_ids.where(present(asset_ids), None).tolist()
+
+    documents = []
+    for i in range(len(df)):
+        documents.append({
+            'name': names[i],
+            'description': descriptions[i],
+            'containerId': container_ids[i],
+            'userId': user_id,
+            'createdAt': timestamp,
+            'updatedAt': timestamp,
+            'purchasePrice': purchase_prices[i],
+            'currentValue': current_values[i],
+            'purchaseDate': purchase_dates[i],
+            'manufacturer': texts['manufacturer'][i],
+            'model': texts['model'][i],
+            'serialNumber': texts['serialNumber'][i],
+            'warranty': texts['warranty'][i],
+            'brand': texts['brand'][i],
+            'notes': notes[i],
+            'tags': tags[i],
+            'homeboxId': item_ids[i],
+            'homeboxAssetId': asset_ids[i],
+            'imageUrl': None,
+            'categoryId': None,
+            'condition': None
+        })
+    return documents
+
+
+def item_keys(df: pd.DataFrame, first_row_number: int, item_url: re.Pattern) -> List[str]:
+    """Column version of HomeBoxImporter.item_key for rows numbered from first_row_number"""
+    item_ids = homebox_ids(df, item_url)
+    import_refs = column(df, 'HB.import_ref')
+    asset_ids = column(df, 'HB.asset_id')
+
+    keys = pd.Series([f"row:{first_row_number + i}" for i in range(len(df))], index=df.index, dtype=object)
+    keys = keys.where(~present(asset_ids), 'asset:' + asset_ids.where(present(asset_ids), ''))
+    keys = keys.where(~present(import_refs), 'ref:' + import_refs.where(present(import_refs), ''))
+    keys = keys.where(~present(item_ids), 'id:' + item_ids.where(present(item_ids), ''))
+    return keys.tolist()
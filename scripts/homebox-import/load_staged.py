@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Staged Hearth Document Loader
+
+Bulk-loads a JSONL file written by `homebox_import.py --stage` (or the image
+importer's --stage) into Firestore. The writes are committed in parallel
+batches with retries and adaptive concurrency. Progress is journaled per
+line, so an interrupted or partly failed load can simply be run again.
+
+A large file can be split across machines or processes with --shard K/N. All
+writes to one document land in the same shard. Batches commit in parallel,
+so load a file of items before a file of image updates to those items.
+
+Usage:
+    python load_staged.py --input staged.jsonl
+    python load_staged.py --input staged.jsonl --shard 1/4 --workers 16
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import firebase_admin
+from dotenv import load_dotenv
+from firebase_admin import credentials, firestore
+
+from batch_writer import BatchOp, FIRESTORE_BATCH_LIMIT, MAX_BATCH_BYTES
+from checkpoint_journal import CheckpointJournal
+from metrics import Metrics
+from sinks import FirestoreSink, decode_value, read_staged
+from throttle import DEFAULT_RETRY_ATTEMPTS, RetryPolicy
+
+load_dotenv()
+
+DEFAULT_LOAD_WORKERS = 8
+
+# Journal namespace; keys are hashes of the staged lines themselves
+JOURNAL_OWNER = 'staged-load'
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """'K/N' (1-based) -> (K - 1, N)"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got {value!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {value} is out of range")
+    return index - 1, count
+
+
+def shard_of(collection: str, document_id: str, count: int) -> int:
+    return zlib.crc32(f"{collection}/{document_id}".encode()) % count
+
+
+class StagedLoader:
+    def __init__(self, input_path: str, workers: int = DEFAULT_LOAD_WORKERS,
+                 batch_size: int = FIRESTORE_BATCH_LIMIT, shard: Optional[Tuple[int, int]] = None,
+                 journal_path: Optional[str] = None, retry_attempts: int = DEFAULT_RETRY_ATTEMPTS,
+                 metrics: Optional[Metrics] = None):
+        self.input_path = input_path
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.shard = shard
+        self.journal_path = journal_path or f"{input_path}.load.sqlite"
+        self.retry_attempts = retry_attempts
+        self.metrics = metrics or Metrics()
+        self.db = None
+        self.journal = None
+        self.sink = None
+
+        # Statistics
+        self.writes_seen = 0
+        self.writes_loaded = 0
+        self.writes_skipped = 0
+        self.writes_other_shards = 0
+        self.errors = []
+
+    def initialize_firebase(self) -> bool:
+        """Initialize Firebase Admin SDK"""
+        if self.db is not None:
+            # Already connected, e.g. to a stand-in database (fake_firestore.py)
+            return True
+
+        try:
+            service_account_path = os.getenv('FIREBASE_SERVICE_ACCOUNT_KEY')
+            if service_account_path and os.path.exists(service_account_path):
+                firebase_admin.initialize_app(credentials.Certificate(service_account_path))
+            else:
+                firebase_admin.initialize_app()
+            self.db = firestore.client()
+            print("✅ Firebase initialized successfully")
+            return True
+        except Exception as e:
+            print(f"❌ Firebase initialization failed: {e}")
+            return False
+
+    def handle_batch_result(self, batch_number: int, ops: List[BatchOp], error: Optional[Exception]):
+        if error is not None:
+            error_msg = f"Batch {batch_number} failed ({len(ops)} writes, first {ops[0].doc_ref.path}): {error}"
+            print(f"❌ {error_msg}")
+            self.errors.append(error_msg)
+            return
+
+        self.journal.mark_done('line', [(op.tag, op.doc_ref.id) for op in ops])
+        self.writes_loaded += len(ops)
+        print(f"📋 Loaded {self.writes_loaded} writes... (batch {batch_number})")
+
+    def queue(self, record: Dict, key: str):
+        op, collection, document_id = record['op'], record['collection'], record['id']
+        if op == 'delete':
+            self.sink.delete(collection, document_id, key)
+        elif op == 'update':
+            self.sink.update(collection, document_id, decode_value(record['data']), key)
+        elif op == 'set':
+            self.sink.set(collection, document_id, decode_value(record['data']), key)
+        else:
+            raise ValueError(f"Unknown operation {op!r}")
+
+    def run(self) -> bool:
+        print("📥 Loading staged Hearth documents")
+        print("=" * 50)
+        if not self.initialize_firebase():
+            return False
+
+        self.journal = CheckpointJournal(self.journal_path, JOURNAL_OWNER)
+        done = self.journal.completed('line')
+        if done:
+            print(f"⏩ Resuming from {self.journal_path}: {len(done)} writes already loaded")
+        if self.shard:
+            print(f"🧩 Shard {self.shard[0] + 1}/{self.shard[1]}")
+
+        self.sink = FirestoreSink(self.db, on_batch=self.handle_batch_result, batch_size=self.batch_size,
+                                  max_in_flight=self.workers, metrics=self.metrics,
+                                  retry=RetryPolicy(self.retry_attempts, metrics=self.metrics, name='firestore'))
+        pending_writes = pending_bytes = 0
+        try:
+            for line_number, (line, record) in enumerate(read_staged(self.input_path), 1):
+                self.writes_seen += 1
+                if self.shard and shard_of(record['collection'], record['id'], self.shard[1]) != self.shard[0]:
+                    self.writes_other_shards += 1
+                    continue
+                # Identical lines are the same write, so the content is the key
+                key = hashlib.sha1(line.encode()).hexdigest()[:20]
+                if key in done:
+                    self.writes_skipped += 1
+                    continue
+                if pending_writes and pending_bytes + len(line) > MAX_BATCH_BYTES:
+                    self.sink.flush()
+                    pending_writes = pending_bytes = 0
+                try:
+                    self.queue(record, key)
+                except Exception as e:
+                    error_msg = f"Line {line_number}: {e}"
+                    print(f"❌ {error_msg}")
+                    self.errors.append(error_msg)
+                    continue
+                pending_writes += 1
+                pending_bytes += len(line)
+                if pending_writes >= self.sink.writer.batch_size:
+                    # The writer started this batch by itself
+                    pending_writes = pending_bytes = 0
+        except Exception as e:
+            error_msg = f"Error reading {self.input_path}: {e}"
+            print(f"❌ {error_msg}")
+            self.errors.append(error_msg)
+        finally:
+            self.sink.close()
+            self.journal.close()
+
+        print("\n✅ LOAD COMPLETE")
+        print("=" * 50)
+        print(f"Writes in file: {self.writes_seen}")
+        print(f"Writes loaded: {self.writes_loaded}")
+        if self.writes_skipped:
+            print(f"Writes skipped (already loaded): {self.writes_skipped}")
+        if self.writes_other_shards:
+            print(f"Writes left to other shards: {self.writes_other_shards}")
+        if self.sink.retry.retries:
+            print(f"Commits retried: {self.sink.retry.retries}")
+        if self.errors:
+            print(f"\n⚠️  ERRORS ({len(self.errors)}):")
+            for error in self.errors[:10]:
+                print(f"  • {error}")
+            if len(self.errors) > 10:
+                print(f"  ... and {len(self.errors) - 10} more errors")
+        return not self.errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-load staged Hearth documents (JSONL) into Firestore')
+    parser.add_argument('--input', required=True, help='Staged JSONL file from --stage')
+    parser.add_argument('--workers', type=int, default=DEFAULT_LOAD_WORKERS, help=f'Most batch commits in flight at once (default: {DEFAULT_LOAD_WORKERS})')
+    parser.add_argument('--batch-size', type=int, default=FIRESTORE_BATCH_LIMIT, help=f'Writes per batch commit (max {FIRESTORE_BATCH_LIMIT})')
+    parser.add_argument('--shard', type=parse_shard, help='Load only shard K of N (e.g. 2/4); run one process per shard')
+    parser.add_argument('--journal', help='Progress journal path (default: <input>.load.sqlite)')
+    parser.add_argument('--restart', action='store_true', help='Ignore previous progress and load every line again')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_RETRY_ATTEMPTS - 1, help=f'Retries of a batch commit after a transient error (default: {DEFAULT_RETRY_ATTEMPTS - 1})')
+    parser.add_argument('--metrics-json', help='Write timings and counters to this JSON file')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Staged file not found: {args.input}")
+        sys.exit(1)
+
+    loader = StagedLoader(args.input, workers=args.workers, batch_size=args.batch_size, shard=args.shard,
+                          journal_path=args.journal, retry_attempts=args.max_retries + 1)
+    if args.restart and os.path.exists(loader.journal_path):
+        journal = CheckpointJournal(loader.journal_path, JOURNAL_OWNER)
+        journal.reset()
+        journal.close()
+        print(f"🔄 Cleared load progress in {loader.journal_path}")
+
+    success = loader.run()
+    loader.metrics.print_summary()
+    if args.metrics_json:
+        loader.metrics.write_json(args.metrics_json)
+        print(f"💾 Metrics written to {args.metrics_json}")
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
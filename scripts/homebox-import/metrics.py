@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Import metrics
+
+Thread-safe latency histograms, counters and byte totals for the import
+scripts, with a JSON report and an optional live summary.
+
+Usage:
+    metrics = Metrics()
+    with metrics.timer('homebox.download'):
+        ...
+    metrics.count('homebox.bytes_in', len(body))
+    metrics.observe('image.compression_ratio', ratio, unit='ratio')
+    metrics.write_json('metrics.json')
+
+Histograms use fixed log-spaced buckets (each √2 wider than the last), so
+recording is O(1) and memory stays constant however long an import runs.
+Percentiles are estimated from the buckets, within about 20%.
+"""
+
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Bucket i holds values up to BUCKET_BASE * BUCKET_GROWTH ** i
+BUCKET_BASE = 1e-4
+BUCKET_GROWTH = math.sqrt(2)
+BUCKET_COUNT = 56
+
+
+def _bucket_index(value: float) -> int:
+    if value <= BUCKET_BASE:
+        return 0
+    return min(BUCKET_COUNT - 1, math.ceil(math.log(value / BUCKET_BASE, BUCKET_GROWTH)))
+
+
+def _bucket_upper(index: int) -> float:
+    return BUCKET_BASE * BUCKET_GROWTH ** index
+
+
+class Histogram:
+    def __init__(self, unit: str = 'seconds'):
+        self.unit = unit
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets = [0] * BUCKET_COUNT
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.buckets[_bucket_index(value)] += 1
+
+    def merge(self, other: 'Histogram'):
+        """Add the values recorded by another histogram"""
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.buckets = [mine + theirs for mine, theirs in zip(self.buckets, other.buckets)]
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                # Geometric middle of the bucket, clamped to what was seen
+                estimate = _bucket_upper(index) / math.sqrt(BUCKET_GROWTH)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        if not self.count:
+            return {'unit': self.unit, 'count': 0}
+        return {
+            'unit': self.unit,
+            'count': self.count,
+            'total': round(self.total, 6),
+            'mean': round(self.total / self.count, 6),
+            'min': round(self.min, 6),
+            'max': round(self.max, 6),
+            'p50': round(self.percentile(0.5), 6),
+            'p90': round(self.percentile(0.9), 6),
+            'p99': round(self.percentile(0.99), 6)
+        }
+
+
+def format_value(value: Optional[float], unit: str) -> str:
+    if value is None:
+        return '-'
+    if unit == 'seconds':
+        return f"{value * 1000:.1f}ms" if value < 1 else f"{value:.2f}s"
+    return f"{value:.2f}"
+
+
+def format_bytes(count: float) -> str:
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if count < 1024 or unit == 'GB':
+            return f"{count:.1f}{unit}" if unit != 'B' else f"{int(count)}B"
+        count /= 1024
+
+
+class Metrics:
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._live_thread = None
+        self._live_stop = threading.Event()
+
+    def observe(self, name: str, value: float, unit: str = 'seconds'):
+        """Record one value in a histogram"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(unit)
+            histogram.add(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time a block into a latency histogram (recorded even if it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def count(self, name: str, amount: float = 1):
+        """Add to a counter; names ending in _bytes are reported as byte totals"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def merge(self, other: 'Metrics'):
+        """Add another Metrics' histograms and counters, e.g. one sent back by a worker process"""
+        with other._lock:
+            histograms = list(other._histograms.items())
+            counters = list(other._counters.items())
+        with self._lock:
+            for name, histogram in histograms:
+                mine = self._histograms.get(name)
+                if mine is None:
+                    mine = self._histograms[name] = Histogram(histogram.unit)
+                mine.merge(histogram)
+            for name, value in counters:
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def __getstate__(self):
+        # Locks and the live summary thread can't be pickled; only the
+        # recorded values travel between processes
+        with self._lock:
+            return {'started_at': self.started_at, 'histograms': dict(self._histograms),
+                    'counters': dict(self._counters)}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.started_at = state['started_at']
+        self._histograms = state['histograms']
+        self._counters = state['counters']
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def report(self) -> Dict:
+        """Everything recorded so far, as a JSON-serializable dictionary"""
+        with self._lock:
+            histograms = {name: histogram.to_dict() for name, histogram in sorted(self._histograms.items())}
+            counters = dict(sorted(self._counters.items()))
+        elapsed = self.elapsed
+        return {
+            'started_at': self.started_at.isoformat(),
+            'elapsed_seconds': round(elapsed, 3),
+            'histograms': histograms,
+            'counters': counters,
+            'rates_per_second': {name: round(value / elapsed, 3) for name, value in counters.items()} if elapsed else {}
+        }
+
+    def write_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def summary_lines(self, top: Optional[int] = None) -> List[str]:
+        """Human-readable lines: histograms by total time, then counters"""
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: -item[1].total
+                                if item[1].unit == 'seconds' else 0)
+            histograms = [(name, histogram.to_dict()) for name, histogram in histograms]
+            counters = sorted(self._counters.items())
+
+        lines = []
+        for name, stats in histograms[:top]:
+            unit = stats['unit']
+            total = f", total {format_value(stats['total'], unit)}" if unit == 'seconds' else ''
+            lines.append(f"{name}: n={stats['count']} p50={format_value(stats.get('p50'), unit)} "
+                         f"p90={format_value(stats.get('p90'), unit)} p99={format_value(stats.get('p99'), unit)}{total}")
+        for name, value in counters:
+            lines.append(f"{name}: {format_bytes(value) if name.endswith('_bytes') else f'{value:g}'}")
+        return lines
+
+    def print_summary(self, title: str = 'METRICS', top: Optional[int] = None):
+        print(f"\n📈 {title} ({self.elapsed:.1f}s)")
+        for line in self.summary_lines(top):
+            print(f"  {line}")
+
+    def start_live_summary(self, interval: float, top: int = 6):
+        """Print a short summary every interval seconds until stop_live_summary()"""
+        def run():
+            while not self._live_stop.wait(interval):
+                self.print_summary('Progress', top)
+
+        self._live_stop.clear()
+        self._live_thread = threading.Thread(target=run, daemon=True)
+        self._live_thread.start()
+
+    def stop_live_summary(self):
+        if self._live_thread:
+            self._live_stop.set()
+            self._live_thread.join()
+            self._live_thread = None
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Name Index
+
+Inverted bigram index over normalized item names. A query is narrowed to a
+small candidate set before exact SequenceMatcher scoring, with the same
+results as scoring every name:
+
+- Length filter: ratio can't exceed 2*min(la, lb) / (la + lb), so names
+  whose length is too different are never considered.
+- Count filter: if SequenceMatcher finds M matching characters in K blocks,
+  at least M - K bigrams are shared, and K - 1 can't exceed the unmatched
+  characters (la + lb - 2M). A candidate reaching the threshold therefore
+  shares at least 3*M_min - (la + lb) - 1 bigram occurrences.
+- Prefix filter: a candidate sharing at least L of the query's n bigram
+  occurrences must contain one of any n - L + 1 of them, so only the
+  postings of the rarest ones are read. Postings are split by name length
+  so only compatible lengths are touched, and each candidate's exact shared
+  count is then checked against the bound for its length.
+
+Bigram occurrences are keyed as (bigram, n-th occurrence) so repeated
+bigrams count like a multiset intersection. Each name's keys are also kept
+as an integer bitmask, so a shared count is one AND plus a popcount.
+"""
+
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_THRESHOLD = 0.85
+
+
+def _ratio(matches: int, length: int) -> float:
+    # Same formula as difflib, so bounds compare exactly with ratio()
+    return 2.0 * matches / length if length else 1.0
+
+
+def _bigram_keys(text: str) -> List[Tuple[str, int]]:
+    seen = {}
+    keys = []
+    for i in range(len(text) - 1):
+        gram = text[i:i + 2]
+        occurrence = seen.get(gram, 0)
+        seen[gram] = occurrence + 1
+        keys.append((gram, occurrence))
+    return keys
+
+
+class FuzzyNameIndex:
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._names: List[str] = []
+        self._values: List[Any] = []
+        self._masks: List[int] = []
+        self._key_bits: Dict[Tuple[str, int], int] = {}
+        self._postings: Dict[Tuple[str, int], Dict[int, List[int]]] = {}
+        self._by_length: Dict[int, List[int]] = {}
+        self._min_shared_cache: Dict[int, int] = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, normalized_name: str, value: Any):
+        """Add a normalized name; entries added first win ties, like a linear scan"""
+        entry_id = len(self._names)
+        self._names.append(normalized_name)
+        self._values.append(value)
+        self._by_length.setdefault(len(normalized_name), []).append(entry_id)
+        mask = 0
+        for key in _bigram_keys(normalized_name):
+            bit = self._key_bits.setdefault(key, len(self._key_bits))
+            mask |= 1 << bit
+            self._postings.setdefault(key, {}).setdefault(len(normalized_name), []).append(entry_id)
+        self._masks.append(mask)
+
+    def _length_window(self, length: int) -> Tuple[int, int]:
+        """Candidate lengths whose best possible ratio reaches the threshold"""
+        def reachable(other: int) -> bool:
+            return _ratio(min(length, other), length + other) >= self.threshold
+
+        low = high = length
+        while low > 0 and reachable(low - 1):
+            low -= 1
+        while reachable(high + 1):
+            high += 1
+        return low, high
+
+    def _min_shared_bigrams(self, total_length: int) -> int:
+        """Lower bound on shared bigram occurrences for a pair of the given total length"""
+        cached = self._min_shared_cache.get(total_length)
+        if cached is not None:
+            return cached
+
+        min_matches = int(self.threshold * total_length / 2)
+        while min_matches > 0 and _ratio(min_matches - 1, total_length) >= self.threshold:
+            min_matches -= 1
+        while _ratio(min_matches, total_length) < self.threshold:
+            min_matches += 1
+        bound = 3 * min_matches - total_length - 1
+        self._min_shared_cache[total_length] = bound
+        return bound
+
+    def candidates(self, query: str) -> List[int]:
+        """Entry IDs that pass the length and bigram filters, in insertion order"""
+        length = len(query)
+        low, high = self._length_window(length)
+        lengths = range(low, high + 1)
+        min_shared_by_length = {other: self._min_shared_bigrams(length + other) for other in lengths}
+        # The bound isn't monotonic in length, so prefix on the loosest one
+        min_shared = min(min_shared_by_length.values())
+
+        if min_shared <= 0:
+            # Too short for the count filter: every name of a compatible length
+            ids = []
+            for candidate_length in lengths:
+                ids.extend(self._by_length.get(candidate_length, ()))
+            return sorted(ids)
+
+        def postings(key):
+            by_length = self._postings.get(key, {})
+            return [by_length[other] for other in lengths if other in by_length]
+
+        keys = _bigram_keys(query)
+        query_mask = 0
+        for key in keys:
+            if key in self._key_bits:
+                query_mask |= 1 << self._key_bits[key]
+        key_postings = sorted((postings(key) for key in keys), key=lambda lists: sum(map(len, lists)))
+        ids = set()
+        for lists in key_postings[:len(keys) - min_shared + 1]:
+            for entry_ids in lists:
+                ids.update(entry_ids)
+
+        names = self._names
+        masks = self._masks
+        return sorted(
+            entry_id for entry_id in ids
+            if (query_mask & masks[entry_id]).bit_count() >= min_shared_by_length[len(names[entry_id])]
+        )
+
+    def best_match(self, query: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, score) of the best name at or above the threshold, or None"""
+        best_id = None
+        best_score = 0.0
+
+        for entry_id in self.candidates(query):
+            matcher = SequenceMatcher(None, query, self._names[entry_id])
+            # quick_ratio() is an upper bound on ratio(); skip what can't win
+            upper_bound = matcher.quick_ratio()
+            if upper_bound < self.threshold or upper_bound <= best_score:
+                continue
+            score = matcher.ratio()
+            if score > best_score and score >= self.threshold:
+                best_score = score
+                best_id = entry_id
+
+        if best_id is None:
+            return None
+        return self._values[best_id], best_score
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Output sinks for the HomeBox importers
+
+The importers hand every Hearth document write to a sink instead of calling
+Firestore directly:
+
+- FirestoreSink writes through BatchWriter (batched, retried, adaptive)
+- JsonlSink stages the writes as JSON lines, to be loaded later with
+  load_staged.py (possibly retried or sharded across machines)
+- DryRunSink writes nothing and prints a summary of what would be written
+
+Writes are grouped into batches, and each finished batch is reported through
+on_batch(batch_number, ops, error), like BatchWriter, so journals and
+counters work the same whatever the destination.
+
+Staged line format:
+    {"op": "set", "collection": "items", "id": "<doc id>", "data": {...}}
+Timestamps are stored as {"$timestamp": "<ISO 8601>"} and Firestore
+sentinels as {"$sentinel": "SERVER_TIMESTAMP"} or {"$sentinel": "DELETE_FIELD"}.
+
+Documents built for a dry run or for staging use the Sentinel stand-ins
+below, so those runs never load the Firestore client (google-cloud-firestore
+takes most of a second to import). Whatever writes to Firestore swaps in the
+real sentinels with firestore_sentinel().
+"""
+
+import json
+import sys
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from batch_writer import BatchOp, BatchWriter, FIRESTORE_BATCH_LIMIT
+
+FIRESTORE_MODULE = 'google.cloud.firestore_v1'
+SENTINEL_NAMES = ('SERVER_TIMESTAMP', 'DELETE_FIELD')
+
+
+class Sentinel:
+    """Stand-in for a Firestore sentinel, by name"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+SERVER_TIMESTAMP = Sentinel('SERVER_TIMESTAMP')
+DELETE_FIELD = Sentinel('DELETE_FIELD')
+
+
+def firestore_sentinel(sentinel: Sentinel) -> Any:
+    """The Firestore client's own sentinel (imports google-cloud-firestore)"""
+    import google.cloud.firestore_v1 as firestore_v1
+    return getattr(firestore_v1, sentinel.name)
+
+
+def sentinel_name(value: Any) -> Optional[str]:
+    """Name of a Firestore sentinel or stand-in, None for other values"""
+    if isinstance(value, Sentinel):
+        return value.name
+    # Only a loaded client can have produced its sentinels
+    firestore_v1 = sys.modules.get(FIRESTORE_MODULE)
+    if firestore_v1 is not None:
+        for name in SENTINEL_NAMES:
+            if value is getattr(firestore_v1, name):
+                return name
+    return None
+
+BatchCallback = Callable[[int, List[BatchOp], Optional[Exception]], None]
+
+
+class StagedRef(NamedTuple):
+    """Document reference for sinks that don't talk to Firestore"""
+    collection: str
+    id: str
+
+    @property
+    def path(self) -> str:
+        return f"{self.collection}/{self.id}"
+
+
+def encode_value(value: Any) -> Any:
+    """Make a Firestore field value JSON-serializable (see decode_value)"""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    name = sentinel_name(value)
+    if name:
+        return {'$sentinel': name}
+    if isinstance(value, datetime):
+        return {'$timestamp': value.isoformat()}
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    return value
+
+
+def decode_value(value: Any) -> Any:
+    """Turn an encoded value back into what the Firestore client expects"""
+    if isinstance(value, dict):
+        if len(value) == 1 and '$timestamp' in value:
+            return datetime.fromisoformat(value['$timestamp'])
+        if len(value) == 1 and '$sentinel' in value:
+            if value['$sentinel'] not in SENTINEL_NAMES:
+                raise ValueError(f"Unsupported sentinel {value['$sentinel']!r}")
+            return firestore_sentinel(Sentinel(value['$sentinel']))
+        return {key: decode_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    return value
+
+
+def encode_record(op: str, collection: str, document_id: str, data: Optional[Dict]) -> str:
+    record = {'op': op, 'collection': collection, 'id': document_id}
+    if data is not None:
+        record['data'] = encode_value(data)
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def read_staged(path: str) -> Iterator[Tuple[str, Dict]]:
+    """Yield (line, record) for every write in a staged JSONL file"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line, json.loads(line)
+
+
+class Sink(ABC):
+    """Destination for Hearth document writes"""
+
+    # Shown in the importers' summaries
+    label = 'sink'
+    # True when nothing is actually written
+    dry_run = False
+
+    def __init__(self, on_batch: Optional[BatchCallback] = None):
+        self.on_batch = on_batch
+
+    @abstractmethod
+    def set(self, collection: str, document_id: str, data: Dict, tag: Any = None):
+        """Queue a full document write"""
+
+    @abstractmethod
+    def update(self, collection: str, document_id: str, data: Dict, tag: Any = None):
+        """Queue a field-level update of an existing document"""
+
+    @abstractmethod
+    def delete(self, collection: str, document_id: str, tag: Any = None):
+        """Queue a document delete"""
+
+    def flush(self):
+        """Start writing the queued writes as a batch, without waiting for it"""
+
+    def drain(self):
+        """Finish every queued write and report its batch"""
+
+    def close(self):
+        self.drain()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FirestoreSink(Sink):
+    label = 'Firestore'
+
+    def __init__(self, db, on_batch: Optional[BatchCallback] = None, **writer_options):
+        super().__init__(on_batch)
+        self.db = db
+        self.writer = BatchWriter(db, on_batch=self._report, **writer_options)
+        self.retry = self.writer.retry
+        self.limiter = self.writer.limiter
+
+    def _report(self, batch_number: int, ops: List[BatchOp], error: Optional[Exception]):
+        if self.on_batch:
+            self.on_batch(batch_number, ops, error)
+
+    def set(self, collection: str, document_id: str, data: Dict, tag: Any = None):
+        self.writer.set(self.db.collection(collection).document(document_id), data, tag)
+
+    def update(self, collection: str, document_id: str, data: Dict, tag: Any = None):
+        self.writer.update(self.db.collection(collection).document(document_id), data, tag)
+
+    def delete(self, collection: str, document_id: str, tag: Any = None):
+        self.writer.delete(self.db.collection(collection).document(document_id), tag)
+
+    def flush(self):
+        self.writer.flush()
+
+    def drain(self):
+        self.writer.drain()
+
+    def close(self):
+        self.writer.close()
+
+
+class _BufferedSink(Sink):
+    """Collects writes into batches of batch_size and hands each to _write_batch"""
+
+    def __init__(self, on_batch: Optional[BatchCallback] = None, batch_size: int = FIRESTORE_BATCH_LIMIT):
+        super().__init__(on_batch)
+        self.batch_size = max(1, batch_size)
+        self._ops: List[BatchOp] = []
+        self._batch_number = 0
+        self._lock = threading.Lock()
+
+    def set(self, collection: str, document_id: str, data: Dict, tag: Any = None):
+        self._add(BatchOp('set', StagedRef(collection, document_id), data, tag))
+
+    def update(self, collection: str, document_id: str, data: Dict, tag: Any = None):
+        self._add(BatchOp('update', StagedRef(collection, document_id), data, tag))
+
+    def delete(self, collection: str, document_id: str, tag: Any = None):
+        self._add(BatchOp('delete', StagedRef(collection, document_id), None, tag))
+
+    def _add(self, op: BatchOp):
+        # Several pipeline threads may write at once
+        with self._lock:
+            self._ops.append(op)
+            if len(self._ops) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._ops:
+            return
+        ops, self._ops = self._ops, []
+        self._batch_number += 1
+        error = None
+        try:
+            self._write_batch(ops)
+        except Exception as e:
+            error = e
+        if self.on_batch:
+            try:
+                self.on_batch(self._batch_number, ops, error)
+            except Exception as e:
+                print(f"❌ Batch callback failed: {e}")
+
+    @abstractmethod
+    def _write_batch(self, ops: List[BatchOp]):
+        """Write one batch; an exception marks the whole batch failed"""
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def drain(self):
+        self.flush()
+
+
+class JsonlSink(_BufferedSink):
+    """Stages writes as JSON lines; each batch is flushed to disk before it is reported"""
+
+    def __init__(self, path: str, on_batch: Optional[BatchCallback] = None,
+                 batch_size: int = FIRESTORE_BATCH_LIMIT, append: bool = True):
+        super().__init__(on_batch, batch_size)
+        self.path = path
+        self.label = f"staged to {path}"
+        self.lines_written = 0
+        # Appending lets a resumed run add to the lines of the interrupted one
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def _write_batch(self, ops: List[BatchOp]):
+        lines = [encode_record(op.kind, op.doc_ref.collection, op.doc_ref.id, op.data) for op in ops]
+        self._file.write('\n'.join(lines) + '\n')
+        self._file.flush()
+        self.lines_written += len(lines)
+
+    def close(self):
+        try:
+            self.drain()
+        finally:
+            self._file.close()
+
+
+class DryRunSink(_BufferedSink):
+    """Writes nothing; prints the containers, tags and a few sample items per container"""
+
+    label = 'dry run (nothing written)'
+    dry_run = True
+
+    def __init__(self, on_batch: Optional[BatchCallback] = None, samples_per_container: int = 5):
+        super().__init__(on_batch)
+        self.samples_per_container = samples_per_container
+        self.containers: Dict[str, str] = {}
+        self.tags: Dict[str, str] = {}
+        self.item_counts: Dict[Optional[str], int] = {}
+        self.samples: Dict[Optional[str], List[Dict]] = {}
+        self.other_writes = 0
+
+    def _write_batch(self, ops: List[BatchOp]):
+        for op in ops:
+            collection = op.doc_ref.collection
+            if op.kind == 'set' and collection == 'containers':
+                self.containers[op.doc_ref.id] = op.data.get('name', op.doc_ref.id)
+            elif op.kind == 'set' and collection == 'tags':
+                self.tags[op.doc_ref.id] = op.data.get('name', op.doc_ref.id)
+            elif op.kind == 'set' and collection == 'items':
+                container_id = op.data.get('containerId')
+                self.item_counts[container_id] = self.item_counts.get(container_id, 0) + 1
+                samples = self.samples.setdefault(container_id, [])
+                if len(samples) < self.samples_per_container:
+                    samples.append(op.data)
+            else:
+                self.other_writes += 1
+
+    def print_summary(self):
+        if self.tags:
+            print(f"\n🏷️  Would create {len(self.tags)} tags")
+        for container_id, name in self.containers.items():
+            count = self.item_counts.get(container_id, 0)
+            print(f"\n📦 Would create container: '{name}'")
+            print(f"📋 Would import {count} items:")
+            for item in self.samples.get(container_id, []):
+                print(f"  • {item.get('name', 'Unnamed')}")
+                if item.get('purchasePrice'):
+                    print(f"    Price: ${item['purchasePrice']:,.2f}")
+                if item.get('tags'):
+                    # Items hold tag IDs; show the names
+                    print(f"    Tags: {', '.join(self.tags.get(tag, tag) for tag in item['tags'])}")
+            if count > self.samples_per_container:
+                print(f"  ... and {count - self.samples_per_container} more items")
+        if self.other_writes:
+            print(f"\n✏️  Would make {self.other_writes} other writes")
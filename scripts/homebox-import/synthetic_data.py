@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Synthetic HomeBox data for benchmarks and local testing
+
+Generates HomeBox CSV exports, matching HomeBox API item lists (with
+optionally perturbed names, to exercise exact and fuzzy matching) and a
+corpus of photo-like JPEG attachments. Everything is deterministic for a
+given seed.
+
+Usage:
+    python synthetic_data.py --rows 10000 --locations 25 --labels 60 --output export.csv
+"""
+
+import argparse
+import csv
+import io
+import random
+import uuid
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageFilter
+
+# Column order of a HomeBox CSV export
+HOMEBOX_CSV_COLUMNS = [
+    'HB.import_ref', 'HB.location', 'HB.labels', 'HB.asset_id', 'HB.archived', 'HB.url', 'HB.name',
+    'HB.quantity', 'HB.description', 'HB.insured', 'HB.notes', 'HB.purchase_price', 'HB.purchase_from',
+    'HB.purchase_time', 'HB.manufacturer', 'HB.model_number', 'HB.serial_number', 'HB.lifetime_warranty',
+    'HB.warranty_expires', 'HB.warranty_details', 'HB.sold_to', 'HB.sold_price', 'HB.sold_time',
+    'HB.sold_notes'
+]
+
+HOMEBOX_BASE_URL = 'http://homebox.local'
+
+_BRANDS = ['Sony', 'Bosch', 'Makita', 'Apple', 'Samsung', 'Ikea', 'Philips', 'Canon', 'Dewalt', 'Ubiquiti',
+           'Logitech', 'Anker', 'Brother', 'Netgear', 'Lego', 'Weber', 'Dyson', 'Fender', 'Yamaha', 'Garmin']
+_ADJECTIVES = ['Red', 'Large', 'Compact', 'Wireless', 'Vintage', 'Portable', 'Cordless', 'Steel', 'Spare',
+               'Outdoor', 'Digital', 'Heavy Duty', 'Mini', 'Classic', 'Smart', 'Wooden', 'Folding', 'Blue']
+_NOUNS = ['Drill', 'Router', 'Speaker', 'Camera', 'Lamp', 'Ladder', 'Toolbox', 'Switch', 'Keyboard',
+          'Guitar', 'Grill', 'Vacuum', 'Printer', 'Tent', 'Kettle', 'Monitor', 'Saw', 'Charger', 'Record']
+_PLACES = ['Garage', 'Attic', 'Basement', 'Kitchen', 'Office', 'Shed', 'Closet', 'Workshop', 'Pantry',
+           'Bedroom', 'Living Room', 'Network Rack', 'Storage Unit', 'Hall', 'Laundry']
+_DATE_STYLES = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%m/%d/%Y']
+
+
+def location_names(count: int) -> List[str]:
+    names = []
+    for i in range(count):
+        place = _PLACES[i % len(_PLACES)]
+        names.append(place if i < len(_PLACES) else f"{place} {i // len(_PLACES) + 1}")
+    return names
+
+
+def label_names(count: int) -> List[str]:
+    return [f"{_ADJECTIVES[i % len(_ADJECTIVES)]} {_NOUNS[(i // len(_ADJECTIVES)) % len(_NOUNS)]}s"
+            if i < len(_ADJECTIVES) * len(_NOUNS) else f"Label {i}" for i in range(count)]
+
+
+def _random_date(rng: random.Random) -> str:
+    if rng.random() < 0.1:
+        # HomeBox writes these placeholders for "no date"
+        return rng.choice(['0001-02-16', '0001-03-20'])
+    year, month, day = rng.randint(2005, 2025), rng.randint(1, 12), rng.randint(1, 28)
+    style = rng.choice(_DATE_STYLES)
+    hour, minute = rng.randint(0, 23), rng.randint(0, 59)
+    return (f"{year:04d}-{month:02d}-{day:02d}" if style == '%Y-%m-%d' else
+            f"{year:04d}-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:00" if style == '%Y-%m-%d %H:%M:%S' else
+            f"{month:02d}/{day:02d}/{year:04d}")
+
+
+def generate_rows(rows: int, locations: int = 20, label_cardinality: int = 50, labels_per_item: int = 3,
+                  seed: int = 0) -> Iterator[Dict[str, str]]:
+    """Yield HomeBox CSV rows with realistic names, prices, dates and labels"""
+    rng = random.Random(seed)
+    location_pool = location_names(max(1, locations))
+    label_pool = label_names(label_cardinality)
+    # Skewed location sizes, like a real inventory
+    location_weights = [1 / (i + 1) for i in range(len(location_pool))]
+
+    for i in range(rows):
+        item_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        name = f"{rng.choice(_BRANDS)} {rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {i}"
+        labels = rng.sample(label_pool, min(len(label_pool), rng.randint(0, labels_per_item))) if label_pool else []
+        sold = rng.random() < 0.05
+        yield {
+            'HB.import_ref': str(i + 1) if rng.random() < 0.8 else '',
+            'HB.location': rng.choices(location_pool, location_weights)[0] if rng.random() < 0.98 else '',
+            'HB.labels': '; '.join(labels),
+            'HB.asset_id': f"{i // 1000:03d}-{i % 1000:03d}",
+            'HB.archived': 'false',
+            'HB.url': f"{HOMEBOX_BASE_URL}/item/{item_id}",
+            'HB.name': name,
+            'HB.quantity': str(rng.randint(1, 4)),
+            'HB.description': rng.choice(['', '', f"{rng.choice(_ADJECTIVES).lower()} {rng.choice(_NOUNS).lower()} in good shape"]),
+            'HB.insured': 'false',
+            'HB.notes': rng.choice(['', '', '', 'Bought second hand', 'Needs new battery']),
+            'HB.purchase_price': rng.choice(['0', '', f"{rng.uniform(1, 2000):.2f}"]),
+            'HB.purchase_from': rng.choice(['', 'Amazon', 'Local store', 'eBay']),
+            'HB.purchase_time': _random_date(rng) if rng.random() < 0.7 else '',
+            'HB.manufacturer': rng.choice(_BRANDS) if rng.random() < 0.6 else '',
+            'HB.model_number': f"M-{rng.randint(100, 9999)}" if rng.random() < 0.4 else '',
+            'HB.serial_number': f"SN{rng.getrandbits(40):010X}" if rng.random() < 0.3 else '',
+            'HB.lifetime_warranty': 'false',
+            'HB.warranty_expires': _random_date(rng) if rng.random() < 0.3 else '',
+            'HB.warranty_details': 'Manufacturer warranty' if rng.random() < 0.1 else '',
+            'HB.sold_to': 'A neighbour' if sold else '',
+            'HB.sold_price': f"{rng.uniform(1, 500):.2f}" if sold else '0',
+            'HB.sold_time': _random_date(rng) if sold else '',
+            'HB.sold_notes': ''
+        }
+
+
+def write_csv(path: str, rows: Iterator[Dict[str, str]]) -> int:
+    """Write rows as a HomeBox CSV export; returns the row count"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=HOMEBOX_CSV_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def perturb_name(name: str, rng: random.Random) -> str:
+    """A HomeBox-side variant of a name: case, trailing punctuation or a typo"""
+    kind = rng.choice(['case', 'punctuation', 'typo'])
+    if kind == 'case':
+        return name.lower()
+    if kind == 'punctuation':
+        return name + rng.choice(['.', ' ', '!', ' -'])
+    position = rng.randrange(len(name) - 1)
+    return name[:position] + name[position + 1] + name[position] + name[position + 2:]
+
+
+def homebox_api_items(rows: Sequence[Dict[str, str]], image_ratio: float = 0.5, name_noise: float = 0.0,
+                      max_images: Optional[int] = None, seed: int = 0) -> List[Dict]:
+    """
+    HomeBox API item summaries for CSV rows, as served by fake_homebox_server.py.
+    A share of the names (name_noise) differ slightly from the CSV so the image
+    importer has to match them by normalization or fuzzy matching.
+    """
+    rng = random.Random(seed)
+    items = []
+    images = 0
+    for i, row in enumerate(rows):
+        item_id = row['HB.url'].rsplit('/', 1)[-1]
+        name = row['HB.name']
+        if name_noise and rng.random() < name_noise:
+            name = perturb_name(name, rng)
+        has_image = rng.random() < image_ratio and (max_images is None or images < max_images)
+        images += has_image
+        items.append({
+            'id': item_id,
+            'assetId': row['HB.asset_id'],
+            'name': name,
+            'description': row['HB.description'],
+            'quantity': int(row['HB.quantity'] or 1),
+            'archived': False,
+            'location': {'id': f"loc-{row['HB.location']}", 'name': row['HB.location']},
+            'labels': [],
+            'imageId': str(uuid.UUID(int=rng.getrandbits(128), version=4)) if has_image else None
+        })
+    return items
+
+
+def generate_image_corpus(count: int = 20, size: Tuple[int, int] = (3000, 2000), seed: int = 0,
+                          quality: int = 92) -> List[bytes]:
+    """Photo-like JPEGs of varying detail: noise texture over a gradient, some blurred"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        width, height = size if i % 3 else (size[1], size[0])  # Some portrait shots
+        detail = rng.choice([8, 4, 2])
+        texture = Image.effect_noise((width // detail, height // detail), rng.choice([20, 50, 90]))
+        channels = [texture.rotate(angle).resize((width, height)) for angle in (0, 90, 180)]
+        texture = Image.merge('RGB', channels)
+        gradient = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+        image = Image.blend(texture, gradient, rng.uniform(0.2, 0.7))
+        if rng.random() < 0.3:
+            image = image.filter(ImageFilter.GaussianBlur(2))
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=quality)
+        corpus.append(output.getvalue())
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic HomeBox CSV export')
+    parser.add_argument('--rows', type=int, default=1000, help='Number of items (default: 1000)')
+    parser.add_argument('--locations', type=int, default=20, help='Number of locations (default: 20)')
+    parser.add_argument('--labels', type=int, default=50, help='Number of distinct labels (default: 50)')
+    parser.add_argument('--labels-per-item', type=int, default=3, help='Most labels on one item (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--output', required=True, help='CSV file to write')
+
+    args = parser.parse_args()
+
+    count = write_csv(args.output, generate_rows(args.rows, args.locations, args.labels,
+                                                 args.labels_per_item, args.seed))
+    print(f"✅ Wrote {count} items to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
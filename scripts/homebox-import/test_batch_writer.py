@@ -0,0 +1,133 @@
+"""Tests for batch_writer.py against the in-memory Firestore in fake_firestore.py"""
+
+import threading
+
+from batch_writer import FIRESTORE_BATCH_LIMIT, MAX_BATCH_BYTES, BatchWriter
+from fake_firestore import FakeFirestore
+from homebox_import import HomeBoxImporter
+from sinks import FirestoreSink
+from throttle import RetryPolicy
+
+
+class GatedFirestore(FakeFirestore):
+    """Batch commits wait until the gate opens"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.gate = threading.Event()
+
+    def batch(self):
+        batch = super().batch()
+        commit = batch.commit
+
+        def gated_commit():
+            self.gate.wait()
+            commit()
+
+        batch.commit = gated_commit
+        return batch
+
+
+def recorder():
+    """on_batch callback recording (batch size, error) per batch"""
+    batches = []
+    lock = threading.Lock()
+
+    def on_batch(batch_number, ops, error):
+        with lock:
+            batches.append((len(ops), error))
+
+    return batches, on_batch
+
+
+def no_wait_retry(attempts: int = 20) -> RetryPolicy:
+    return RetryPolicy(attempts=attempts, base_delay=0.0)
+
+
+def test_writes_are_split_into_batches_of_at_most_500():
+    db = FakeFirestore()
+    batches, on_batch = recorder()
+    with BatchWriter(db, on_batch=on_batch) as writer:
+        for i in range(1201):
+            writer.set(db.collection('items').document(f"item-{i}"), {'n': i})
+
+    assert sorted(size for size, _ in batches) == [201, FIRESTORE_BATCH_LIMIT, FIRESTORE_BATCH_LIMIT]
+    assert db.commits == 3
+    assert db.count('items') == 1201
+    assert writer.writes_committed == 1201
+
+
+def test_batch_size_is_capped_at_the_firestore_limit():
+    assert BatchWriter(FakeFirestore(), batch_size=2000).batch_size == FIRESTORE_BATCH_LIMIT
+
+
+def test_items_with_inline_images_are_split_by_size():
+    db = FakeFirestore()
+    batches, on_batch = recorder()
+    importer = HomeBoxImporter('export.csv', user_id='user-1')
+    importer.writer = FirestoreSink(db, on_batch=on_batch)
+    image = 'data:image/jpeg;base64,' + 'A' * (MAX_BATCH_BYTES // 3)
+    for i in range(5):
+        importer.write_item(f"id:{i}", {'name': f"Item {i}", 'imageUrl': image})
+    importer.writer.close()
+
+    # Three images would pass MAX_BATCH_BYTES, so each batch holds two
+    assert [size for size, _ in sorted(batches)] == [1, 2, 2]
+    assert db.count('items') == 5
+
+
+def test_transient_errors_are_retried():
+    db = FakeFirestore(failure_rate=0.5, seed=1)
+    batches, on_batch = recorder()
+    with BatchWriter(db, batch_size=10, on_batch=on_batch, retry=no_wait_retry()) as writer:
+        for i in range(200):
+            writer.set(db.collection('items').document(f"item-{i}"), {'n': i})
+
+    assert db.failures > 0
+    assert writer.retry.retries == db.failures
+    assert all(error is None for _, error in batches)
+    assert db.count('items') == 200
+
+
+def test_permanent_errors_fail_the_batch_without_retrying():
+    db = FakeFirestore()
+    batches, on_batch = recorder()
+    with BatchWriter(db, on_batch=on_batch, retry=no_wait_retry()) as writer:
+        writer.update(db.collection('items').document('missing'), {'n': 1})
+
+    assert len(batches) == 1 and batches[0][1] is not None
+    assert writer.retry.retries == 0
+    assert writer.batches_failed == 1 and writer.writes_failed == 1
+
+
+def test_flush_blocks_while_max_in_flight_batches_are_committing():
+    db = GatedFirestore()
+    writer = BatchWriter(db, batch_size=1, max_in_flight=2)
+    queued = threading.Event()
+
+    def write():
+        for i in range(3):
+            writer.set(db.collection('items').document(f"item-{i}"), {'n': i})
+        queued.set()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    # The third batch waits for a free slot
+    assert not queued.wait(0.2)
+    db.gate.set()
+    assert queued.wait(5)
+    thread.join()
+    writer.close()
+    assert db.count('items') == 3
+
+
+def test_overload_lowers_the_commit_concurrency():
+    db = FakeFirestore(commit_latency=0.01, max_concurrent_writes=1)
+    with BatchWriter(db, batch_size=5, max_in_flight=4, retry=no_wait_retry(50)) as writer:
+        for i in range(100):
+            writer.set(db.collection('items').document(f"item-{i}"), {'n': i})
+
+    assert db.failures > 0
+    assert writer.limiter.decreases > 0
+    assert writer.limiter.lowest_limit < 4
+    assert db.count('items') == 100
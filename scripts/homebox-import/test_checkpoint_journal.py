@@ -0,0 +1,81 @@
+"""Tests for checkpoint_journal.py and resuming an import from it"""
+
+import contextlib
+import io
+import sqlite3
+
+from checkpoint_journal import CheckpointJournal
+from fake_firestore import FakeFirestore
+from homebox_import import HomeBoxImporter
+from synthetic_data import generate_rows, write_csv
+
+USER_ID = 'user-1'
+
+
+def run_import(csv_path: str, journal_path: str, db: FakeFirestore) -> HomeBoxImporter:
+    importer = HomeBoxImporter(csv_path, user_id=USER_ID, journal_path=journal_path, chunk_size=50)
+    importer.db = db
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert importer.run_import()
+    return importer
+
+
+def without_timestamps(document: dict) -> dict:
+    return {field: value for field, value in document.items() if field not in ('createdAt', 'updatedAt')}
+
+
+def test_completed_keys_survive_reopening(tmp_path):
+    path = str(tmp_path / 'import.journal.sqlite')
+    journal = CheckpointJournal(path, USER_ID)
+    journal.mark_done('item', [('id:a', 'doc-a'), ('id:b', 'doc-b')])
+    journal.mark_done('container', [('Garage', 'doc-c')])
+    journal.close()
+
+    journal = CheckpointJournal(path, USER_ID)
+    assert journal.completed('item') == {'id:a': 'doc-a', 'id:b': 'doc-b'}
+    assert journal.is_done('container', 'Garage')
+    assert not journal.is_done('item', 'id:c')
+    # Progress is kept per user
+    assert CheckpointJournal(path, 'user-2').completed('item') == {}
+
+    journal.reset()
+    assert journal.completed('item') == {}
+    journal.close()
+
+
+def test_rerun_skips_finished_items(tmp_path):
+    csv_path = str(tmp_path / 'export.csv')
+    journal_path = str(tmp_path / 'import.journal.sqlite')
+    write_csv(csv_path, generate_rows(300, locations=5, seed=1))
+    db = FakeFirestore()
+
+    first = run_import(csv_path, journal_path, db)
+    writes = db.writes
+    second = run_import(csv_path, journal_path, db)
+
+    assert first.items_imported > 0
+    assert db.writes == writes
+    assert second.items_skipped == first.items_imported
+
+
+def test_interrupted_import_resumes_with_the_missing_items(tmp_path):
+    csv_path = str(tmp_path / 'export.csv')
+    journal_path = str(tmp_path / 'import.journal.sqlite')
+    write_csv(csv_path, generate_rows(300, locations=5, seed=1))
+    complete = FakeFirestore()
+    run_import(csv_path, journal_path, complete)
+
+    # Forget a third of the items, as if the run had stopped before committing them
+    with sqlite3.connect(journal_path) as conn:
+        forgotten = {doc_id for (doc_id,) in conn.execute(
+            "SELECT doc_id FROM completed WHERE kind = 'item' AND rowid % 3 = 0")}
+        conn.execute("DELETE FROM completed WHERE kind = 'item' AND rowid % 3 = 0")
+
+    resumed = FakeFirestore()
+    importer = run_import(csv_path, journal_path, resumed)
+
+    assert forgotten
+    assert set(resumed.data['items']) == forgotten
+    assert importer.items_imported == len(forgotten)
+    for doc_id in forgotten:
+        assert without_timestamps(resumed.data['items'][doc_id]) == without_timestamps(complete.data['items'][doc_id])
@@ -0,0 +1,75 @@
+"""Tests for the Parquet/Arrow input and the converted-CSV cache in columnar_input.py"""
+
+import os
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+import columnar_input
+from homebox_import import HomeBoxImporter
+from item_fields import IMPORT_COLUMNS
+from synthetic_data import generate_rows, write_csv
+
+
+def read_frames(csv_path: str, csv_cache: bool = True):
+    importer = HomeBoxImporter(csv_path, user_id='user-1', chunk_size=40, csv_cache=csv_cache)
+    return list(importer.iter_csv_frames())
+
+
+def rows_of(frames):
+    return [row for df in frames for row in df[sorted(df.columns)].to_dict('records')]
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / 'export.csv')
+    write_csv(path, generate_rows(100, locations=3, seed=2))
+    return path
+
+
+def test_first_pass_writes_a_cache_with_the_same_rows(csv_path):
+    assert columnar_input.cached_columns(csv_path) is None
+    from_csv = read_frames(csv_path)
+
+    assert columnar_input.cached_columns(csv_path) == columnar_input.cache_path(csv_path)
+    from_cache = read_frames(csv_path)
+    assert rows_of(from_cache) == rows_of(from_csv)
+    assert set(from_cache[0].columns) <= set(IMPORT_COLUMNS)
+
+
+def test_cache_is_invalidated_when_the_csv_changes(csv_path):
+    read_frames(csv_path)
+    write_csv(csv_path, generate_rows(120, locations=3, seed=5))
+    assert columnar_input.cached_columns(csv_path) is None
+    assert rows_of(read_frames(csv_path)) == rows_of(read_frames(csv_path, csv_cache=False))
+
+
+def test_cache_is_invalidated_by_a_touch_or_a_new_cache_version(csv_path, monkeypatch):
+    read_frames(csv_path)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert columnar_input.cached_columns(csv_path) is None
+
+    read_frames(csv_path)
+    assert columnar_input.cached_columns(csv_path) is not None
+    monkeypatch.setattr(columnar_input, 'CACHE_VERSION', columnar_input.CACHE_VERSION + 1)
+    assert columnar_input.cached_columns(csv_path) is None
+
+
+def test_unreadable_cache_is_ignored(csv_path):
+    read_frames(csv_path)
+    with open(columnar_input.cache_path(csv_path), 'wb') as f:
+        f.write(b'not parquet')
+    assert columnar_input.cached_columns(csv_path) is None
+    assert rows_of(read_frames(csv_path)) == rows_of(read_frames(csv_path, csv_cache=False))
+
+
+def test_cache_is_not_published_when_the_csv_changes_while_read(csv_path):
+    converter = columnar_input.CsvConverter(csv_path)
+    converter.write(read_frames(csv_path, csv_cache=False)[0])
+    write_csv(csv_path, generate_rows(10, seed=9))
+
+    assert not converter.commit()
+    assert not os.path.exists(columnar_input.cache_path(csv_path))
+    assert not os.path.exists(converter._temp_path)
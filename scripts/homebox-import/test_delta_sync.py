@@ -0,0 +1,87 @@
+"""Tests for delta_sync.py and --sync imports against fake_firestore.py"""
+
+import contextlib
+import io
+from datetime import datetime, timedelta, timezone
+
+from delta_sync import HASH_FIELD, changed_fields, document_hash
+from fake_firestore import FakeFirestore
+from homebox_import import HomeBoxImporter
+from synthetic_data import generate_rows, write_csv
+
+USER_ID = 'user-1'
+
+DOCUMENT = {
+    'name': 'Cordless Drill',
+    'containerId': 'container-1',
+    'purchasePrice': 120.0,
+    'purchaseDate': datetime(2023, 4, 1),
+    'tags': ['tag-1', 'tag-2'],
+    'createdAt': 'SERVER_TIMESTAMP',
+    'updatedAt': 'SERVER_TIMESTAMP',
+    'imageUrl': None,
+}
+
+
+def test_hash_is_stable_and_ignores_fields_the_import_does_not_own():
+    reordered = dict(reversed(list(DOCUMENT.items())))
+    assert document_hash(reordered) == document_hash(DOCUMENT)
+    assert document_hash(DOCUMENT | {'imageUrl': 'https://example.com/a.jpg', 'updatedAt': 'later',
+                                     HASH_FIELD: 'old'}) == document_hash(DOCUMENT)
+
+
+def test_hash_changes_with_owned_fields():
+    assert document_hash(DOCUMENT | {'name': 'Corded Drill'}) != document_hash(DOCUMENT)
+    assert document_hash(DOCUMENT | {'purchaseDate': datetime(2023, 4, 2)}) != document_hash(DOCUMENT)
+    assert document_hash(DOCUMENT | {'tags': ['tag-2', 'tag-1']}) != document_hash(DOCUMENT)
+
+
+def test_changed_fields_matches_values_read_back_from_firestore():
+    # Firestore returns aware UTC timestamps and may return whole floats as ints
+    stored = DOCUMENT | {
+        'purchasePrice': 120,
+        'purchaseDate': datetime(2023, 4, 1, 2, tzinfo=timezone(timedelta(hours=2))),
+        'createdAt': datetime(2024, 1, 1, tzinfo=timezone.utc),
+        'imageUrl': 'https://example.com/a.jpg',
+    }
+    assert changed_fields(DOCUMENT, stored) == {}
+
+
+def test_changed_fields_returns_only_differing_owned_fields():
+    stored = dict(DOCUMENT)
+    del stored['containerId']
+    document = DOCUMENT | {'name': 'Corded Drill', 'updatedAt': 'later', 'imageUrl': 'new.jpg'}
+    assert changed_fields(document, stored) == {'name': 'Corded Drill', 'containerId': 'container-1'}
+
+
+def run_import(csv_path: str, db: FakeFirestore, sync: bool) -> HomeBoxImporter:
+    importer = HomeBoxImporter(csv_path, user_id=USER_ID, journal_path=f"{csv_path}.journal.sqlite", sync=sync)
+    importer.db = db
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert importer.run_import()
+    return importer
+
+
+def test_sync_writes_only_what_changed(tmp_path):
+    csv_path = str(tmp_path / 'export.csv')
+    rows = list(generate_rows(100, locations=3, seed=1))
+    rows = [row for row in rows if row['HB.location']]
+    write_csv(csv_path, iter(rows))
+    db = FakeFirestore()
+    run_import(csv_path, db, sync=False)
+
+    rows[0]['HB.name'] = 'Renamed Item'
+    write_csv(csv_path, iter(rows[:-1]))
+    importer = run_import(csv_path, db, sync=True)
+
+    assert importer.items_updated == 1
+    assert importer.items_deleted == 1
+    assert importer.items_unchanged == len(rows) - 2
+    assert db.count('items') == len(rows) - 1
+    assert any(item['name'] == 'Renamed Item' for item in db.data['items'].values())
+
+    # Only the labels of the deleted item changed their usage count
+    removed_labels = {label.strip() for label in rows[-1]['HB.labels'].split(';') if label.strip()}
+    assert importer.tags_new == 0
+    assert importer.tags_updated == len(removed_labels)
+    assert importer.tags_updated + importer.tags_unchanged == len(importer.tags_created)
@@ -0,0 +1,52 @@
+"""Tests for hearth_item_cache.py and skipping Hearth items that already have an image"""
+
+import contextlib
+import io
+import queue
+
+from fake_firestore import FakeFirestore
+from hearth_item_cache import HearthItemCache
+from homebox_image_importer import HomeBoxImageImporter
+
+USER_ID = 'user-1'
+
+
+def hearth_items(db: FakeFirestore):
+    items = db.collection('items')
+    items.document('imported').set({'userId': USER_ID, 'name': 'Drill', 'imageUrl': 'data:image/jpeg;base64,AAAA',
+                                    'hasImage': True, 'homeboxId': 'hb-1'})
+    items.document('from-app').set({'userId': USER_ID, 'name': 'Saw', 'imageUrl': 'https://example.com/saw.jpg',
+                                    'homeboxId': 'hb-2'})
+    items.document('no-image').set({'userId': USER_ID, 'name': 'Hammer', 'imageUrl': None, 'homeboxId': 'hb-3'})
+    items.document('empty-url').set({'userId': USER_ID, 'name': 'Level', 'imageUrl': '', 'homeboxId': 'hb-4'})
+    items.document('other-user').set({'userId': 'user-2', 'name': 'Saw', 'imageUrl': 'https://example.com/x.jpg'})
+
+
+def test_items_with_an_image_url_are_flagged():
+    db = FakeFirestore()
+    hearth_items(db)
+    cache = HearthItemCache.load(db, USER_ID)
+    reads = db.reads
+
+    assert cache.load_image_urls(db, USER_ID) == 1
+    # Only the IDs of the items with an image were read
+    assert db.reads - reads == 2
+    assert {cache.get(name).id: cache.get(name).has_image for name in ('Drill', 'Saw', 'Hammer', 'Level')} == {
+        'imported': True, 'from-app': True, 'no-image': False, 'empty-url': False}
+
+
+def test_pipeline_skips_items_that_already_have_an_image():
+    db = FakeFirestore()
+    hearth_items(db)
+    importer = HomeBoxImageImporter('http://homebox.local', 'token', USER_ID, compress_workers=1)
+    importer.db = db
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert importer.load_hearth_items_cache()
+        download_queue = queue.Queue()
+        homebox_items = [{'id': f"hb-{i}", 'imageId': f"image-{i}", 'name': name}
+                         for i, name in enumerate(['Drill', 'Saw', 'Hammer', 'Level'], 1)]
+        importer._feed_pipeline(homebox_items, download_queue)
+
+    queued = [hearth_item.id for _, hearth_item in list(download_queue.queue)]
+    assert queued == ['no-image', 'empty-url']
+    assert importer.images_present == 2
@@ -0,0 +1,140 @@
+"""Tests for homebox_import.py, run against the stand-ins in fake_firestore.py and fake_homebox_server.py"""
+
+import contextlib
+import io
+import os
+import tempfile
+
+import pandas as pd
+import pytest
+
+import columnar_input
+import homebox_import
+import item_transform
+from fake_firestore import FakeFirestore
+from fake_homebox_server import FakeHomeBoxServer
+from homebox_image_importer import HomeBoxImageImporter
+from homebox_import import HomeBoxImporter
+from image_attach import ItemImageAttacher
+from image_storage import LocalImageStore
+from sinks import JsonlSink, read_staged
+from synthetic_data import generate_image_corpus, generate_rows, homebox_api_items, write_csv
+
+USER_ID = 'user-1'
+TOKEN = 'token'
+
+
+class FirebaseOnlyStore(LocalImageStore):
+    """A local store that, like FirebaseImageStore, only uploads once Firebase is initialized"""
+
+    needs_firebase = True
+    firebase_ready = False
+
+    def upload(self, path: str, data: bytes, content_type: str) -> str:
+        if not self.firebase_ready:
+            raise RuntimeError('Firebase app not initialized')
+        return super().upload(path, data, content_type)
+
+
+def unkeyed_rows(locations):
+    """Cleaned rows without a HomeBox link, import ref or asset ID, so they are keyed by row number"""
+    rows = []
+    for i, location in enumerate(locations):
+        row = next(generate_rows(1, seed=i))
+        row.update({'HB.location': location, 'HB.url': None, 'HB.import_ref': None, 'HB.asset_id': None})
+        rows.append({name: (value or None) for name, value in row.items()})
+    return rows
+
+
+def run_quietly(importer: HomeBoxImporter) -> bool:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return importer.run_import()
+
+
+def test_stage_with_images_initializes_firebase_for_storage(tmp_path):
+    rows = list(generate_rows(40, locations=3, label_cardinality=5, seed=1))
+    csv_path = tmp_path / 'export.csv'
+    write_csv(str(csv_path), iter(rows))
+    items = homebox_api_items(rows, image_ratio=1.0, seed=1)
+    corpus = generate_image_corpus(2, (64, 48), seed=1)
+    store = FirebaseOnlyStore(str(tmp_path / 'images'))
+    staged_path = tmp_path / 'staged.jsonl'
+
+    with FakeHomeBoxServer(items, token=TOKEN, image_corpus=corpus) as server:
+        importer = HomeBoxImporter(str(csv_path), user_id=USER_ID, sink=JsonlSink(str(staged_path)))
+        importer.images = ItemImageAttacher(HomeBoxImageImporter(server.url, TOKEN, USER_ID, compress_workers=1,
+                                                                 image_store=store))
+        initialized = []
+
+        def initialize_firebase():
+            initialized.append(True)
+            importer.db = FakeFirestore()
+            store.firebase_ready = True
+            return True
+
+        importer.initialize_firebase = initialize_firebase
+        assert run_quietly(importer)
+
+    assert initialized
+    assert not importer.errors
+    staged_items = [record['data'] for _, record in read_staged(str(staged_path)) if record['collection'] == 'items']
+    assert len(staged_items) == len(rows)
+    assert all(item['imageUrl'] for item in staged_items)
+
+
+def test_chunk_row_keys_match_row_path_when_leading_rows_are_skipped(monkeypatch):
+    # The first two rows have no container and are dropped before the transform
+    rows = unkeyed_rows(['Nowhere', 'Nowhere', 'Garage', 'Nowhere', 'Garage'])
+    first_row_number = 10
+
+    def queued_keys(queue):
+        importer = HomeBoxImporter('export.csv', user_id=USER_ID)
+        importer.writer = object()
+        importer.containers_created = {'Garage': 'container-1'}
+        keys = []
+        importer.queue_item = lambda key, item_data: keys.append(key)
+        with contextlib.redirect_stdout(io.StringIO()):
+            queue(importer)
+        assert not importer.errors
+        return keys
+
+    # Chunks after the first keep their index from the CSV reader
+    chunk = pd.DataFrame(rows, index=range(first_row_number, first_row_number + len(rows)), dtype=object)
+    row_path = queued_keys(lambda importer: importer.import_rows(rows, first_row_number))
+    column_path = queued_keys(lambda importer: importer.import_chunk(chunk.copy(), first_row_number))
+
+    def fail(*args, **kwargs):
+        raise ValueError('transform failed')
+
+    monkeypatch.setattr(item_transform, 'build_item_documents', fail)
+    fallback_path = queued_keys(lambda importer: importer.import_chunk(chunk.copy(), first_row_number))
+
+    assert row_path == ['row:12', 'row:14']
+    assert column_path == row_path
+    assert fallback_path == row_path
+
+
+def test_processes_read_one_parquet_copy_of_the_csv(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    # Treat the small test export like one too large for the plain CSV path
+    monkeypatch.setattr(homebox_import, 'PLAIN_CSV_MAX_BYTES', 0)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    rows = list(generate_rows(200, locations=4, seed=2))
+    csv_path = str(tmp_path / 'export.csv')
+    write_csv(csv_path, iter(rows))
+
+    importer = HomeBoxImporter(csv_path, user_id=USER_ID, csv_cache=False, chunk_size=64)
+    input_path, temp_path = importer.worker_input()
+    assert input_path == temp_path and columnar_input.columnar_format(input_path) == 'parquet'
+    from_copy = [row for df in columnar_input.iter_columnar_frames(input_path, 64) for row in df.to_dict('records')]
+    assert from_copy == [row for df in importer.iter_csv_frames() for row in df.to_dict('records')]
+    os.remove(temp_path)
+
+    importer = HomeBoxImporter(csv_path, user_id=USER_ID, csv_cache=False,
+                               journal_path=str(tmp_path / 'import.journal.sqlite'))
+    importer.db = FakeFirestore()
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert importer.run_import(processes=2, db_factory=FakeFirestore)
+    assert importer.items_imported == sum(1 for row in rows if row['HB.location'])
+    # The temporary copy is gone and no cache was left next to the CSV
+    assert sorted(os.listdir(tmp_path)) == ['export.csv', 'import.journal.sqlite']
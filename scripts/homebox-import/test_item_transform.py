@@ -0,0 +1,61 @@
+"""item_transform.py must build exactly what HomeBoxImporter builds row by row"""
+
+import pandas as pd
+
+from homebox_import import HomeBoxImporter
+from item_fields import HOMEBOX_ITEM_URL
+from item_transform import build_item_documents, item_keys
+from sinks import SERVER_TIMESTAMP
+from synthetic_data import generate_rows, write_csv
+
+USER_ID = 'user-1'
+
+# Values the synthetic rows don't produce
+EDGE_CASES = [
+    {'HB.purchase_price': 'abc', 'HB.sold_price': '1e3'},
+    {'HB.purchase_price': ' 12.50 ', 'HB.sold_price': 'None'},
+    {'HB.purchase_time': '03/15/2021', 'HB.warranty_expires': '2024-01-02 10:20:30'},
+    {'HB.purchase_time': '0001-02-16', 'HB.warranty_expires': 'someday'},
+    {'HB.purchase_time': '2021-2-3', 'HB.sold_to': 'A friend', 'HB.sold_time': '2022-06-01'},
+    {'HB.labels': ' Tools ;; Garden; ', 'HB.notes': 'Line one\nLine two'},
+    {'HB.url': 'http://homebox.local/items', 'HB.import_ref': '', 'HB.asset_id': ''},
+    {'HB.url': '', 'HB.import_ref': '', 'HB.asset_id': '', 'HB.name': '  Spaced name  '},
+    {'HB.description': '   ', 'HB.manufacturer': ' Bosch '},
+]
+
+
+def export_frames(tmp_path, rows):
+    csv_path = str(tmp_path / 'export.csv')
+    write_csv(csv_path, iter(rows))
+    importer = HomeBoxImporter(csv_path, user_id=USER_ID, chunk_size=64, csv_cache=False)
+    return importer, list(importer.iter_csv_frames())
+
+
+def test_documents_and_keys_match_the_row_by_row_build(tmp_path):
+    rows = list(generate_rows(300, locations=4, label_cardinality=20, seed=3))
+    for i, changes in enumerate(EDGE_CASES):
+        rows[i * 7].update(changes)
+    importer, frames = export_frames(tmp_path, rows)
+
+    first_row_number = 0
+    for df in frames:
+        container_ids = [f"container-{i}" for i in range(len(df))]
+        records = df.to_dict('records')
+        expected = [importer.build_item_document(item, container_id)
+                    for item, container_id in zip(records, container_ids)]
+        expected_keys = [importer.item_key(item, first_row_number + offset) for offset, item in enumerate(records)]
+
+        documents = build_item_documents(df, container_ids, USER_ID, SERVER_TIMESTAMP, importer.tag_ids)
+        assert documents == expected
+        assert item_keys(df, first_row_number, HOMEBOX_ITEM_URL) == expected_keys
+        first_row_number += len(df)
+
+
+def test_missing_columns_match_the_row_by_row_build():
+    importer = HomeBoxImporter('export.csv', user_id=USER_ID)
+    df = pd.DataFrame({'HB.location': ['Garage', 'Attic']}, dtype=object)
+    records = df.to_dict('records')
+    expected = [importer.build_item_document(item, 'container-1') for item in records]
+
+    assert build_item_documents(df, ['container-1'] * 2, USER_ID, SERVER_TIMESTAMP, importer.tag_ids) == expected
+    assert item_keys(df, 5, HOMEBOX_ITEM_URL) == [importer.item_key(item, 5 + i) for i, item in enumerate(records)]
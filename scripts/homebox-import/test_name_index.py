@@ -0,0 +1,46 @@
+"""FuzzyNameIndex must find what scoring every name with SequenceMatcher finds"""
+
+import random
+from difflib import SequenceMatcher
+
+from name_index import FuzzyNameIndex
+from synthetic_data import generate_rows, perturb_name
+
+
+def linear_best_match(names, query, threshold):
+    """The scan the index replaces: the first name with the highest ratio at or above threshold"""
+    best_index, best_score = None, 0.0
+    for index, name in enumerate(names):
+        score = SequenceMatcher(None, query, name).ratio()
+        if score > best_score and score >= threshold:
+            best_index, best_score = index, score
+    return None if best_index is None else (best_index, best_score)
+
+
+def build_index(names, threshold):
+    index = FuzzyNameIndex(threshold)
+    for position, name in enumerate(names):
+        index.add(name, position)
+    return index
+
+
+def test_best_match_equals_linear_scan():
+    rng = random.Random(7)
+    names = [row['HB.name'].lower() for row in generate_rows(300, seed=7)]
+    # Duplicates, to check that the first one added wins ties
+    names += names[:20]
+    queries = [perturb_name(rng.choice(names), rng).lower() for _ in range(100)]
+    queries += [name[:rng.randint(1, len(name))] for name in rng.sample(names, 20)]
+    queries += ['', 'x', 'completely unrelated text']
+
+    for threshold in (0.7, 0.85):
+        index = build_index(names, threshold)
+        for query in queries:
+            assert index.best_match(query) == linear_best_match(names, query, threshold), query
+
+
+def test_short_and_empty_names():
+    names = ['', 'a', 'ab', 'ba', 'abc', 'tv', 'tvs']
+    index = build_index(names, 0.6)
+    for query in ['', 'a', 'b', 'ab', 'abc', 'tv', 'vt', 'tvs']:
+        assert index.best_match(query) == linear_best_match(names, query, 0.6), query
@@ -0,0 +1,77 @@
+"""Tests for the staged JSONL encoding and the buffered sinks in sinks.py"""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from sinks import (DELETE_FIELD, SERVER_TIMESTAMP, DryRunSink, JsonlSink, decode_value, encode_record,
+                   encode_value, firestore_sentinel, read_staged)
+
+DOCUMENT = {
+    'name': 'Cordless Drill',
+    'purchasePrice': 120.5,
+    'quantity': 2,
+    'description': None,
+    'purchaseDate': datetime(2023, 4, 1),
+    'soldAt': datetime(2024, 5, 6, 7, 8, 9, tzinfo=timezone.utc),
+    'tags': ['tag-1', 'tag-2'],
+    'dimensions': {'width': 10, 'seen': [datetime(2020, 1, 1)]},
+    'notes': 'Line one\nLine two, with ünïcode',
+}
+
+
+def test_values_round_trip_through_json():
+    encoded = json.loads(json.dumps(encode_value(DOCUMENT)))
+    assert decode_value(encoded) == DOCUMENT
+
+
+def test_sentinels_decode_to_the_firestore_client_sentinels():
+    pytest.importorskip('google.cloud.firestore_v1')
+    encoded = json.loads(json.dumps(encode_value({'createdAt': SERVER_TIMESTAMP, 'old': DELETE_FIELD})))
+    assert encoded == {'createdAt': {'$sentinel': 'SERVER_TIMESTAMP'}, 'old': {'$sentinel': 'DELETE_FIELD'}}
+
+    decoded = decode_value(encoded)
+    assert decoded['createdAt'] is firestore_sentinel(SERVER_TIMESTAMP)
+    assert decoded['old'] is firestore_sentinel(DELETE_FIELD)
+    # The client's own sentinels encode the same way as the stand-ins
+    assert encode_value(decoded) == encoded
+
+
+def test_unknown_sentinels_are_rejected():
+    with pytest.raises(ValueError):
+        decode_value({'$sentinel': 'ARRAY_UNION'})
+
+
+def test_staged_writes_read_back_in_order(tmp_path):
+    path = str(tmp_path / 'staged.jsonl')
+    batches = []
+    with JsonlSink(path, on_batch=lambda number, ops, error: batches.append((len(ops), error)),
+                   batch_size=2) as sink:
+        sink.set('items', 'item-1', DOCUMENT)
+        sink.update('items', 'item-2', {'name': 'Renamed', 'updatedAt': SERVER_TIMESTAMP})
+        sink.delete('items', 'item-3')
+
+    records = [record for _, record in read_staged(path)]
+    assert batches == [(2, None), (1, None)]
+    assert [(record['op'], record['id']) for record in records] == [
+        ('set', 'item-1'), ('update', 'item-2'), ('delete', 'item-3')]
+    assert decode_value(records[0]['data']) == DOCUMENT
+    assert 'data' not in records[2]
+    assert [line for line, _ in read_staged(path)][0] == encode_record('set', 'items', 'item-1', DOCUMENT)
+
+
+def test_dry_run_counts_what_would_be_written():
+    sink = DryRunSink(samples_per_container=1)
+    sink.set('containers', 'container-1', {'name': 'Garage'})
+    sink.set('tags', 'tag-1', {'name': 'Tools'})
+    for i in range(3):
+        sink.set('items', f"item-{i}", {'name': f"Item {i}", 'containerId': 'container-1'})
+    sink.update('items', 'item-0', {'name': 'Renamed'})
+    sink.close()
+
+    assert sink.containers == {'container-1': 'Garage'}
+    assert sink.tags == {'tag-1': 'Tools'}
+    assert sink.item_counts == {'container-1': 3}
+    assert len(sink.samples['container-1']) == 1
+    assert sink.other_writes == 1
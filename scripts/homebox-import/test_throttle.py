@@ -0,0 +1,36 @@
+"""Tests for the retry classification and RetryPolicy in throttle.py"""
+
+import pytest
+
+from fake_firestore import Unavailable
+from throttle import RetryPolicy, is_transient
+
+
+def test_transient_statuses_and_connection_errors_are_retried():
+    assert is_transient(Unavailable('unavailable', 503))
+    assert is_transient(Unavailable('quota', 429))
+    assert is_transient(ConnectionResetError())
+    assert not is_transient(ValueError('bad value'))
+
+
+def test_aborted_is_retried_but_already_exists_is_not():
+    exceptions = pytest.importorskip('google.api_core.exceptions')
+    # Both map to HTTP 409
+    assert is_transient(exceptions.Aborted('commit contention'))
+    assert not is_transient(exceptions.AlreadyExists('document exists'))
+    assert not is_transient(exceptions.Conflict('conflict'))
+
+
+def test_create_conflict_fails_on_the_first_attempt():
+    exceptions = pytest.importorskip('google.api_core.exceptions')
+    retry = RetryPolicy(attempts=5, base_delay=0.0)
+    calls = []
+
+    def create():
+        calls.append(True)
+        raise exceptions.AlreadyExists('document exists')
+
+    with pytest.raises(exceptions.AlreadyExists):
+        retry.call(create)
+    assert len(calls) == 1
+    assert retry.retries == 0
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Adaptive concurrency and retries for Firestore and HomeBox calls
+
+AdaptiveLimiter caps how many calls run at once and adjusts the cap AIMD
+style (like TCP congestion control): every successful call raises it by
+1/limit, so it grows by about one per round of calls, and an overload error
+(429, 503, DEADLINE_EXCEEDED, timeouts) halves it. RetryPolicy retries
+transient errors with jittered exponential backoff, releasing its slot while
+it waits.
+
+Usage:
+    limiter = AdaptiveLimiter(maximum=8)
+    retry = RetryPolicy(attempts=6)
+    retry.call(lambda: doc_ref.update(data), limiter)
+    data = await retry.call_async(lambda: client.download_attachment(item_id, image_id), async_limiter)
+"""
+
+import asyncio
+import random
+import sys
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+_CONNECTION_ERRORS = (ConnectionError, TimeoutError, asyncio.TimeoutError)
+
+# HTTP statuses worth retrying. google.api_core exceptions carry the HTTP
+# equivalent of their gRPC code in .code: RESOURCE_EXHAUSTED is 429, INTERNAL
+# 500, UNAVAILABLE 503, DEADLINE_EXCEEDED 504. ABORTED (commit contention) and
+# ALREADY_EXISTS (a create() conflict) are both 409, so 409 is left out and
+# ABORTED is recognized by its exception type instead
+TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+
+DEFAULT_RETRY_ATTEMPTS = 6
+
+T = TypeVar('T')
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether an error from Firestore or HomeBox is worth retrying"""
+    if isinstance(error, _CONNECTION_ERRORS):
+        return True
+    # Looked up rather than imported: without aiohttp or the Google client
+    # loaded, no error can be one of theirs, and neither has to be loaded here
+    aiohttp = sys.modules.get('aiohttp')
+    if aiohttp is not None and isinstance(error, aiohttp.ClientConnectionError):
+        return True
+    api_exceptions = sys.modules.get('google.api_core.exceptions')
+    if api_exceptions is not None and isinstance(error, api_exceptions.Aborted):
+        return True
+    # HomeBoxRequestError has .status; google.api_core exceptions have .code
+    for attribute in ('status', 'code'):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value in TRANSIENT_STATUSES
+    return False
+
+
+class AdaptiveLimiter:
+    """Thread-safe AIMD concurrency limit between minimum and maximum"""
+
+    def __init__(self, maximum: int, minimum: int = 1, initial: Optional[int] = None,
+                 decrease_factor: float = 0.5):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = float(min(initial or self.maximum, self.maximum))
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.decreases = 0
+        self.lowest_limit = self.limit
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def current(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    def _try_enter(self) -> Optional[float]:
+        if self.in_flight >= self.current:
+            return None
+        self.in_flight += 1
+        return time.monotonic()
+
+    def _record(self, started_at: float, overloaded: bool):
+        # Only grow a limit that is actually in use, so it can't drift far
+        # above what was ever tested while callers are idle
+        saturated = self.in_flight >= self.current
+        self.in_flight -= 1
+        if not overloaded:
+            if saturated:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        elif started_at >= self._last_decrease:
+            # Calls started before the last decrease saw the old limit; one
+            # overload event only shrinks the limit once
+            self.limit = max(self.minimum, self.limit * self.decrease_factor)
+            self.lowest_limit = min(self.lowest_limit, self.limit)
+            self._last_decrease = time.monotonic()
+            self.decreases += 1
+
+    def acquire(self) -> float:
+        """Wait for a free slot; returns a ticket for release()"""
+        with self._condition:
+            while True:
+                ticket = self._try_enter()
+                if ticket is not None:
+                    return ticket
+                self._condition.wait()
+
+    def release(self, ticket: float, overloaded: bool = False):
+        with self._condition:
+            self._record(ticket, overloaded)
+            self._condition.notify_all()
+
+
+class AsyncAdaptiveLimiter(AdaptiveLimiter):
+    """AdaptiveLimiter for coroutines on a single event loop"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._async_condition = asyncio.Condition()
+
+    async def acquire(self) -> float:
+        async with self._async_condition:
+            while True:
+                ticket = self._try_enter()
+                if ticket is not None:
+                    return ticket
+                await self._async_condition.wait()
+
+    async def release(self, ticket: float, overloaded: bool = False):
+        async with self._async_condition:
+            self._record(ticket, overloaded)
+            self._async_condition.notify_all()
+
+
+class RetryPolicy:
+    """Retry transient errors with full-jitter exponential backoff"""
+
+    def __init__(self, attempts: int = DEFAULT_RETRY_ATTEMPTS, base_delay: float = 0.5,
+                 max_delay: float = 30.0, metrics=None, name: str = 'retry'):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.metrics = metrics
+        self.name = name
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def delay(self, attempt: int) -> float:
+        """Random delay before retry number attempt + 1, so clients that failed together spread out"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if not is_transient(error) or attempt >= self.attempts - 1:
+            return False
+        with self._lock:
+            self.retries += 1
+        if self.metrics:
+            self.metrics.count(f'{self.name}.retries')
+        return True
+
+    def call(self, func: Callable[[], T], limiter: Optional[AdaptiveLimiter] = None) -> T:
+        """Call func, holding a limiter slot per attempt; re-raises the last error"""
+        attempt = 0
+        while True:
+            ticket = limiter.acquire() if limiter else None
+            try:
+                result = func()
+            except Exception as e:
+                if limiter:
+                    limiter.release(ticket, overloaded=is_transient(e))
+                if not self._should_retry(e, attempt):
+                    raise
+                time.sleep(self.delay(attempt))
+                attempt += 1
+                continue
+            if limiter:
+                limiter.release(ticket)
+            return result
+
+    async def call_async(self, func: Callable[[], Awaitable[T]],
+                         limiter: Optional[AsyncAdaptiveLimiter] = None) -> T:
+        """Async version of call(); func must return a new awaitable on every call"""
+        attempt = 0
+        while True:
+            ticket = await limiter.acquire() if limiter else None
+            try:
+                result = await func()
+            except Exception as e:
+                if limiter:
+                    await limiter.release(ticket, overloaded=is_transient(e))
+                if not self._should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(self.delay(attempt))
+                attempt += 1
+                continue
+            if limiter:
+                await limiter.release(ticket)
+            return result